@@ -1,12 +1,22 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Union
 
 from langchain_core.embeddings import Embeddings
 from langchain_core.pydantic_v1 import BaseModel, root_validator
 from langchain_core.utils import get_from_dict_or_env
 from packaging.version import parse
 from importlib.metadata import version
+from concurrent.futures import Future, ThreadPoolExecutor
 import asyncio
+import contextvars
 import logging
+import random
+import threading
+import time
+
+from langchain_emoji.components.embedding.embedding_error import EmbeddingBatchError
+from langchain_emoji.components.embedding.embedding_usage import (
+    record_embedding_usage,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +35,14 @@ class ZhipuaiTextEmbeddings(BaseModel, Embeddings):
     client: Any  # ZhipuAI  #: :meta private:
     model_name: str = "embedding-2"
     zhipuai_api_key: Optional[str] = None
-    count_token: int = 0
+    count_token: int = 0  # 进程内累计用量, 单次请求用量见 get_embedding_usage
+    reports_usage: ClassVar[bool] = True
+    batch_size: int = 16  # 单次请求的文本数, embedding-2 单次总长不超过 8K tokens
+    max_concurrency: int = 4  # 同时进行的请求数, 即线程池大小
+    max_retries: int = 3
+    retry_backoff: float = 0.5  # 首次重试的等待秒数, 之后按指数增长
+    executor: Any = None  # 并发请求使用的线程池, 大小为 max_concurrency
+    lock: Any  #: :meta private:
 
     @root_validator(allow_reuse=True)
     def validate_environment(cls, values: Dict) -> Dict:
@@ -48,6 +65,13 @@ class ZhipuaiTextEmbeddings(BaseModel, Embeddings):
                 api_key=zhipuai_api_key,
             )
             values["client"] = client
+            if values.get("executor") is None:
+                # 未传入线程池时 (如单独使用) 自行创建
+                values["executor"] = ThreadPoolExecutor(
+                    max_workers=max(values.get("max_concurrency") or 1, 1),
+                    thread_name_prefix="zhipuai-embedding",
+                )
+            values["lock"] = threading.Lock()
             return values
         except ImportError:
             raise RuntimeError(
@@ -55,82 +79,125 @@ class ZhipuaiTextEmbeddings(BaseModel, Embeddings):
                 "Please install it via 'pip install zhipuai'"
             )
 
-    def _embed(self, texts: List[str]) -> Optional[List[List[float]]]:
+    def _is_retryable(self, error: BaseException) -> bool:
+        import zhipuai
+
+        retryable = (
+            zhipuai.APIReachLimitError,
+            zhipuai.APIInternalError,
+            zhipuai.APIServerFlowExceedError,
+            zhipuai.APITimeoutError,
+        )
+        return isinstance(error, retryable)
+
+    def _create(self, texts: List[str]) -> Any:
+        """One embeddings API request, retried with exponential backoff and jitter"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.client.embeddings.create(model=self.model_name, input=texts)
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                delay = self.retry_backoff * 2**attempt * (0.5 + random.random())
+                logger.warning(
+                    f"embedding request failed ({e!r}), "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+                )
+                time.sleep(delay)
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        response = self._create(texts)
+        with self.lock:
+            self.count_token += response.usage.total_tokens
+        record_embedding_usage(response.usage.total_tokens)
+        data = sorted(response.data, key=lambda item: item.index)
+        return [item.embedding for item in data]
+
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        size = max(self.batch_size, 1)
+        return [texts[i : i + size] for i in range(0, len(texts), size)]
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        # 复制当前上下文, 用量统计等 contextvar 在线程池中依然可见
+        return self.executor.submit(contextvars.copy_context().run, fn, *args)
+
+    def _collect(
+        self,
+        batches: List[List[str]],
+        results: List[Union[List[List[float]], BaseException]],
+    ) -> List[List[float]]:
+        vectors: List[Optional[List[float]]] = []
+        errors: Dict[int, BaseException] = {}
+        for batch, result in zip(batches, results):
+            if isinstance(result, BaseException):
+                errors.update({len(vectors) + i: result for i in range(len(batch))})
+                vectors.extend([None] * len(batch))
+            else:
+                vectors.extend(result)
+        if errors:
+            raise EmbeddingBatchError(vectors, errors)
+        return vectors
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
         """Internal method to call Zhipuai Embedding API and return embeddings.
 
+        Texts are sent `batch_size` per request, at most `max_concurrency` requests
+        run at once on the thread pool.
+
         Args:
             texts: A list of texts to embed.
 
         Returns:
-            A list of list of floats representing the embeddings, or None if an
-            error occurs.
+            A list of list of floats representing the embeddings.
+
+        Raises:
+            EmbeddingBatchError: Some requests failed, carries the other vectors.
         """
-        # try:
-        #     return [self._get_embedding(text) for text in texts]
-
-        # except Exception as e:
-        #     logger.exception(e)
-        #     # Log the exception or handle it as needed
-        #     logger.info(
-        #         f"Exception occurred while trying to get embeddings: {str(e)}"
-        #     )  # noqa: T201
-        #     return None
-        return asyncio.run(self._aembed(texts))
-
-    def embed_documents(self, texts: List[str]) -> Optional[List[List[float]]]:  # type: ignore[override]
+        batches = self._batches(texts)
+        futures = [self._submit(self._embed_batch, batch) for batch in batches]
+        results = [f.exception() or f.result() for f in futures]
+        return self._collect(batches, results)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Public method to get embeddings for a list of documents.
 
         Args:
             texts: The list of texts to embed.
 
         Returns:
-            A list of embeddings, one for each text, or None if an error occurs.
+            A list of embeddings, one for each text.
         """
         return self._embed(texts)
 
-    def embed_query(self, text: str) -> Optional[List[float]]:  # type: ignore[override]
+    def embed_query(self, text: str) -> List[float]:
         """Public method to get embedding for a single query text.
 
         Args:
             text: The text to embed.
 
         Returns:
-            Embeddings for the text, or None if an error occurs.
+            Embeddings for the text.
         """
-        result = self._embed([text])
-        return result[0] if result is not None else None
+        return self._embed([text])[0]
 
-    def _get_embedding(self, text: str) -> List[float]:
-        response = self.client.embeddings.create(model=self.model_name, input=text)
-        self.count_token += response.usage.total_tokens
-        return response.data[0].embedding
-
-    async def _aet_embedding(self, text: str) -> List[float]:
-        response = self.client.embeddings.create(model=self.model_name, input=text)
-        self.count_token += response.usage.total_tokens  # 统计token
-        return response.data[0].embedding
-
-    async def _aembed(self, texts: List[str]) -> Optional[List[List[float]]]:
-        """Internal method to call Zhipuai Embedding API and return embeddings.
+    async def _aembed(self, texts: List[str]) -> List[List[float]]:
+        """Asynchronous version of `_embed`, the event loop is never blocked.
 
         Args:
             texts: A list of texts to embed.
 
         Returns:
-            A list of list of floats representing the embeddings, or None if an
-            error occurs.
-        """
-        try:
-            tasks = [asyncio.create_task(self._aet_embedding(text)) for text in texts]
-            return await asyncio.gather(*tasks)
+            A list of list of floats representing the embeddings.
 
-        except Exception as e:
-            logger.exception(e)
-            # Log the exception or handle it as needed
-            logger.info(
-                f"Exception occurred while trying to get embeddings: {str(e)}"
-            )  # noqa: T201
-            return None
+        Raises:
+            EmbeddingBatchError: Some requests failed, carries the other vectors.
+        """
+        batches = self._batches(texts)
+        results = await asyncio.gather(
+            *(asyncio.wrap_future(self._submit(self._embed_batch, b)) for b in batches),
+            return_exceptions=True,
+        )
+        return self._collect(batches, results)
 
     async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
         """Asynchronous Embed search docs."""
@@ -138,8 +205,7 @@ class ZhipuaiTextEmbeddings(BaseModel, Embeddings):
 
     async def aembed_query(self, text: str) -> List[float]:
         """Asynchronous Embed query text."""
-        result = await self._aembed([text])
-        return result[0] if result is not None else None
+        return (await self._aembed([text]))[0]
 
 
 if __name__ == "__main__":
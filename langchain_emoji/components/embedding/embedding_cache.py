@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from langchain_emoji.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_QUERY_BATCH = 500
+
+
+class EmbeddingCache:
+    """Two-tier cache of embedding vectors keyed on model name and text hash.
+
+    Vectors are kept as float32 arrays in an in-memory LRU. With `persist_file` every
+    new vector is also written to a SQLite table, so vectors survive restarts and are
+    shared by the server and the data init tool. Disk hits are promoted to the LRU.
+
+    The async methods answer from memory on the event loop and run the SQLite
+    reads and writes in `executor`.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        maxsize: int = 4096,
+        persist_file: Optional[Path] = None,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        self.model = model
+        self.persist_file = persist_file
+        self.executor = executor
+        self._memory: LRUCache[np.ndarray] = LRUCache(maxsize=maxsize)
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_misses = 0
+        # 磁盘行数只在打开时统计一次, 之后随写入累加
+        self.disk_size = 0
+        if persist_file is not None:
+            self._open(persist_file)
+
+    def _open(self, persist_file: Path) -> None:
+        persist_file.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(persist_file, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._db.commit()
+        (self.disk_size,) = self._db.execute(
+            "SELECT COUNT(*) FROM embeddings"
+        ).fetchone()
+        logger.info(f"embedding disk cache opened: {persist_file}")
+
+    def key(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model}:{digest}"
+
+    def _load(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if self._db is None or not keys:
+            return {}
+        rows = []
+        with self._db_lock:
+            # 分批查询, 避免超出 SQLite 的参数个数限制
+            for start in range(0, len(keys), _QUERY_BATCH):
+                batch = keys[start : start + _QUERY_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows += self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+        found = {key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows}
+        self.disk_hits += len(found)
+        self.disk_misses += len(keys) - len(found)
+        return found
+
+    def _lookup(
+        self, texts: Sequence[str]
+    ) -> Tuple[List[str], List[Optional[np.ndarray]], List[str]]:
+        keys = [self.key(text) for text in texts]
+        vectors: List[Optional[np.ndarray]] = [self._memory.get(key) for key in keys]
+        missing = list({key for key, v in zip(keys, vectors) if v is None})
+        return keys, vectors, missing
+
+    def _fill(
+        self,
+        keys: List[str],
+        vectors: List[Optional[np.ndarray]],
+        found: Dict[str, np.ndarray],
+    ) -> List[Optional[List[float]]]:
+        for i, key in enumerate(keys):
+            if vectors[i] is None and key in found:
+                vectors[i] = found[key]
+                self._memory.set(key, found[key])
+        return [v.tolist() if v is not None else None for v in vectors]
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Cached vector of every text, None for the texts that must be embedded"""
+        keys, vectors, missing = self._lookup(texts)
+        return self._fill(keys, vectors, self._load(missing))
+
+    async def aget_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        keys, vectors, missing = self._lookup(texts)
+        found = {}
+        if missing and self._db is not None:
+            found = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._load, missing
+            )
+        return self._fill(keys, vectors, found)
+
+    def _remember(
+        self, texts: Sequence[str], vectors: Sequence[List[float]]
+    ) -> List[Tuple[str, bytes]]:
+        """Put vectors in the LRU, returns the rows to persist"""
+        rows = []
+        for text, vector in zip(texts, vectors):
+            if vector is None:
+                continue
+            key = self.key(text)
+            array = np.asarray(vector, dtype=np.float32)
+            self._memory.set(key, array)
+            rows.append((key, array.tobytes()))
+        return rows
+
+    def _persist(self, rows: List[Tuple[str, bytes]]) -> None:
+        if self._db is None or not rows:
+            return
+        try:
+            with self._db_lock:
+                # 同一 key 的向量不会变化, 已存在的行直接跳过
+                cursor = self._db.executemany(
+                    "INSERT OR IGNORE INTO embeddings (key, vector) VALUES (?, ?)",
+                    rows,
+                )
+                self._db.commit()
+                self.disk_size += max(cursor.rowcount, 0)
+        except sqlite3.Error as e:
+            # 磁盘缓存写入失败不影响 embedding 结果
+            logger.warning(f"write embedding disk cache failed: {e}")
+
+    def set_many(self, texts: Sequence[str], vectors: Sequence[List[float]]) -> None:
+        self._persist(self._remember(texts, vectors))
+
+    async def aset_many(
+        self, texts: Sequence[str], vectors: Sequence[List[float]]
+    ) -> None:
+        rows = self._remember(texts, vectors)
+        if self._db is not None and rows:
+            await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._persist, rows
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"model": self.model, "memory": self._memory.stats()}
+        if self._db is not None:
+            stats["disk"] = {
+                "size": self.disk_size,
+                "hits": self.disk_hits,
+                "misses": self.disk_misses,
+            }
+        return stats
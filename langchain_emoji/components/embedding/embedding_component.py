@@ -1,19 +1,32 @@
 import logging
 
-from injector import inject
+from injector import inject, singleton
 from langchain_community.embeddings import OpenAIEmbeddings
 from langchain_core.embeddings import Embeddings, DeterministicFakeEmbedding
 
+from langchain_emoji.paths import local_data_path
 from langchain_emoji.settings.settings import Settings
 from langchain_emoji.components.embedding.custom.zhipuai import ZhipuaiTextEmbeddings
+from langchain_emoji.components.embedding.embedding_cache import EmbeddingCache
+from langchain_emoji.components.embedding.embedding_proxy import EmbeddingProxy
+from langchain_emoji.components.executor.executor_component import ExecutorComponent
+from langchain_emoji.components.tokenizer.tokenizer_component import (
+    TokenizerComponent,
+)
 
 
 logger = logging.getLogger(__name__)
 
 
+@singleton
 class EmbeddingComponent:
     @inject
-    def __init__(self, settings: Settings) -> None:
+    def __init__(
+        self,
+        settings: Settings,
+        tokenizer: TokenizerComponent,
+        executors: ExecutorComponent,
+    ) -> None:
         embedding_mode = settings.embedding.mode
         logger.info("Initializing the embedding in mode=%s", embedding_mode)
         match embedding_mode:
@@ -27,19 +40,48 @@ class EmbeddingComponent:
                 )
             case "zhipuai":
                 zhipuai_settings = settings.zhipuai
+                embedding_settings = settings.embedding
                 self._embedding = ZhipuaiTextEmbeddings(
-                    zhipuai_api_key=zhipuai_settings.api_key
+                    zhipuai_api_key=zhipuai_settings.api_key,
+                    batch_size=embedding_settings.batch_size,
+                    max_concurrency=embedding_settings.max_concurrency,
+                    max_retries=embedding_settings.max_retries,
+                    retry_backoff=embedding_settings.retry_backoff,
+                    # 并发请求的线程池登记到执行器, 在监控中可见
+                    executor=executors.create(
+                        "embedding", embedding_settings.max_concurrency
+                    ),
                 )
             case "mock":
                 self._embedding = DeterministicFakeEmbedding(size=1352)
+        self.cache = self._create_cache(settings, embedding_mode, executors)
+        self._proxy = EmbeddingProxy(self._embedding, tokenizer, self.cache)
+
+    def _create_cache(
+        self, settings: Settings, mode: str, executors: ExecutorComponent
+    ) -> EmbeddingCache | None:
+        cache_settings = settings.embedding.cache
+        if not cache_settings.enabled:
+            return None
+        # 模型名参与缓存 key, 切换模型后不会命中旧向量
+        model = getattr(self._embedding, "model_name", None) or getattr(
+            self._embedding, "model", type(self._embedding).__name__
+        )
+        return EmbeddingCache(
+            f"{mode}/{model}",
+            maxsize=cache_settings.maxsize,
+            persist_file=(
+                local_data_path / "embedding_cache" / "embeddings.sqlite3"
+                if cache_settings.persist
+                else None
+            ),
+            # 异步路径的 SQLite 读写使用存储线程池
+            executor=executors.get("storage"),
+        )
 
     @property
     def embedding(self) -> Embeddings:
-        return self._embedding
+        return self._proxy
 
-    @property
-    def total_tokens(self) -> int:
-        try:
-            return self._embedding.count_token  # 目前只支持Zhipuai统计 embedding token
-        except Exception:
-            return 0
+    def stats(self) -> dict:
+        return self.cache.stats() if self.cache is not None else {"enabled": False}
@@ -0,0 +1,21 @@
+from typing import Dict, List, Optional
+
+
+class EmbeddingBatchError(RuntimeError):
+    """Part of the texts of one embedding call could not be embedded.
+
+    `vectors` holds a vector per input text, None where it failed, and `errors`
+    maps the index of every failed text to its exception, so callers can keep the
+    successful vectors and retry or report the rest.
+    """
+
+    def __init__(
+        self, vectors: List[Optional[List[float]]], errors: Dict[int, BaseException]
+    ) -> None:
+        self.vectors = vectors
+        self.errors = errors
+        first = next(iter(errors.values()), None)
+        super().__init__(
+            f"{len(errors)} of {len(vectors)} texts failed to embed, first error: "
+            f"{first!r}"
+        )
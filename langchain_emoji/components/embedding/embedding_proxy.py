@@ -0,0 +1,201 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+from langchain_emoji.components.embedding.embedding_cache import EmbeddingCache
+from langchain_emoji.components.embedding.embedding_error import EmbeddingBatchError
+from langchain_emoji.components.embedding.embedding_usage import (
+    record_embedding_usage,
+)
+from langchain_emoji.components.tokenizer.tokenizer_component import (
+    TokenizerComponent,
+)
+
+prefetched_embeddings_var: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar(
+    "prefetched_embeddings", default=None
+)
+
+
+@contextmanager
+def prefetched_embeddings(
+    embeddings: Dict[str, List[float]]
+) -> Generator[None, None, None]:
+    """Make already computed embeddings visible to every embedding call in the context.
+
+    Example:
+        >>> with prefetched_embeddings(dict(zip(texts, vectors))):
+        ...     # retrievers called here will not embed `texts` again
+    """
+    token = prefetched_embeddings_var.set(embeddings)
+    try:
+        yield
+    finally:
+        prefetched_embeddings_var.reset(token)
+
+
+class EmbeddingProxy(Embeddings):
+    """Wraps the configured embedding model and serves prefetched vectors first.
+
+    With a `cache` only the texts missing from it are sent to the model, in one
+    `embed_documents` call, so cache hits never reach the token counts.
+
+    Models that do not report their usage (e.g. OpenAIEmbeddings) get their token
+    usage estimated with the default tokenizer encoding, so every mode feeds
+    `get_embedding_usage`.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        tokenizer: TokenizerComponent,
+        cache: Optional[EmbeddingCache] = None,
+    ) -> None:
+        self.embedding = embedding
+        self.tokenizer = tokenizer
+        self.cache = cache
+        self.reports_usage = getattr(embedding, "reports_usage", False)
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "embedding":
+            raise AttributeError(name)
+        return getattr(self.embedding, name)
+
+    @staticmethod
+    def _prefetched(texts: List[str]) -> Optional[List[List[float]]]:
+        prefetched = prefetched_embeddings_var.get()
+        if not prefetched or any(text not in prefetched for text in texts):
+            return None
+        return [prefetched[text] for text in texts]
+
+    def _record_usage(self, texts: List[str]) -> None:
+        if self.reports_usage:
+            return
+        record_embedding_usage(sum(self.tokenizer.count_batch(texts)))
+
+    @staticmethod
+    def _missing(texts: List[str], vectors: List[Optional[List[float]]]) -> List[str]:
+        """Distinct texts that still need embedding"""
+        return list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+
+    def _cached(
+        self, texts: List[str]
+    ) -> Tuple[List[Optional[List[float]]], List[str]]:
+        """Cached vectors of texts and the distinct texts that still need embedding"""
+        vectors = self.cache.get_many(texts)
+        return vectors, self._missing(texts, vectors)
+
+    async def _acached(
+        self, texts: List[str]
+    ) -> Tuple[List[Optional[List[float]]], List[str]]:
+        # 磁盘缓存的读取不在事件循环上执行
+        vectors = await self.cache.aget_many(texts)
+        return vectors, self._missing(texts, vectors)
+
+    def _combine(
+        self,
+        texts: List[str],
+        vectors: List[Optional[List[float]]],
+        missing: List[str],
+        embedded: List[Optional[List[float]]],
+        errors: Optional[Dict[int, BaseException]] = None,
+    ) -> List[List[float]]:
+        """Fill the cache misses with the embedded vectors.
+
+        On a partial failure the successful vectors are still counted, the
+        EmbeddingBatchError is raised again with indexes of `texts`.
+        """
+        self._record_usage([t for t, v in zip(missing, embedded) if v is not None])
+        computed = dict(zip(missing, embedded))
+        merged = [v if v is not None else computed[t] for t, v in zip(texts, vectors)]
+        if errors:
+            failed = {missing[j]: error for j, error in errors.items()}
+            raise EmbeddingBatchError(
+                merged, {i: failed[t] for i, t in enumerate(texts) if t in failed}
+            )
+        return merged
+
+    def _merge(
+        self,
+        texts: List[str],
+        vectors: List[Optional[List[float]]],
+        missing: List[str],
+        embedded: List[Optional[List[float]]],
+        errors: Optional[Dict[int, BaseException]] = None,
+    ) -> List[List[float]]:
+        """Cache the embedded vectors and fill the cache misses with them"""
+        self.cache.set_many(missing, embedded)
+        return self._combine(texts, vectors, missing, embedded, errors)
+
+    async def _amerge(
+        self,
+        texts: List[str],
+        vectors: List[Optional[List[float]]],
+        missing: List[str],
+        embedded: List[Optional[List[float]]],
+        errors: Optional[Dict[int, BaseException]] = None,
+    ) -> List[List[float]]:
+        await self.cache.aset_many(missing, embedded)
+        return self._combine(texts, vectors, missing, embedded, errors)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        result = self._prefetched(texts)
+        if result is not None:
+            return result
+        if self.cache is None:
+            result = self.embedding.embed_documents(texts)
+            self._record_usage(texts)
+            return result
+        vectors, missing = self._cached(texts)
+        if not missing:
+            return vectors
+        try:
+            embedded = self.embedding.embed_documents(missing)
+        except EmbeddingBatchError as e:
+            return self._merge(texts, vectors, missing, e.vectors, e.errors)
+        return self._merge(texts, vectors, missing, embedded)
+
+    def embed_query(self, text: str) -> List[float]:
+        result = self._prefetched([text])
+        if result is not None:
+            return result[0]
+        if self.cache is None:
+            result = self.embedding.embed_query(text)
+            self._record_usage([text])
+            return result
+        vectors, missing = self._cached([text])
+        if not missing:
+            return vectors[0]
+        embedded = self.embedding.embed_query(text)
+        return self._merge([text], vectors, missing, [embedded])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        result = self._prefetched(texts)
+        if result is not None:
+            return result
+        if self.cache is None:
+            result = await self.embedding.aembed_documents(texts)
+            self._record_usage(texts)
+            return result
+        vectors, missing = await self._acached(texts)
+        if not missing:
+            return vectors
+        try:
+            embedded = await self.embedding.aembed_documents(missing)
+        except EmbeddingBatchError as e:
+            return await self._amerge(texts, vectors, missing, e.vectors, e.errors)
+        return await self._amerge(texts, vectors, missing, embedded)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        result = self._prefetched([text])
+        if result is not None:
+            return result[0]
+        if self.cache is None:
+            result = await self.embedding.aembed_query(text)
+            self._record_usage([text])
+            return result
+        vectors, missing = await self._acached([text])
+        if not missing:
+            return vectors[0]
+        embedded = await self.embedding.aembed_query(text)
+        return (await self._amerge([text], vectors, missing, [embedded]))[0]
@@ -0,0 +1,62 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Generator, Optional
+
+
+class EmbeddingUsage:
+    """Embedding token usage of one request"""
+
+    def __init__(self) -> None:
+        self.total_tokens = 0
+        self.successful_requests = 0
+        # 同一请求的 embedding 可能在多个线程中并发记录
+        self._lock = threading.Lock()
+
+    def add(self, tokens: int) -> None:
+        with self._lock:
+            self.total_tokens += tokens
+            self.successful_requests += 1
+
+    def __repr__(self) -> str:
+        return (
+            f"Embedding Tokens Used: {self.total_tokens}\n"
+            f"Successful Requests: {self.successful_requests}"
+        )
+
+
+embedding_usage_var: ContextVar[Optional[EmbeddingUsage]] = ContextVar(
+    "embedding_usage", default=None
+)
+
+
+def record_embedding_usage(tokens: int) -> None:
+    """Add tokens to the usage of the current request, no-op outside of a usage scope"""
+    usage = embedding_usage_var.get()
+    if usage is not None:
+        usage.add(tokens)
+
+
+@contextmanager
+def get_embedding_usage() -> Generator[EmbeddingUsage, None, None]:
+    """Get the embedding usage of the calls made in a context manager.
+
+    The usage object is bound to a context variable, so it is inherited by asyncio
+    tasks and executor calls started inside the block and concurrent requests never
+    share a counter.
+
+    Example:
+        >>> with get_embedding_usage() as usage:
+        ...     await retriever.ainvoke(prompt)
+        ...     print(usage.total_tokens)
+    """
+    usage = EmbeddingUsage()
+    token = embedding_usage_var.set(usage)
+    try:
+        yield usage
+    finally:
+        try:
+            embedding_usage_var.reset(token)
+        except ValueError:
+            # 异步生成器在其他上下文中关闭时无法 reset
+            embedding_usage_var.set(None)
@@ -0,0 +1,152 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from injector import inject, singleton
+
+from langchain_emoji.settings.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class MeteredExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor that tracks its queue depth, busy threads and wait time"""
+
+    def __init__(self, name: str, max_workers: int) -> None:
+        super().__init__(max_workers=max_workers, thread_name_prefix=name)
+        self.name = name
+        self.max_workers = max_workers
+        self._stats_lock = threading.Lock()
+        self.submitted = 0
+        self.started = 0
+        self.finished = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.peak_queued = 0
+        self._wait_total = 0.0
+        self.wait_max = 0.0
+
+    @property
+    def queued(self) -> int:
+        return self.submitted - self.started - self.cancelled
+
+    @property
+    def active(self) -> int:
+        return self.started - self.finished
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        enqueued_at = time.monotonic()
+
+        def run() -> Any:
+            wait = time.monotonic() - enqueued_at
+            with self._stats_lock:
+                self.started += 1
+                self._wait_total += wait
+                self.wait_max = max(self.wait_max, wait)
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                with self._stats_lock:
+                    self.failed += 1
+                raise
+            finally:
+                with self._stats_lock:
+                    self.finished += 1
+
+        with self._stats_lock:
+            self.submitted += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        future = super().submit(run)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future) -> None:
+        # 排队中被取消的任务不会运行, 不再计入队列长度
+        if future.cancelled():
+            with self._stats_lock:
+                self.cancelled += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            active, queued = self.active, self.queued
+            return {
+                "max_workers": self.max_workers,
+                "active": active,
+                "queued": queued,
+                "peak_queued": self.peak_queued,
+                "saturation": round(active / self.max_workers, 4),
+                "submitted": self.submitted,
+                "completed": self.finished,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "wait_avg_ms": (
+                    round(self._wait_total / self.started * 1000, 2)
+                    if self.started
+                    else 0.0
+                ),
+                "wait_max_ms": round(self.wait_max * 1000, 2),
+            }
+
+
+@singleton
+class ExecutorComponent:
+    """Registry of named, separately sized thread pools for blocking work.
+
+    The pools configured in `executor` (default, llm, trace, storage, vectorstore,
+    cpu) keep slow calls of one kind from starving the others, e.g. LangSmith calls
+    never occupy the threads of LLM calls. Components with a pool sized to their own
+    connection pool (minio, embedding) register it with `create`, so every pool
+    shows up in the metrics.
+    """
+
+    @inject
+    def __init__(self, settings: Settings) -> None:
+        executor_settings = settings.executor
+        self.default_pool = executor_settings.default_pool
+        self._executors: Dict[str, MeteredExecutor] = {}
+        self._lock = threading.Lock()
+        for name, max_workers in executor_settings.pools.items():
+            self.create(name, max_workers)
+        self.get(self.default_pool)
+        logger.info(
+            "Initialized executors: %s",
+            {name: ex.max_workers for name, ex in self._executors.items()},
+        )
+
+    def create(self, name: str, max_workers: int) -> MeteredExecutor:
+        """Register a pool, an existing pool of the same name is returned as is"""
+        with self._lock:
+            if name not in self._executors:
+                self._executors[name] = MeteredExecutor(name, max(max_workers, 1))
+            return self._executors[name]
+
+    def get(self, name: str) -> MeteredExecutor:
+        try:
+            return self._executors[name]
+        except KeyError:
+            raise KeyError(
+                f"executor {name} is not configured, "
+                f"available: {sorted(self._executors)}"
+            ) from None
+
+    async def run(self, name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run func in the named pool, with the caller's context variables"""
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self.get(name), call)
+
+    def install_default(self) -> None:
+        """Use the default pool for run_in_executor(None), e.g. LangChain sync fallbacks"""
+        asyncio.get_running_loop().set_default_executor(self.get(self.default_pool))
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: ex.stats() for name, ex in self._executors.items()}
+
+    def shutdown(self) -> None:
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
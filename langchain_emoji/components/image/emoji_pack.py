@@ -0,0 +1,165 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+PACK_DATA_FILE = "emoji.pack"
+PACK_INDEX_FILE = "emoji.idx.jsonl"
+
+
+class PackEntry(NamedTuple):
+    offset: int
+    size: int
+    md5: str
+
+
+class EmojiPack:
+    """All emoji images concatenated in one data file with a JSON lines offset index.
+
+    Images are served as zero-copy memoryview slices of a read-only mmap. The index
+    and the mmap are loaded on first access, appends write to the end of both files
+    and remap on the next read. A filename appended twice resolves to the last entry.
+    """
+
+    def __init__(self, pack_dir: Path) -> None:
+        self.pack_dir = pack_dir
+        self.data_file = pack_dir / PACK_DATA_FILE
+        self.index_file = pack_dir / PACK_INDEX_FILE
+        self._index: Optional[Dict[str, PackEntry]] = None
+        # 索引文件中完整行的字节数, 其后是写入中断留下的残行
+        self._index_end = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, src_dir: Path, pack_dir: Path) -> "EmojiPack":
+        """Pack every file of src_dir, the previous pack is replaced atomically"""
+        pack_dir.mkdir(parents=True, exist_ok=True)
+        tmp_data = pack_dir / (PACK_DATA_FILE + ".tmp")
+        tmp_index = pack_dir / (PACK_INDEX_FILE + ".tmp")
+        offset = 0
+        with open(tmp_data, "wb") as data, open(tmp_index, "w") as index:
+            for path in sorted(src_dir.iterdir()):
+                if not path.is_file():
+                    continue
+                content = path.read_bytes()
+                data.write(content)
+                index.write(cls._index_line(path.name, offset, content))
+                offset += len(content)
+        os.replace(tmp_data, pack_dir / PACK_DATA_FILE)
+        os.replace(tmp_index, pack_dir / PACK_INDEX_FILE)
+        return cls(pack_dir)
+
+    @staticmethod
+    def _index_line(filename: str, offset: int, content: bytes) -> str:
+        entry = {
+            "filename": filename,
+            "offset": offset,
+            "size": len(content),
+            "md5": hashlib.md5(content).hexdigest(),
+        }
+        return json.dumps(entry, ensure_ascii=False) + "\n"
+
+    def exists(self) -> bool:
+        return self.data_file.is_file() and self.index_file.is_file()
+
+    def _load(self) -> Dict[str, PackEntry]:
+        if self._index is not None:
+            return self._index
+        with self._lock:
+            if self._index is None:
+                index: Dict[str, PackEntry] = {}
+                end = 0
+                if self.exists():
+                    with open(self.index_file, "rb") as f:
+                        for line in f:
+                            try:
+                                # 每行与换行符一次写入, 缺少换行符说明写入被中断
+                                if not line.endswith(b"\n"):
+                                    raise ValueError(line)
+                                item = json.loads(line) if line.strip() else None
+                            except ValueError:
+                                logger.warning(
+                                    f"ignored a truncated entry of {self.index_file}"
+                                )
+                                break
+                            end += len(line)
+                            if item is not None:
+                                index[item["filename"]] = PackEntry(
+                                    item["offset"], item["size"], item["md5"]
+                                )
+                    logger.info(f"loaded emoji pack index with {len(index)} images")
+                self._index_end = end
+                self._index = index
+        return self._index
+
+    def _map(self) -> Optional[mmap.mmap]:
+        if self._mmap is None and self.exists() and self.data_file.stat().st_size:
+            with self._lock:
+                if self._mmap is None:
+                    with open(self.data_file, "rb") as f:
+                        self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def entry(self, filename: str) -> Optional[PackEntry]:
+        return self._load().get(filename)
+
+    def get(self, filename: str) -> Optional[memoryview]:
+        entry = self.entry(filename)
+        if entry is None:
+            return None
+        mapped = self._map()
+        if mapped is None or entry.offset + entry.size > len(mapped):
+            return None
+        return memoryview(mapped)[entry.offset : entry.offset + entry.size]
+
+    def append(self, filename: str, content: bytes) -> PackEntry:
+        index = self._load()
+        with self._lock:
+            self.pack_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.data_file, "ab") as data:
+                offset = data.tell()
+                data.write(content)
+            # 先写数据再写索引, 中断时只会留下无索引的尾部数据
+            with open(self.index_file, "ab") as f:
+                if f.tell() > self._index_end:
+                    # 截掉残行, 避免新的索引行与其拼接
+                    f.truncate(self._index_end)
+                f.write(self._index_line(filename, offset, content).encode("utf-8"))
+                self._index_end = f.tell()
+            entry = PackEntry(offset, len(content), hashlib.md5(content).hexdigest())
+            index[filename] = entry
+            # 旧的 mmap 可能仍被响应引用, 不主动 close, 下次读取时重新映射
+            self._mmap = None
+        return entry
+
+    def append_files(self, paths: Iterable[Path]) -> int:
+        appended = 0
+        for path in paths:
+            entry = self.entry(path.name)
+            content = path.read_bytes()
+            if entry is not None and entry.md5 == hashlib.md5(content).hexdigest():
+                continue
+            self.append(path.name, content)
+            appended += 1
+        return appended
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self._load()
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self._index is not None,
+            "mapped": self._mmap is not None,
+            "images": len(self._index) if self._index is not None else None,
+            "bytes": self.data_file.stat().st_size if self.data_file.is_file() else 0,
+        }
@@ -0,0 +1,301 @@
+import base64
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from injector import Injector, inject, singleton
+
+from langchain_emoji.components.executor.executor_component import ExecutorComponent
+from langchain_emoji.components.image.emoji_pack import EmojiPack
+from langchain_emoji.components.image.image_variant import (
+    is_variant,
+    make_variant,
+    variant_name,
+    write_atomic,
+)
+from langchain_emoji.components.minio.minio_component import MinioComponent
+from langchain_emoji.constants import PROJECT_ROOT_PATH
+from langchain_emoji.paths import local_data_path
+from langchain_emoji.settings.settings import Settings
+from langchain_emoji.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+@singleton
+class ImageComponent:
+    """Emoji image access shared by the local and minio dataset modes.
+
+    Raw bytes and pre-encoded base64 strings are kept in two LRU caches, each bounded
+    by a bytes budget, so popular images are served without touching disk or network.
+    In local mode with `image.pack.enabled` images are served as mmap slices of the
+    emoji pack, only the base64 cache is used for them.
+
+    Resized/re-encoded variants are read from an on-disk cache, filled at ingest time
+    by `tools/datainit.py --variants` or lazily on first request.
+    """
+
+    @inject
+    def __init__(
+        self, settings: Settings, injector: Injector, executors: ExecutorComponent
+    ) -> None:
+        self.executors = executors
+        self.mode = settings.dataset.mode
+        self.emo_dir = local_data_path / settings.dataset.name / "emo"
+        # MinIO 仅在 minio 模式下初始化
+        self.minio_service = (
+            injector.get(MinioComponent) if self.mode == "minio" else None
+        )
+
+        pack_settings = settings.image.pack
+        self.pack = (
+            EmojiPack(local_data_path / settings.dataset.name / pack_settings.dir)
+            if self.mode == "local" and pack_settings.enabled
+            else None
+        )
+
+        self.variant_settings = settings.image.variant
+        self.variants_dir = (
+            local_data_path / settings.dataset.name / self.variant_settings.dir
+        )
+
+        cache_settings = settings.image.cache
+        self.enabled = cache_settings.enabled
+        self._bytes: LRUCache[bytes] = LRUCache(
+            maxsize=cache_settings.maxsize, maxbytes=cache_settings.max_bytes
+        )
+        self._base64: LRUCache[str] = LRUCache(
+            maxsize=cache_settings.maxsize, maxbytes=cache_settings.max_base64_bytes
+        )
+
+        if self.enabled and cache_settings.warmup_file:
+            threading.Thread(
+                target=self.warm_up_from_file,
+                args=(PROJECT_ROOT_PATH / cache_settings.warmup_file,),
+                kwargs={"limit": cache_settings.warmup_limit},
+                name="image-cache-warmup",
+                daemon=True,
+            ).start()
+
+    def _load(self, filename: str) -> Optional[bytes]:
+        if self.mode == "local":
+            emoji_file = self.emo_dir / filename
+            if not emoji_file.is_file():
+                return None
+            return emoji_file.read_bytes()
+        elif self.mode == "minio":
+            return self.minio_service.get_file_bytes(filename)
+
+    async def _aload(self, filename: str) -> Optional[bytes]:
+        if self.mode == "minio":
+            return await self.minio_service.aget_file_bytes(filename)
+        return await self.executors.run("storage", self._load, filename)
+
+    def _cached_bytes(self, filename: str) -> Optional[Union[bytes, memoryview]]:
+        if self.pack is not None:
+            content = self.pack.get(filename)
+            if content is not None:
+                return content
+        return self._bytes.get(filename) if self.enabled else None
+
+    def _cache_bytes(self, filename: str, content: Optional[bytes]) -> None:
+        if self.enabled and content is not None:
+            self._bytes.set(filename, content)
+
+    def _encode(self, filename: str, content: Union[bytes, memoryview]) -> str:
+        encoded = base64.b64encode(content).decode("utf-8")
+        if self.enabled:
+            self._base64.set(filename, encoded)
+        return encoded
+
+    def get_bytes(self, filename: str) -> Optional[Union[bytes, memoryview]]:
+        content = self._cached_bytes(filename)
+        if content is None:
+            content = self._load(filename)
+            self._cache_bytes(filename, content)
+        return content
+
+    async def aget_bytes(self, filename: str) -> Optional[Union[bytes, memoryview]]:
+        """Like get_bytes, misses are read without blocking the event loop"""
+        content = self._cached_bytes(filename)
+        if content is None:
+            content = await self._aload(filename)
+            self._cache_bytes(filename, content)
+        return content
+
+    def check_variant(self, size: Optional[int], fmt: Optional[str]) -> None:
+        """Only configured sizes and formats are served, so the disk cache stays bounded"""
+        if not is_variant(size, fmt):
+            return
+        if not self.variant_settings.enabled:
+            raise ValueError("image variants are disabled")
+        if size and size not in self.variant_settings.sizes:
+            raise ValueError(
+                f"unsupported size {size}, choose from {self.variant_settings.sizes}"
+            )
+        if fmt and fmt not in self.variant_settings.formats:
+            raise ValueError(
+                f"unsupported format {fmt}, choose from {self.variant_settings.formats}"
+            )
+
+    def _read_variant(self, name: str) -> Optional[bytes]:
+        path = self.variants_dir / name
+        return path.read_bytes() if path.is_file() else None
+
+    def _cached_variant(self, name: str) -> Optional[bytes]:
+        content = self._bytes.get(name) if self.enabled else None
+        if content is None:
+            content = self._read_variant(name)
+            self._cache_bytes(name, content)
+        return content
+
+    def _store_variant(self, name: str, content: bytes) -> None:
+        write_atomic(self.variants_dir / name, content)
+        self._cache_bytes(name, content)
+
+    def get_variant(
+        self, filename: str, size: Optional[int], fmt: Optional[str]
+    ) -> Optional[bytes]:
+        self.check_variant(size, fmt)
+        name = variant_name(filename, size, fmt)
+        content = self._cached_variant(name)
+        if content is None:
+            original = self.get_bytes(filename)
+            if original is None:
+                return None
+            content = make_variant(original, size, fmt, self.variant_settings.quality)
+            self._store_variant(name, content)
+        return content
+
+    async def aget_variant(
+        self, filename: str, size: Optional[int], fmt: Optional[str]
+    ) -> Optional[bytes]:
+        """Like get_variant, disk access and the resize run in worker threads"""
+        self.check_variant(size, fmt)
+        name = variant_name(filename, size, fmt)
+        content = self._bytes.get(name) if self.enabled else None
+        if content is None:
+            content = await self.executors.run("storage", self._read_variant, name)
+            self._cache_bytes(name, content)
+        if content is None:
+            original = await self.aget_bytes(filename)
+            if original is None:
+                return None
+            content = await self.executors.run(
+                "cpu", make_variant, original, size, fmt, self.variant_settings.quality
+            )
+            await self.executors.run("storage", self._store_variant, name, content)
+        return content
+
+    def get_base64(
+        self, filename: str, size: Optional[int] = None, fmt: Optional[str] = None
+    ) -> Optional[str]:
+        name = variant_name(filename, size, fmt)
+        encoded = self._base64.get(name) if self.enabled else None
+        if encoded is not None:
+            return encoded
+        content = (
+            self.get_variant(filename, size, fmt)
+            if is_variant(size, fmt)
+            else self.get_bytes(filename)
+        )
+        return self._encode(name, content) if content is not None else None
+
+    async def aget_base64(
+        self, filename: str, size: Optional[int] = None, fmt: Optional[str] = None
+    ) -> Optional[str]:
+        name = variant_name(filename, size, fmt)
+        encoded = self._base64.get(name) if self.enabled else None
+        if encoded is not None:
+            return encoded
+        content = (
+            await self.aget_variant(filename, size, fmt)
+            if is_variant(size, fmt)
+            else await self.aget_bytes(filename)
+        )
+        return self._encode(name, content) if content is not None else None
+
+    def get_md5(self, filename: str, content: Union[bytes, memoryview]) -> str:
+        """MD5 of an image, taken from the pack index when available"""
+        entry = self.pack.entry(filename) if self.pack is not None else None
+        if entry is not None:
+            return entry.md5
+        return hashlib.md5(content).hexdigest()
+
+    def add_to_pack(self, filename: str) -> bool:
+        """Append a newly added local image to the pack, True when it was appended"""
+        if self.pack is None:
+            return False
+        emoji_file = self.emo_dir / filename
+        if not emoji_file.is_file():
+            logger.warning(f"emoji file {filename} not found, not added to pack")
+            return False
+        appended = self.pack.append_files([emoji_file]) > 0
+        if appended:
+            self.invalidate(filename)
+        return appended
+
+    def add_files_to_pack(self, filenames: Iterable[str]) -> int:
+        """Append newly added local images to the pack, returns the number appended"""
+        if self.pack is None:
+            return 0
+        appended = 0
+        for filename in dict.fromkeys(filenames):
+            emoji_file = self.emo_dir / filename
+            if not emoji_file.is_file():
+                logger.warning(f"emoji file {filename} not found, not added to pack")
+                continue
+            if self.pack.append_files([emoji_file]) > 0:
+                self.invalidate(filename)
+                appended += 1
+        return appended
+
+    def invalidate(self, filename: str) -> None:
+        self._bytes.pop(filename)
+        self._base64.pop(filename)
+        # 原图变化后删除已生成的变体
+        for size in [0, *self.variant_settings.sizes]:
+            for fmt in [None, *self.variant_settings.formats]:
+                if not is_variant(size, fmt):
+                    continue
+                name = variant_name(filename, size, fmt)
+                self._bytes.pop(name)
+                self._base64.pop(name)
+                (self.variants_dir / name).unlink(missing_ok=True)
+
+    def warm_up(self, filenames: Iterable[str]) -> int:
+        """Load the given images into both caches, returns the number loaded"""
+        loaded = 0
+        for filename in filenames:
+            try:
+                if self.get_base64(filename) is not None:
+                    loaded += 1
+            except Exception as e:
+                logger.warning(f"warm up {filename} failed: {e}")
+        return loaded
+
+    def warm_up_from_file(self, path: Path, limit: int = 0) -> int:
+        """Warm up from a popularity list, one filename per line, most popular first"""
+        try:
+            lines = path.read_text(encoding="utf-8").splitlines()
+        except OSError as e:
+            logger.warning(f"read image warm up list {path} failed: {e}")
+            return 0
+        filenames: List[str] = [
+            line.strip() for line in lines if line.strip() and not line.startswith("#")
+        ]
+        if limit:
+            filenames = filenames[:limit]
+        loaded = self.warm_up(filenames)
+        logger.info(f"image cache warmed up with {loaded}/{len(filenames)} images")
+        return loaded
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "bytes": self._bytes.stats(),
+            "base64": self._base64.stats(),
+            "pack": self.pack.stats() if self.pack is not None else None,
+        }
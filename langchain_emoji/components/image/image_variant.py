@@ -0,0 +1,125 @@
+import io
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from PIL import Image, ImageSequence
+
+logger = logging.getLogger(__name__)
+
+# format -> (Pillow 格式, 扩展名, Content-Type)
+VARIANT_FORMATS: Dict[str, Tuple[str, str, str]] = {
+    "webp": ("WEBP", "webp", "image/webp"),
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+    "png": ("PNG", "png", "image/png"),
+}
+
+
+def is_variant(size: Optional[int], fmt: Optional[str]) -> bool:
+    return bool(size) or bool(fmt)
+
+
+def variant_name(filename: str, size: Optional[int], fmt: Optional[str]) -> str:
+    """Name of a resized/converted image, the filename itself for the original"""
+    if not is_variant(size, fmt):
+        return filename
+    stem, _, ext = filename.rpartition(".")
+    if not stem:
+        stem, ext = filename, ""
+    if fmt:
+        ext = VARIANT_FORMATS[fmt][1]
+    return f"{stem}_{size or 0}.{ext}"
+
+
+def variant_media_type(fmt: str) -> str:
+    return VARIANT_FORMATS[fmt][2]
+
+
+def make_variant(
+    content: Union[bytes, memoryview],
+    size: Optional[int],
+    fmt: Optional[str],
+    quality: int = 80,
+) -> bytes:
+    """Resize the image so that its longer side is at most `size` and re-encode it.
+
+    Images are never upscaled. Animated images keep their frames for webp and png
+    output, jpeg only keeps the first frame.
+    """
+    with Image.open(io.BytesIO(content)) as img:
+        pil_format = VARIANT_FORMATS[fmt][0] if fmt else img.format
+        animated = getattr(img, "is_animated", False) and pil_format in (
+            "WEBP",
+            "PNG",
+            "GIF",
+        )
+        frames = (
+            [frame.copy() for frame in ImageSequence.Iterator(img)]
+            if animated
+            else [img.copy()]
+        )
+        durations = [frame.info.get("duration", 100) for frame in frames]
+
+    for frame in frames:
+        if size:
+            frame.thumbnail((size, size), Image.LANCZOS)
+    frames = [_convert_mode(frame, pil_format) for frame in frames]
+
+    output = io.BytesIO()
+    save_kwargs = {"format": pil_format}
+    if pil_format in ("WEBP", "JPEG"):
+        save_kwargs["quality"] = quality
+    if len(frames) > 1:
+        save_kwargs.update(
+            save_all=True, append_images=frames[1:], duration=durations, loop=0
+        )
+    frames[0].save(output, **save_kwargs)
+    return output.getvalue()
+
+
+def _convert_mode(frame, pil_format: str):
+    if pil_format == "JPEG" and frame.mode != "RGB":
+        return frame.convert("RGB")
+    if pil_format in ("WEBP", "PNG") and frame.mode == "P":
+        return frame.convert("RGBA")
+    return frame
+
+
+def write_atomic(path: Path, content: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+
+
+def generate_variants(
+    src_dir: Path,
+    dst_dir: Path,
+    sizes: Iterable[int],
+    formats: Iterable[str],
+    quality: int = 80,
+) -> List[str]:
+    """Generate every size/format variant of the images in src_dir.
+
+    Existing variants are kept, so an interrupted run can simply be restarted.
+    Returns the names of the images that failed.
+    """
+    failed: List[str] = []
+    for path in sorted(src_dir.iterdir()):
+        if not path.is_file():
+            continue
+        content: Optional[bytes] = None
+        try:
+            for size in sizes:
+                for fmt in formats:
+                    target = dst_dir / variant_name(path.name, size, fmt)
+                    if target.exists():
+                        continue
+                    content = content or path.read_bytes()
+                    write_atomic(target, make_variant(content, size, fmt, quality))
+        except Exception as e:
+            logger.error(f"generate variant of {path.name} failed: {e}")
+            failed.append(path.name)
+    return failed
@@ -2,11 +2,14 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
-from functools import partial
+import os
+from contextlib import aclosing
 from importlib.metadata import version
 from typing import (
     Any,
+    AsyncIterator,
     Callable,
     Dict,
     Iterator,
@@ -24,6 +27,7 @@ from langchain_core.callbacks import (
 )
 from langchain_core.language_models.chat_models import (
     BaseChatModel,
+    agenerate_from_stream,
     generate_from_stream,
 )
 from langchain_core.language_models.llms import create_base_retry_decorator
@@ -48,9 +52,21 @@ from langchain_core.outputs import (
 )
 from langchain_core.pydantic_v1 import BaseModel, Field
 from packaging.version import parse
+import httpx
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BASE_URL = "https://open.bigmodel.cn/api/paas/v4"
+
+# 与 zhipuai SDK 一致的状态码到异常的映射
+_STATUS_ERRORS = {
+    400: "APIRequestFailedError",
+    401: "APIAuthenticationError",
+    429: "APIReachLimitError",
+    500: "APIInternalError",
+    503: "APIServerFlowExceedError",
+}
+
 
 def is_zhipu_v2() -> bool:
     """Return whether zhipu API is v2 or more."""
@@ -76,6 +92,7 @@ def _create_retry_decorator(
         zhipuai.APIResponseError,
         zhipuai.APIResponseValidationError,
         zhipuai.APITimeoutError,
+        httpx.TransportError,  # 异步传输层的连接与超时错误
     ]
     return create_base_retry_decorator(
         error_types=errors, max_retries=llm.max_retries, run_manager=run_manager
@@ -256,6 +273,23 @@ class ChatZhipuAI(BaseChatModel):
     max_retries: int = 2
     """Maximum number of retries to make when generating."""
 
+    base_url: Optional[str] = None
+    """API base url, `ZHIPUAI_BASE_URL` or the official endpoint by default."""
+
+    max_connections: int = 1000
+    """Connection pool size of the asyncio transport."""
+
+    max_keepalive_connections: int = 100
+    """Idle connections kept open for reuse by the asyncio transport."""
+
+    connect_timeout: float = 5.0
+    """Seconds to establish a connection."""
+
+    request_timeout: float = 120.0
+    """Seconds to wait for a response, or for the next chunk when streaming."""
+
+    async_client: Any = Field(default=None, exclude=True)  #: :meta private:
+
     @property
     def _identifying_params(self) -> Dict[str, Any]:
         """Get the identifying parameters."""
@@ -326,6 +360,7 @@ class ChatZhipuAI(BaseChatModel):
 
             self.client = ZhipuAI(
                 api_key=self.zhipuai_api_key,  # 填写您的 APIKey
+                base_url=self.base_url,
             )
         except ImportError:
             raise RuntimeError(
@@ -336,23 +371,115 @@ class ChatZhipuAI(BaseChatModel):
     def completions(self, **kwargs) -> Any | None:
         return self.client.chat.completions.create(**kwargs)
 
-    async def async_completions(self, **kwargs) -> Any:
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Keep-alive connection pool shared by every async call on this event loop.
+
+        The sync SDK client only serves the sync methods, async calls never hold
+        a thread while they wait for the model.
+        """
         loop = asyncio.get_running_loop()
-        partial_func = partial(self.client.chat.completions.create, **kwargs)
-        response = await loop.run_in_executor(
-            None,
-            partial_func,
+        client, client_loop = self.async_client or (None, None)
+        if client is None or client_loop is not loop or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=(
+                    self.base_url
+                    or os.environ.get("ZHIPUAI_BASE_URL")
+                    or DEFAULT_BASE_URL
+                ),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                ),
+                timeout=httpx.Timeout(
+                    self.request_timeout, connect=self.connect_timeout
+                ),
+            )
+            self.async_client = (client, loop)
+        return client
+
+    @staticmethod
+    def _payload(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Request body with the same defaults and clamping as the zhipuai SDK"""
+        payload = {k: v for k, v in kwargs.items() if v is not None}
+        temperature = payload.get("temperature")
+        if temperature is not None:
+            if temperature <= 0:
+                payload["do_sample"] = False
+                payload["temperature"] = 0.01
+            elif temperature >= 1:
+                payload["temperature"] = 0.99
+        top_p = payload.get("top_p")
+        if top_p is not None:
+            payload["top_p"] = min(max(top_p, 0.01), 0.99)
+        return payload
+
+    def _status_error(self, response: httpx.Response) -> Exception:
+        import zhipuai
+
+        error_cls = getattr(
+            zhipuai,
+            _STATUS_ERRORS.get(response.status_code, "APIStatusError"),
+            zhipuai.APIStatusError,
         )
+        return error_cls(
+            f"Error code: {response.status_code}, with error text {response.text}",
+            response=response,
+        )
+
+    async def _asend(
+        self, method: str, url: str, stream: bool = False, **kwargs: Any
+    ) -> httpx.Response:
+        client = self._get_async_client()
+        # 与同步 SDK 相同的请求头, 包含鉴权头
+        request = client.build_request(
+            method, url, headers=self.client._default_headers, **kwargs
+        )
+        # 任务被取消时 httpx 中断请求并释放连接, 取消会一直传递到服务端
+        response = await client.send(request, stream=stream)
+        if not response.is_success:
+            await response.aread()
+            await response.aclose()
+            raise self._status_error(response)
         return response
 
+    async def async_completions(self, **kwargs) -> Any:
+        response = await self._asend(
+            "POST", "/chat/completions", json=self._payload(kwargs)
+        )
+        return response.json()
+
     async def async_completions_result(self, task_id):
-        loop = asyncio.get_running_loop()
-        response = await loop.run_in_executor(
-            None,
-            self.client.asyncCompletions.retrieve_completion_result,
-            task_id,
+        response = await self._asend("GET", f"/async-result/{task_id}")
+        return response.json()
+
+    async def astream_completions(
+        self,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Server-sent chunks of a streaming completion, as dicts.
+
+        Opening the stream is retried, a stream that fails midway is not. Closing
+        the iterator, or cancelling the task consuming it, closes the connection.
+        """
+        retry_decorator = _create_retry_decorator(self, run_manager=run_manager)
+        open_stream = retry_decorator(self._asend)
+        response = await open_stream(
+            "POST",
+            "/chat/completions",
+            stream=True,
+            json=self._payload({**kwargs, "stream": True}),
         )
-        return response
+        try:
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    break
+                yield json.loads(data)
+        finally:
+            await response.aclose()
 
     def _create_chat_result(self, response: Union[dict, BaseModel]) -> ChatResult:
         generations = []
@@ -458,7 +585,7 @@ class ChatZhipuAI(BaseChatModel):
             stream_iter = self._astream(
                 messages, stop=stop, run_manager=run_manager, **kwargs
             )
-            return generate_from_stream(stream_iter)
+            return await agenerate_from_stream(stream_iter)
 
         message_dicts, params = self._create_message_dicts(messages, stop)
         params = {
@@ -504,3 +631,43 @@ class ChatZhipuAI(BaseChatModel):
             yield chunk
             if run_manager:
                 run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """Stream the chat response in chunks over the asyncio transport."""
+        message_dicts, params = self._create_message_dicts(messages, stop)
+        params = {**params, **kwargs, "stream": True}
+
+        default_chunk_class = AIMessageChunk
+        # 调用方提前结束迭代时立即关闭底层连接
+        async with aclosing(
+            self.astream_completions(
+                messages=message_dicts, run_manager=run_manager, **params
+            )
+        ) as stream:
+            async for chunk in stream:
+                if len(chunk["choices"]) == 0:
+                    continue
+                choice = chunk["choices"][0]
+                chunk = _convert_delta_to_message_chunk(
+                    choice["delta"], default_chunk_class
+                )
+
+                finish_reason = choice.get("finish_reason")
+                generation_info = (
+                    dict(finish_reason=finish_reason)
+                    if finish_reason is not None
+                    else None
+                )
+                default_chunk_class = chunk.__class__
+                chunk = ChatGenerationChunk(
+                    message=chunk, generation_info=generation_info
+                )
+                yield chunk
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
@@ -43,6 +43,11 @@ class LLMComponent:
                     temperature=zhipuai_settings.temperature,
                     top_p=zhipuai_settings.top_p,
                     api_key=zhipuai_settings.api_key,
+                    max_connections=zhipuai_settings.max_connections,
+                    max_keepalive_connections=(
+                        zhipuai_settings.max_keepalive_connections
+                    ),
+                    request_timeout=zhipuai_settings.request_timeout,
                 ).configurable_alternatives(
                     # This gives this field an id
                     # When configuring the end runnable, we can then use this id to configure this field
@@ -82,6 +87,11 @@ class LLMComponent:
                         temperature=zhipuai_settings.temperature,
                         top_p=zhipuai_settings.top_p,
                         api_key=zhipuai_settings.api_key,
+                        max_connections=zhipuai_settings.max_connections,
+                        max_keepalive_connections=(
+                            zhipuai_settings.max_keepalive_connections
+                        ),
+                        request_timeout=zhipuai_settings.request_timeout,
                     ),
                     deepseek=ChatOpenAI(
                         model=deepseek_settings.modelname,
@@ -1,59 +1,164 @@
 import logging
 import base64
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional, Set, Tuple
+
+import urllib3
 from injector import inject, singleton
 from langchain_emoji.settings.settings import Settings
+from langchain_emoji.components.executor.executor_component import ExecutorComponent
 from minio import Minio
 from minio.error import MinioException
+from langchain_emoji.utils.cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
 
 @singleton
 class MinioComponent:
+    """MinIO access with a sized urllib3 pool, timeouts and async wrappers.
+
+    The MinIO client is blocking, the async methods run it in a thread pool of the
+    same size as the connection pool so threads never wait for a connection.
+    Presigned urls are cached per filename until `presign_margin` seconds before they
+    expire, and refreshed in the background once older than `presign_refresh_after`.
+    """
+
     @inject
-    def __init__(self, settings: Settings) -> None:
+    def __init__(self, settings: Settings, executors: ExecutorComponent) -> None:
         if not settings.minio:
             raise Exception("minio config is not exist! please check")
         self.minio_settings = settings.minio
+        self.http_client = urllib3.PoolManager(
+            maxsize=self.minio_settings.pool_maxsize,
+            block=True,  # 连接池满时等待空闲连接, 而不是创建用完即弃的连接
+            timeout=urllib3.Timeout(
+                connect=self.minio_settings.connect_timeout,
+                read=self.minio_settings.read_timeout,
+            ),
+            retries=urllib3.Retry(
+                total=self.minio_settings.retries,
+                backoff_factor=0.2,
+                status_forcelist=[500, 502, 503, 504],
+            ),
+        )
         self.minio_client = Minio(
             endpoint=self.minio_settings.host,
             access_key=self.minio_settings.access_key,
             secret_key=self.minio_settings.secret_key,
             secure=False,
+            http_client=self.http_client,
+        )
+        # 线程池在执行器注册表中登记, 队列长度和饱和度随 metrics 输出
+        self.executors = executors
+        self._executor = executors.create("minio", self.minio_settings.pool_maxsize)
+
+        self.presign_expires = self.minio_settings.presign_expires
+        # value 为 (url, 签名时间), 在过期前 margin 秒失效
+        self._links: LRUCache[Tuple[str, float]] = LRUCache(
+            maxsize=self.minio_settings.presign_cache_size,
+            ttl=max(self.presign_expires - self.minio_settings.presign_margin, 0),
         )
+        self._refreshing: Set[str] = set()
+        self._refresh_lock = threading.Lock()
+        self.refreshes = 0
 
-    def get_file_base64(self, file_name: str) -> str:
+    def get_file_bytes(self, file_name: str) -> Optional[bytes]:
+        response = None
         try:
             response = self.minio_client.get_object(
                 self.minio_settings.bucket_name, file_name
             )
             # Read the object content
-            object_data = response.read()
-
-            # Encode object data to base64
-            base64_data = base64.b64encode(object_data)
+            return response.read()
+        except (MinioException, urllib3.exceptions.HTTPError) as e:
+            logger.error(f"get file bytes failed : {e}")
+            return None
+        finally:
+            # 归还连接到连接池
+            if response is not None:
+                response.close()
+                response.release_conn()
 
-            return base64_data.decode("utf-8")
-        except MinioException as e:
-            logger.error(f"get file base64 failed : {e}")
+    def get_file_base64(self, file_name: str) -> Optional[str]:
+        object_data = self.get_file_bytes(file_name)
+        if object_data is None:
             return None
 
-    def get_download_link(self, file_name: str) -> str:
+        # Encode object data to base64
+        base64_data = base64.b64encode(object_data)
+
+        return base64_data.decode("utf-8")
+
+    def _presign(self, file_name: str) -> Optional[str]:
         try:
             # Generate presigned URL for download
             presigned_url = self.minio_client.presigned_get_object(
-                self.minio_settings.bucket_name, file_name
+                self.minio_settings.bucket_name,
+                file_name,
+                expires=timedelta(seconds=self.presign_expires),
             )
+            self._links.set(file_name, (presigned_url, time.monotonic()))
             return presigned_url
         except MinioException as e:
             logger.error(f"get share link failed : {e}")
             return None
 
+    def _refresh(self, file_name: str) -> None:
+        try:
+            # 签名失败时旧链接仍在缓存中, 不计入刷新次数
+            if self._presign(file_name) is not None:
+                self.refreshes += 1
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(file_name)
+
+    def _schedule_refresh(self, file_name: str) -> None:
+        with self._refresh_lock:
+            if file_name in self._refreshing:
+                return
+            self._refreshing.add(file_name)
+        self._executor.submit(self._refresh, file_name)
+
+    def get_download_link(self, file_name: str) -> Optional[str]:
+        cached = self._links.get(file_name)
+        if cached is None:
+            return self._presign(file_name)
+        presigned_url, signed_at = cached
+        refresh_after = self.minio_settings.presign_refresh_after
+        if refresh_after and time.monotonic() - signed_at > refresh_after:
+            # 继续返回仍有效的旧链接, 后台重新签名
+            self._schedule_refresh(file_name)
+        return presigned_url
+
+    async def _arun(self, func, *args):
+        return await self.executors.run("minio", func, *args)
+
+    async def aget_file_bytes(self, file_name: str) -> Optional[bytes]:
+        return await self._arun(self.get_file_bytes, file_name)
+
+    async def aget_download_link(self, file_name: str) -> Optional[str]:
+        if file_name in self._links:
+            # 缓存命中无需签名, 直接在事件循环中返回
+            return self.get_download_link(file_name)
+        return await self._arun(self.get_download_link, file_name)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "presigned_links": {
+                **self._links.stats(),
+                "refreshes": self.refreshes,
+                "refreshing": len(self._refreshing),
+            }
+        }
+
 
 if __name__ == "__main__":
     from langchain_emoji.settings.settings import settings
 
-    mc = MinioComponent(settings())
+    mc = MinioComponent(settings(), ExecutorComponent(settings()))
 
     obj = "06e07a24-df07-4781-a1da-58739ac65404.jpg"
 
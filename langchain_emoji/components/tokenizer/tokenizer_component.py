@@ -0,0 +1,93 @@
+import logging
+import os
+from typing import Dict, List, Optional, Sequence
+
+import tiktoken
+from injector import inject, singleton
+from tiktoken.model import encoding_name_for_model
+
+from langchain_emoji.components.executor.executor_component import ExecutorComponent
+from langchain_emoji.constants import PROJECT_ROOT_PATH
+from langchain_emoji.settings.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class PromptTooLong(ValueError):
+    """Raised when a prompt exceeds the configured token limit"""
+
+    def __init__(self, tokens: int, limit: int) -> None:
+        super().__init__(f"prompt is {tokens} tokens long, the limit is {limit}")
+        self.tokens = tokens
+        self.limit = limit
+
+
+@singleton
+class TokenizerComponent:
+    """Token counting with encodings loaded once per process.
+
+    Each provider is mapped to a tiktoken encoding, the encodings are loaded eagerly
+    so no request pays the (possibly remote) BPE download. ZhipuAI and DeepSeek do not
+    publish tiktoken encodings, their counts are a cl100k_base approximation.
+    """
+
+    @inject
+    def __init__(self, settings: Settings, executors: ExecutorComponent) -> None:
+        self.executors = executors
+        tokenizer_settings = settings.tokenizer
+        if tokenizer_settings.cache_dir:
+            # tiktoken 读取该环境变量作为 BPE 文件缓存目录, 预先放置文件即可离线加载
+            cache_dir = PROJECT_ROOT_PATH / tokenizer_settings.cache_dir
+            os.environ["TIKTOKEN_CACHE_DIR"] = str(cache_dir)
+
+        self.default_encoding = tokenizer_settings.default_encoding
+        self.batch_threads = tokenizer_settings.batch_threads
+        self.max_prompt_tokens = tokenizer_settings.max_prompt_tokens
+
+        self._names: Dict[str, str] = {
+            "openai": self._model_encoding_name(settings.openai.modelname),
+            **tokenizer_settings.encodings,
+        }
+        self._encodings: Dict[str, tiktoken.Encoding] = {}
+        for name in {self.default_encoding, *self._names.values()}:
+            self._encodings[name] = tiktoken.get_encoding(name)
+        logger.info("Loaded tiktoken encodings: %s", sorted(self._encodings))
+
+    def _model_encoding_name(self, modelname: str) -> str:
+        try:
+            return encoding_name_for_model(modelname)
+        except KeyError:
+            return self.default_encoding
+
+    def encoding(self, llm: Optional[str] = None) -> tiktoken.Encoding:
+        """Encoding used for the given provider, the default one for unknown providers"""
+        name = self._names.get(llm, self.default_encoding)
+        return self._encodings[name]
+
+    def count(self, text: str, llm: Optional[str] = None) -> int:
+        return len(self.encoding(llm).encode_ordinary(text))
+
+    def count_batch(self, texts: Sequence[str], llm: Optional[str] = None) -> List[int]:
+        encoded = self.encoding(llm).encode_ordinary_batch(
+            list(texts), num_threads=self.batch_threads
+        )
+        return [len(tokens) for tokens in encoded]
+
+    async def acount_batch(
+        self, texts: Sequence[str], llm: Optional[str] = None
+    ) -> List[int]:
+        """Count a batch in a worker thread, tiktoken releases the GIL while encoding"""
+        return await self.executors.run("cpu", self.count_batch, texts, llm)
+
+    def check_prompt(self, text: str, llm: Optional[str] = None) -> int:
+        """Return the prompt token count, raise PromptTooLong above the limit"""
+        tokens = self.count(text, llm)
+        if self.max_prompt_tokens and tokens > self.max_prompt_tokens:
+            raise PromptTooLong(tokens, self.max_prompt_tokens)
+        return tokens
+
+    def check_budget(self, counts: Sequence[int], budget: int) -> None:
+        """Raise PromptTooLong when the summed counts exceed the token budget"""
+        total = sum(counts)
+        if budget and total > budget:
+            raise PromptTooLong(total, budget)
@@ -2,6 +2,7 @@ import logging
 
 from injector import inject, singleton
 from langchain_emoji.settings.settings import Settings
+from langchain_emoji.components.executor.executor_component import ExecutorComponent
 from langsmith import Client
 from langsmith.utils import LangSmithError
 import os
@@ -13,16 +14,16 @@ logger = logging.getLogger(__name__)
 @singleton
 class TraceComponent:
     @inject
-    def __init__(self, settings: Settings) -> None:
+    def __init__(self, settings: Settings, executors: ExecutorComponent) -> None:
+        self.executors = executors
         os.environ["LANGCHAIN_TRACING_V2"] = str(settings.langsmith.trace_version_v2)
         os.environ["LANGCHAIN_PROJECT"] = str(settings.langsmith.langchain_project)
         os.environ["LANGCHAIN_API_KEY"] = settings.langsmith.api_key
         self.trace_client = Client(api_key=settings.langsmith.api_key)
 
     async def _arun(self, func, *args, **kwargs):
-        return await asyncio.get_running_loop().run_in_executor(
-            None, func, *args, **kwargs
-        )
+        # LangSmith 调用使用独立线程池, 慢请求不会占用 LLM 调用的线程
+        return await self.executors.run("trace", func, *args, **kwargs)
 
     async def aget_trace_url(self, run_id: str) -> str:
         for i in range(5):
@@ -1,9 +1,16 @@
+from concurrent.futures import Executor
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
 from typing import Any, Iterable, List, Optional
 
+from langchain_emoji.components.vector_store.vector_store_async import (
+    arun_with_embeddings,
+)
+
 
 class EmojiChroma(Chroma):
+    # 异步方法运行阻塞调用的线程池, None 时使用事件循环默认线程池
+    executor: Optional[Executor] = None
 
     def add_original_texts_with_filename(
         self,
@@ -23,6 +30,81 @@ class EmojiChroma(Chroma):
             metadatas=metadatas,
         )
 
+    async def aadd_original_texts_with_filename(
+        self,
+        filename: str,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        timeout: Optional[int] = None,
+        batch_size: int = 1000,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        return await arun_with_embeddings(
+            self.executor,
+            self.embeddings,
+            texts,
+            self.add_original_texts_with_filename,
+            filename,
+            texts,
+            metadatas=metadatas,
+            timeout=timeout,
+            batch_size=batch_size,
+            **kwargs,
+        )
+
+    def add_original_texts_with_filenames(
+        self,
+        filenames: List[str],
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        timeout: Optional[int] = None,
+        batch_size: int = 1000,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Insert texts of different emojis, filenames[i] is the file of texts[i].
+
+        With `ids` the records are upserted, inserting the same ids again replaces
+        them instead of adding duplicates.
+        """
+        texts = list(texts)
+        if not metadatas:
+            metadatas = [{"filename": filename} for filename in filenames]
+        added: List[str] = []
+        for start in range(0, len(texts), batch_size):
+            end = start + batch_size
+            added += self.add_texts(
+                texts=texts[start:end],
+                metadatas=metadatas[start:end],
+                ids=ids[start:end] if ids else None,
+            )
+        return added
+
+    async def aadd_original_texts_with_filenames(
+        self,
+        filenames: List[str],
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        timeout: Optional[int] = None,
+        batch_size: int = 1000,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        return await arun_with_embeddings(
+            self.executor,
+            self.embeddings,
+            texts,
+            self.add_original_texts_with_filenames,
+            filenames,
+            texts,
+            metadatas=metadatas,
+            timeout=timeout,
+            batch_size=batch_size,
+            ids=ids,
+        )
+
     def similarity_search_by_filenames(
         self, query: str, filenames: List[str], k: int = 4
     ) -> List[Document]:
@@ -32,6 +114,34 @@ class EmojiChroma(Chroma):
 
         return self.similarity_search(query, k=k, filter=where)
 
+    async def asimilarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        # 检索器 (as_retriever) 的异步调用也走这里
+        return await arun_with_embeddings(
+            self.executor,
+            self.embeddings,
+            [query],
+            self.similarity_search,
+            query,
+            k,
+            filter,
+            **kwargs,
+        )
+
+    async def asimilarity_search_by_filenames(
+        self, query: str, filenames: List[str], k: int = 4
+    ) -> List[Document]:
+        where = None
+        if len(filenames) > 0:
+            where = {"filename": {"$in": filenames}}
+
+        return await self.asimilarity_search(query, k=k, filter=where)
+
     def delete_texts_with_filenames(
         self,
         document_ids: List[str],
@@ -51,3 +161,23 @@ class EmojiChroma(Chroma):
         return self.delete(
             ids=common_ids,
         )
+
+    async def adelete_texts_with_filenames(
+        self,
+        document_ids: List[str],
+        filenames: List[str] = [],
+        batch_size: int = 20,
+        expr: Optional[str] = None,
+        timeout: Optional[int] = None,
+    ):
+        return await arun_with_embeddings(
+            self.executor,
+            None,
+            [],
+            self.delete_texts_with_filenames,
+            document_ids,
+            filenames,
+            batch_size,
+            expr,
+            timeout,
+        )
@@ -0,0 +1,284 @@
+import asyncio
+import functools
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Type, TypeVar
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from langchain_emoji.components.vector_store.numpy_store.vector_index import (
+    NumpyVectorIndex,
+    Quantization,
+)
+
+T = TypeVar("T")
+
+
+class EmojiNumpyStore(VectorStore):
+    """In-process vector store, brute-force cosine search over a NumPy matrix.
+
+    Offers the same filename helpers as EmojiChroma and EmojiTencentVectorDB. The
+    async variants embed with the async embedding API and only run the index
+    operations, which hold the index lock, in `executor`.
+    """
+
+    # 异步方法运行索引操作的线程池, None 时使用事件循环默认线程池
+    executor: Optional[Executor] = None
+
+    def __init__(
+        self,
+        collection_name: str,
+        embedding_function: Embeddings,
+        persist_directory: str,
+        initial_capacity: int = 1024,
+        quantization: Quantization = "none",
+        rescore: int = 0,
+    ) -> None:
+        self._embedding_function = embedding_function
+        self.index = NumpyVectorIndex(
+            Path(persist_directory) / collection_name,
+            initial_capacity=initial_capacity,
+            quantization=quantization,
+            rescore=rescore,
+        )
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding_function
+
+    def _select_relevance_score_fn(self):
+        # 余弦相似度 [-1, 1] 映射到 [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(
+        cls: Type["EmojiNumpyStore"],
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        collection_name: str = "EmojiCollection",
+        persist_directory: str = "local_data/numpy",
+        **kwargs: Any,
+    ) -> "EmojiNumpyStore":
+        store = cls(collection_name, embedding, persist_directory)
+        store.add_texts(texts=texts, metadatas=metadatas, **kwargs)
+        return store
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        embeddings = self._embedding_function.embed_documents(texts)
+        return self.index.add(embeddings, texts, metadatas, ids)
+
+    async def _arun(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def aadd_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        embeddings = await self._embedding_function.aembed_documents(texts)
+        return await self._arun(self.index.add, embeddings, texts, metadatas, ids)
+
+    def add_original_texts_with_filename(
+        self,
+        filename: str,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        timeout: Optional[int] = None,
+        batch_size: int = 1000,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not metadatas:
+            metadatas = [{"filename": filename} for _ in texts]
+        return self.add_texts(texts=texts, metadatas=metadatas)
+
+    async def aadd_original_texts_with_filename(
+        self,
+        filename: str,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        timeout: Optional[int] = None,
+        batch_size: int = 1000,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not metadatas:
+            metadatas = [{"filename": filename} for _ in texts]
+        return await self.aadd_texts(texts=texts, metadatas=metadatas)
+
+    def add_original_texts_with_filenames(
+        self,
+        filenames: List[str],
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        timeout: Optional[int] = None,
+        batch_size: int = 1000,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Insert texts of different emojis, filenames[i] is the file of texts[i].
+
+        Records with an existing id replace it, so repeating a call with the same
+        `ids` does not add duplicates.
+        """
+        texts = list(texts)
+        if not metadatas:
+            metadatas = [{"filename": filename} for filename in filenames]
+        added: List[str] = []
+        for start in range(0, len(texts), batch_size):
+            end = start + batch_size
+            added += self.add_texts(
+                texts=texts[start:end],
+                metadatas=metadatas[start:end],
+                ids=ids[start:end] if ids else None,
+            )
+        return added
+
+    async def aadd_original_texts_with_filenames(
+        self,
+        filenames: List[str],
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        timeout: Optional[int] = None,
+        batch_size: int = 1000,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not metadatas:
+            metadatas = [{"filename": filename} for filename in filenames]
+        added: List[str] = []
+        for start in range(0, len(texts), batch_size):
+            end = start + batch_size
+            added += await self.aadd_texts(
+                texts=texts[start:end],
+                metadatas=metadatas[start:end],
+                ids=ids[start:end] if ids else None,
+            )
+        return added
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if ids is None:
+            return False
+        return self.index.delete(ids) > 0
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filenames: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        return [
+            (
+                Document(page_content=doc["text"], metadata=doc["metadata"]),
+                score,
+            )
+            for doc, score in self.index.search(embedding, k=k, filenames=filenames)
+        ]
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filenames: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [
+            doc
+            for doc, _ in self.similarity_search_with_score_by_vector(
+                embedding, k=k, filenames=filenames
+            )
+        ]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filenames: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        embedding = self._embedding_function.embed_query(query)
+        return self.similarity_search_with_score_by_vector(
+            embedding, k=k, filenames=filenames
+        )
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filenames: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [
+            doc
+            for doc, _ in self.similarity_search_with_score(
+                query, k=k, filenames=filenames
+            )
+        ]
+
+    def similarity_search_by_filenames(
+        self, query: str, filenames: List[str], k: int = 4
+    ) -> List[Document]:
+        return self.similarity_search(query, k=k, filenames=filenames or None)
+
+    async def asimilarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filenames: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        embedding = await self._embedding_function.aembed_query(query)
+        return await self._arun(
+            self.similarity_search_by_vector, embedding, k, filenames
+        )
+
+    async def asimilarity_search_by_filenames(
+        self, query: str, filenames: List[str], k: int = 4
+    ) -> List[Document]:
+        return await self.asimilarity_search(query, k=k, filenames=filenames or None)
+
+    def delete_texts_with_filenames(
+        self,
+        document_ids: List[str],
+        filenames: List[str] = [],
+        batch_size: int = 20,
+        expr: Optional[str] = None,
+        timeout: Optional[int] = None,
+    ):
+        common_ids = document_ids
+
+        if len(filenames) > 0:
+            filename_ids = set(self.index.ids_by_filenames(filenames))
+            common_ids = [value for value in document_ids if value in filename_ids]
+
+        # 与 EmojiChroma 一致, 不返回删除结果
+        self.delete(ids=common_ids)
+
+    async def adelete_texts_with_filenames(
+        self,
+        document_ids: List[str],
+        filenames: List[str] = [],
+        batch_size: int = 20,
+        expr: Optional[str] = None,
+        timeout: Optional[int] = None,
+    ):
+        return await self._arun(
+            self.delete_texts_with_filenames, document_ids, filenames
+        )
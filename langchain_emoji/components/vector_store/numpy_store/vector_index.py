@@ -0,0 +1,368 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Literal, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+SCALES_FILE = "scales.npy"
+FULL_FILE = "vectors_full.npy"
+DOCS_FILE = "docs.json"
+DOCS_LOG_FILE = "docs.log"
+
+Quantization = Literal["none", "float16", "int8"]
+
+_DTYPES = {"none": np.float32, "float16": np.float16, "int8": np.int8}
+
+# 量化矩阵按块转换为 float32 计算, 块大小保持在 CPU 缓存内
+_SCORE_CHUNK = 256
+
+# 变更日志条数超过文档数 (且不少于该值) 时合并进 docs.json
+_COMPACT_MIN = 1024
+
+
+class NumpyVectorIndex:
+    """Normalized vectors in one memory-mapped .npy matrix.
+
+    Row i of the matrix belongs to `docs[i]` ({"id", "text", "metadata"}), deleted
+    rows are set to None and reused by later inserts. The matrix grows by doubling,
+    searches are a single matrix-vector product over the used rows.
+
+    With `quantization` the matrix is stored as float16, or as int8 with a float32
+    scale per vector, for 2x/4x less memory. Scores are computed on the quantized
+    matrix. With `rescore` > 0 a float32 copy is kept in a separate memory-mapped
+    file, only its rows of the top `rescore` candidates are read to reorder them
+    in full precision.
+
+    Writers never mutate the docs list a search may be reading, they replace it, so
+    searches score a snapshot outside the lock. Document changes are appended to a
+    log and only merged into docs.json from time to time.
+    """
+
+    def __init__(
+        self,
+        persist_dir: Path,
+        initial_capacity: int = 1024,
+        quantization: Quantization = "none",
+        rescore: int = 0,
+    ) -> None:
+        self.persist_dir = persist_dir
+        self.initial_capacity = initial_capacity
+        self.quantization = quantization
+        self.rescore = rescore if quantization != "none" else 0
+        self.vectors_file = persist_dir / VECTORS_FILE
+        self.docs_file = persist_dir / DOCS_FILE
+        self.log_file = persist_dir / DOCS_LOG_FILE
+        self._log_entries = 0
+        self._files = {"vectors": self.vectors_file}
+        self._dtypes = {"vectors": _DTYPES[quantization]}
+        if quantization == "int8":
+            self._files["scales"] = persist_dir / SCALES_FILE
+            self._dtypes["scales"] = np.float32
+        if self.rescore:
+            self._files["full"] = persist_dir / FULL_FILE
+            self._dtypes["full"] = np.float32
+        self._lock = threading.RLock()
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._docs: List[Optional[Dict[str, Any]]] = []
+        self._rows: Dict[str, int] = {}
+        self._filenames: Dict[str, Set[int]] = {}
+        self._free: List[int] = []
+        self._load()
+
+    @property
+    def _matrix(self) -> Optional[np.ndarray]:
+        return self._arrays.get("vectors")
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self._matrix.shape[1] if self._matrix is not None else None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of the arrays scanned by every query, the rescore copy excluded"""
+        return sum(a.nbytes for name, a in self._arrays.items() if name != "full")
+
+    def _load(self) -> None:
+        if not (self.docs_file.is_file() and self.vectors_file.is_file()):
+            return
+        with open(self.docs_file, encoding="utf-8") as f:
+            self._docs = json.load(f)
+        for name, path in self._files.items():
+            if not path.is_file():
+                raise ValueError(
+                    f"{path} is missing, the index in {self.persist_dir} was built "
+                    "with other quantization settings, please rebuild it"
+                )
+            self._arrays[name] = np.load(path, mmap_mode="r+")
+        if self._matrix.dtype != self._dtypes["vectors"]:
+            raise ValueError(
+                f"index in {self.persist_dir} is stored as {self._matrix.dtype}, "
+                f"quantization {self.quantization} expects "
+                f"{np.dtype(self._dtypes['vectors'])}, please rebuild it"
+            )
+        self._replay_log()
+        for row, doc in enumerate(self._docs):
+            if doc is None:
+                self._free.append(row)
+            else:
+                self._index_row(row, doc)
+        logger.info(f"loaded {len(self._rows)} vectors from {self.persist_dir}")
+
+    def _replay_log(self) -> None:
+        if not self.log_file.is_file():
+            return
+        with open(self.log_file, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 写入中断的最后一行, 其之前的变更均已完整记录
+                    logger.warning(f"ignored a truncated entry of {self.log_file}")
+                    break
+                row = entry["row"]
+                self._docs.extend([None] * (row + 1 - len(self._docs)))
+                self._docs[row] = entry["doc"]
+                self._log_entries += 1
+
+    def _index_row(self, row: int, doc: Dict[str, Any]) -> None:
+        self._rows[doc["id"]] = row
+        filename = (doc.get("metadata") or {}).get("filename")
+        if filename:
+            self._filenames.setdefault(filename, set()).add(row)
+
+    def _unindex_row(self, row: int) -> None:
+        doc = self._docs[row]
+        self._rows.pop(doc["id"], None)
+        filename = (doc.get("metadata") or {}).get("filename")
+        if filename in self._filenames:
+            self._filenames[filename].discard(row)
+            if not self._filenames[filename]:
+                del self._filenames[filename]
+
+    def _shape(self, name: str, rows: int, dim: int) -> Tuple[int, ...]:
+        return (rows,) if name == "scales" else (rows, dim)
+
+    def _ensure_capacity(self, rows: int, dim: int) -> None:
+        self.persist_dir.mkdir(parents=True, exist_ok=True)
+        if self._matrix is None:
+            for name, path in self._files.items():
+                self._arrays[name] = np.lib.format.open_memmap(
+                    path,
+                    mode="w+",
+                    dtype=self._dtypes[name],
+                    shape=self._shape(name, max(rows, self.initial_capacity), dim),
+                )
+            return
+        if self._matrix.shape[1] != dim:
+            raise ValueError(
+                f"vector dimension {dim} does not match the index dimension "
+                f"{self._matrix.shape[1]}"
+            )
+        capacity = self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        # 容量翻倍, 写入新文件后替换, 已映射的旧矩阵仍可被正在执行的查询使用
+        for name, path in self._files.items():
+            tmp_file = path.with_name(path.name + ".tmp")
+            grown = np.lib.format.open_memmap(
+                tmp_file,
+                mode="w+",
+                dtype=self._dtypes[name],
+                shape=self._shape(name, max(rows, capacity * 2), dim),
+            )
+            grown[:capacity] = self._arrays[name]
+            grown.flush()
+            del grown
+            os.replace(tmp_file, path)
+            self._arrays[name] = np.load(path, mmap_mode="r+")
+
+    def _persist(self, rows: Iterable[int]) -> None:
+        for array in self._arrays.values():
+            array.flush()
+        rows = list(rows)
+        if not self.docs_file.is_file() or self._log_entries + len(rows) > max(
+            len(self._docs), _COMPACT_MIN
+        ):
+            self._compact()
+            return
+        # 只追加变更的行, 不重写整个 docs.json
+        with open(self.log_file, "a", encoding="utf-8") as f:
+            f.writelines(
+                json.dumps({"row": row, "doc": self._docs[row]}, ensure_ascii=False)
+                + "\n"
+                for row in rows
+            )
+        self._log_entries += len(rows)
+
+    def _compact(self) -> None:
+        tmp_file = self.persist_dir / (DOCS_FILE + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self._docs, f, ensure_ascii=False)
+        os.replace(tmp_file, self.docs_file)
+        # 日志记录的是行的最终状态, 删除前中断时重放结果不变
+        self.log_file.unlink(missing_ok=True)
+        self._log_entries = 0
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _write_rows(self, rows: List[int], matrix: np.ndarray) -> None:
+        if self.quantization == "int8":
+            # 每个向量按自身最大绝对值缩放到 [-127, 127]
+            scales = np.abs(matrix).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            self._arrays["vectors"][rows] = np.round(matrix / scales[:, None]).astype(
+                np.int8
+            )
+            self._arrays["scales"][rows] = scales
+        else:
+            self._arrays["vectors"][rows] = matrix
+        if self.rescore:
+            self._arrays["full"][rows] = matrix
+
+    def _score(
+        self, arrays: Dict[str, np.ndarray], rows: np.ndarray | slice, query: np.ndarray
+    ) -> np.ndarray:
+        matrix = arrays["vectors"][rows]
+        if self.quantization == "none":
+            return matrix @ query
+        scores = np.empty(matrix.shape[0], dtype=np.float32)
+        for start in range(0, matrix.shape[0], _SCORE_CHUNK):
+            block = matrix[start : start + _SCORE_CHUNK]
+            scores[start : start + _SCORE_CHUNK] = block.astype(np.float32) @ query
+        if self.quantization == "int8":
+            scores *= arrays["scales"][rows]
+        return scores
+
+    def add(
+        self,
+        vectors: Sequence[Sequence[float]],
+        texts: Sequence[str],
+        metadatas: Optional[Sequence[Optional[dict]]] = None,
+        ids: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        if len(vectors) == 0:
+            return []
+        matrix = self._normalize(np.asarray(vectors, dtype=np.float32))
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in texts]
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+
+        with self._lock:
+            # 复制后修改, 正在执行的查询仍使用旧列表
+            self._docs = list(self._docs)
+            # 相同 id 视为更新, 先释放旧行
+            deleted = self._delete_locked([id_ for id_ in ids if id_ in self._rows])
+            reuse = [self._free.pop() for _ in range(min(len(ids), len(self._free)))]
+            start = len(self._docs)
+            rows = reuse + list(range(start, start + len(ids) - len(reuse)))
+            self._ensure_capacity(max(rows) + 1, matrix.shape[1])
+            self._docs.extend([None] * (max(rows) + 1 - len(self._docs)))
+            self._write_rows(rows, matrix)
+            for row, id_, text, metadata in zip(rows, ids, texts, metadatas):
+                doc = {"id": id_, "text": text, "metadata": metadata or {}}
+                self._docs[row] = doc
+                self._index_row(row, doc)
+            self._persist(dict.fromkeys(deleted + rows))
+        return ids
+
+    def _delete_locked(self, ids: Iterable[str]) -> List[int]:
+        deleted = []
+        for id_ in ids:
+            row = self._rows.get(id_)
+            if row is None:
+                continue
+            self._unindex_row(row)
+            self._docs[row] = None
+            for array in self._arrays.values():
+                array[row] = 0
+            self._free.append(row)
+            deleted.append(row)
+        return deleted
+
+    def delete(self, ids: Iterable[str]) -> int:
+        with self._lock:
+            self._docs = list(self._docs)
+            deleted = self._delete_locked(ids)
+            if deleted:
+                self._persist(deleted)
+            return len(deleted)
+
+    def ids_by_filenames(self, filenames: Iterable[str]) -> List[str]:
+        with self._lock:
+            return [
+                self._docs[row]["id"]
+                for filename in filenames
+                for row in self._filenames.get(filename, ())
+            ]
+
+    def get(self, id_: str) -> Optional[Dict[str, Any]]:
+        row = self._rows.get(id_)
+        return self._docs[row] if row is not None else None
+
+    def search(
+        self,
+        vector: Sequence[float],
+        k: int = 4,
+        filenames: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Top-k documents by cosine similarity, optionally limited to filenames"""
+        query = self._normalize(np.asarray(vector, dtype=np.float32))
+        with self._lock:
+            if self._matrix is None or not self._rows:
+                return []
+            # 锁内只取快照, 打分在锁外进行, 查询之间以及与写入互不阻塞
+            docs, arrays, free = self._docs, dict(self._arrays), list(self._free)
+            if filenames:
+                rows = np.fromiter(
+                    sorted(
+                        {r for name in filenames for r in self._filenames.get(name, ())}
+                    ),
+                    dtype=np.int64,
+                )
+                if rows.size == 0:
+                    return []
+
+        if filenames:
+            scores = self._score(arrays, rows, query)
+        else:
+            used = len(docs)
+            rows = np.arange(used)
+            scores = self._score(arrays, slice(0, used), query)
+            if free:
+                scores[free] = -np.inf
+        top = self._top_k(scores, max(k, self.rescore))
+        if self.rescore:
+            # 量化分数召回候选, 再用全精度向量重排
+            top = top[np.isfinite(scores[top])]
+            scores = scores.copy()
+            scores[top] = arrays["full"][rows[top]] @ query
+            top = top[np.argsort(-scores[top])]
+        hits = [(int(rows[i]), float(scores[i])) for i in top[:k]]
+
+        with self._lock:
+            # 打分期间被删除或复用的行, 其向量与快照中的文档已不对应, 不返回
+            return [
+                (docs[row], score)
+                for row, score in hits
+                if np.isfinite(score) and self._docs[row] is docs[row]
+            ]
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        if k >= scores.size:
+            return np.argsort(-scores)
+        top = np.argpartition(-scores, k)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def __len__(self) -> int:
+        return len(self._rows)
@@ -5,6 +5,7 @@ from __future__ import annotations
 import json
 import logging
 import time
+from concurrent.futures import Executor
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
@@ -15,6 +16,10 @@ from langchain_core.vectorstores import VectorStore
 
 from langchain.vectorstores.utils import maximal_marginal_relevance
 
+from langchain_emoji.components.vector_store.vector_store_async import (
+    arun_with_embeddings,
+)
+
 
 logger = logging.getLogger(__name__)
 
@@ -292,7 +297,11 @@ class TencentVectorDB(VectorStore):
                 metadata = "{}"
                 if metadatas is not None:
                     metadata = json.dumps(metadatas[id])
-                vdb_id = "{}-{}-{}".format(time.time_ns(), hash(texts[id]), id)
+                vdb_id = (
+                    ids[id]
+                    if ids
+                    else "{}-{}-{}".format(time.time_ns(), hash(texts[id]), id)
+                )
                 doc = self.document.Document(
                     id=vdb_id,
                     text=texts[id],
@@ -535,6 +544,8 @@ class TencentVectorDB(VectorStore):
 
 class EmojiTencentVectorDB(TencentVectorDB):
     field_filename: str = "filename"
+    # 异步方法运行阻塞调用的线程池, None 时使用事件循环默认线程池
+    executor: Optional[Executor] = None
 
     def __init__(
         self,
@@ -652,6 +663,120 @@ class EmojiTencentVectorDB(TencentVectorDB):
             filename=filename,
         )
 
+    async def aadd_original_texts_with_filename(
+        self,
+        filename: str,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        timeout: Optional[int] = None,
+        batch_size: int = 1000,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        # embedding_func 为 None 时由腾讯云服务端 embedding, 只需卸载阻塞调用
+        return await arun_with_embeddings(
+            self.executor,
+            self.embedding_func,
+            texts,
+            self.add_original_texts_with_filename,
+            filename,
+            texts,
+            metadatas=metadatas,
+            timeout=timeout,
+            batch_size=batch_size,
+        )
+
+    def add_original_texts_with_filenames(
+        self,
+        filenames: List[str],
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        timeout: Optional[int] = None,
+        batch_size: int = 1000,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Insert texts of different emojis, filenames[i] is the file of texts[i].
+
+        Documents are upserted, passing the same `ids` again replaces them.
+        """
+        texts = list(texts)
+        if not metadatas:
+            metadatas = [{"filename": filename} for filename in filenames]
+        pks: list[str] = []
+        total_count = len(texts)
+        for start in range(0, total_count, batch_size):
+            docs = []
+            end = min(start + batch_size, total_count)
+            for id in range(start, end, 1):
+                vdb_id = (
+                    ids[id]
+                    if ids
+                    else "{}-{}-{}".format(time.time_ns(), hash(texts[id]), id)
+                )
+                doc = self.document.Document(
+                    id=vdb_id,
+                    text=texts[id],
+                    metadata=json.dumps(metadatas[id]),
+                    filename=filenames[id],
+                )
+                docs.append(doc)
+                pks.append(vdb_id)
+            # 每批一次 upsert, 由腾讯云服务端 embedding
+            self.collection.upsert(docs, timeout)
+        return pks
+
+    async def aadd_original_texts_with_filenames(
+        self,
+        filenames: List[str],
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        timeout: Optional[int] = None,
+        batch_size: int = 1000,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        return await arun_with_embeddings(
+            self.executor,
+            self.embedding_func,
+            texts,
+            self.add_original_texts_with_filenames,
+            filenames,
+            texts,
+            metadatas=metadatas,
+            timeout=timeout,
+            batch_size=batch_size,
+            ids=ids,
+        )
+
+    async def asimilarity_search(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Document]:
+        # 检索器 (as_retriever) 的异步调用也走这里
+        return await arun_with_embeddings(
+            self.executor,
+            self.embedding_func,
+            [query],
+            self.similarity_search,
+            query,
+            k,
+            **kwargs,
+        )
+
+    async def asimilarity_search_by_filenames(
+        self, query: str, filenames: List[str], k: int = 4
+    ) -> List[Document]:
+        return await arun_with_embeddings(
+            self.executor,
+            self.embedding_func,
+            [query],
+            self.similarity_search_by_filenames,
+            query,
+            filenames,
+            k,
+        )
+
     def similarity_search_by_filenames(
         self, query: str, filenames: List[str], k: int = 4
     ) -> List[Document]:
@@ -683,3 +808,23 @@ class EmojiTencentVectorDB(TencentVectorDB):
             expr=expr,
             timeout=timeout,
         )
+
+    async def adelete_texts_with_filenames(
+        self,
+        document_ids: List[str],
+        filenames: List[str] = [],
+        batch_size: int = 20,
+        expr: Optional[str] = None,
+        timeout: Optional[int] = None,
+    ):
+        return await arun_with_embeddings(
+            self.executor,
+            None,
+            [],
+            self.delete_texts_with_filenames,
+            document_ids,
+            filenames,
+            batch_size,
+            expr,
+            timeout,
+        )
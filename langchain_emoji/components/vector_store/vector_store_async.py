@@ -0,0 +1,40 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import Executor
+from typing import Any, Callable, Optional, Sequence, TypeVar
+
+from langchain_core.embeddings import Embeddings
+
+from langchain_emoji.components.embedding.embedding_proxy import (
+    prefetched_embeddings,
+)
+
+T = TypeVar("T")
+
+
+async def arun_with_embeddings(
+    executor: Optional[Executor],
+    embeddings: Optional[Embeddings],
+    texts: Sequence[str],
+    func: Callable[..., T],
+    *args: Any,
+    **kwargs: Any,
+) -> T:
+    """Run a blocking vector store call in executor, embedding its texts first.
+
+    The texts are embedded with the async embedding API on the event loop, the
+    blocking call then gets them as prefetched vectors, so the executor thread only
+    waits for the database and never for the embedding API. Without an embedding
+    model (e.g. Tencent server-side embedding) only the call is offloaded.
+    """
+    loop = asyncio.get_running_loop()
+    if embeddings is not None and texts:
+        vectors = await embeddings.aembed_documents(list(texts))
+        with prefetched_embeddings(dict(zip(texts, vectors))):
+            call = functools.partial(
+                contextvars.copy_context().run, func, *args, **kwargs
+            )
+    else:
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(executor, call)
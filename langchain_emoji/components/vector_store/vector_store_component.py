@@ -8,10 +8,14 @@ from langchain_emoji.components.vector_store.tencent.tencent import (
     ConnectionParams,
 )
 from langchain_emoji.components.vector_store.chroma.chroma import EmojiChroma
+from langchain_emoji.components.vector_store.numpy_store.numpy_store import (
+    EmojiNumpyStore,
+)
 from chromadb.config import Settings as ChromaSettings
 
 from langchain_emoji.constants import PROJECT_ROOT_PATH
 from langchain_emoji.components.embedding.embedding_component import EmbeddingComponent
+from langchain_emoji.components.executor.executor_component import ExecutorComponent
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +23,12 @@ logger = logging.getLogger(__name__)
 @singleton
 class VectorStoreComponent:
     @inject
-    def __init__(self, embed: EmbeddingComponent, settings: Settings) -> None:
+    def __init__(
+        self,
+        embed: EmbeddingComponent,
+        settings: Settings,
+        executors: ExecutorComponent,
+    ) -> None:
         self.embedcom = embed
         match settings.vectorstore.database:
             case "tcvectordb":
@@ -38,19 +47,33 @@ class VectorStoreComponent:
                 collection_name = settings.vectorstore.chromadb.collection_name
                 self.vector_store = EmojiChroma(
                     collection_name,
-                    embed._embedding,
+                    embed.embedding,
                     client_settings=ChromaSettings(
                         anonymized_telemetry=False,
                         is_persistent=True,
                         persist_directory=persist_directory,
                     ),
                 )
+            case "numpy":
+                numpy_settings = settings.vectorstore.numpy
+                data_dir = PROJECT_ROOT_PATH / numpy_settings.persist_dir
+                persist_directory = self.create_persist_directory("numpy", data_dir)
+                self.vector_store = EmojiNumpyStore(
+                    numpy_settings.collection_name,
+                    embed.embedding,
+                    persist_directory=persist_directory,
+                    initial_capacity=numpy_settings.initial_capacity,
+                    quantization=numpy_settings.quantization,
+                    rescore=numpy_settings.rescore,
+                )
             case _:
                 # Should be unreachable
                 # The settings validator should have caught this
                 raise ValueError(
                     f"Vectorstore database {settings.vectorstore.database} not supported"
                 )
+        # 异步检索与写入的阻塞部分使用独立线程池
+        self.vector_store.executor = executors.get("vectorstore")
 
     def create_persist_directory(self, vectordb: str, data_dir: Path) -> str:
         if not (os.path.exists(data_dir) and os.path.isdir(data_dir)):
@@ -9,14 +9,24 @@ from fastapi.openapi.utils import get_openapi
 from injector import Injector
 from langchain_emoji.paths import docs_path
 from langchain_emoji.settings.settings import Settings
-from langchain_emoji.server.emoji.emoji_router import emoji_router
+from langchain_emoji.components.executor.executor_component import ExecutorComponent
+from langchain_emoji.components.tokenizer.tokenizer_component import (
+    TokenizerComponent,
+)
+from langchain_emoji.server.emoji.emoji_router import (
+    emoji_file_router,
+    emoji_router,
+)
+from langchain_emoji.server.emoji.emoji_service import EmojiService
 from langchain_emoji.server.vector_store.vector_store_router import vector_store_router
 from langchain_emoji.server.trace.trace_router import trace_router
 from langchain_emoji.server.health.health_router import health_router
+from langchain_emoji.server.metrics.metrics_router import metrics_router
 from langchain_emoji.server.config.config_router import (
     config_router_no_auth,
     config_router,
 )
+from langchain_emoji.server.utils.auth import authenticated
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +49,10 @@ def create_app(root_injector: Injector) -> FastAPI:
                 "name": "Config",
                 "description": "Obtain and modify project configuration files",
             },
+            {
+                "name": "Metrics",
+                "description": "Runtime metrics of caches and pipelines",
+            },
             {
                 "name": "Health",
                 "description": "Simple health API to make sure the server is up and running.",
@@ -79,14 +93,29 @@ def create_app(root_injector: Injector) -> FastAPI:
 
         app.openapi = custom_openapi  # type: ignore[method-assign]
 
+        settings = root_injector.get(Settings)
+
+        # 图片接口默认需要认证, 显式开启 emoji.file.public 后才允许匿名访问
+        app.include_router(
+            emoji_file_router,
+            dependencies=[] if settings.emoji.file.public else [Depends(authenticated)],
+        )
         app.include_router(emoji_router)
         app.include_router(trace_router)
         app.include_router(vector_store_router)
         app.include_router(health_router)
+        app.include_router(metrics_router)
         app.include_router(config_router_no_auth)
         app.include_router(config_router)
-
-        settings = root_injector.get(Settings)
+        executors = root_injector.get(ExecutorComponent)
+        # run_in_executor(None) 的调用改用配置的线程池, 而不是事件循环的默认线程池
+        app.add_event_handler("startup", executors.install_default)
+        # 关闭时保存语义缓存中未达到持久化间隔的条目, 需在线程池关闭前执行
+        emoji_service = root_injector.get(EmojiService)
+        app.add_event_handler("shutdown", emoji_service.semantic_cache.flush)
+        app.add_event_handler("shutdown", executors.shutdown)
+        # 启动时加载分词编码, 避免首个请求承担加载耗时
+        root_injector.get(TokenizerComponent)
         if settings.server.cors.enabled:
             logger.debug("Setting up CORS middleware")
             app.add_middleware(
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict
+
+from langchain_emoji.server.utils.model import (
+    ServiceUnavailableErrorCode,
+    TooManyRequestsErrorCode,
+)
+from langchain_emoji.settings.settings import EmojiAdmissionSettings
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request can not be admitted to the emoji pipeline.
+
+    Attributes:
+        status_code: 429 when the wait queue is full, 503 when the queue deadline expired.
+        retry_after: Suggested number of seconds before retrying.
+    """
+
+    def __init__(self, msg: str, status_code: int, retry_after: int = 1) -> None:
+        super().__init__(msg)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def code(self) -> int:
+        if self.status_code == 429:
+            return TooManyRequestsErrorCode
+        return ServiceUnavailableErrorCode
+
+
+class _LLMSlot:
+    def __init__(self, limit: int, max_queue: int) -> None:
+        self.limit = limit
+        self.max_queue = max_queue
+        self.semaphore = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.wait_times: Deque[float] = deque(maxlen=500)
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self.wait_times)
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "wait_time": {
+                "mean": round(sum(waits) / len(waits), 4) if waits else 0.0,
+                "p95": round(waits[int(len(waits) * 0.95) - 1], 4) if waits else 0.0,
+                "max": round(waits[-1], 4) if waits else 0.0,
+            },
+        }
+
+
+class AdmissionController:
+    """Per-LLM concurrency limit with a bounded wait queue and a queue deadline"""
+
+    def __init__(self, settings: EmojiAdmissionSettings) -> None:
+        self.enabled = settings.enabled
+        self.settings = settings
+        self._slots: Dict[str, _LLMSlot] = {}
+
+    def _slot(self, llm: str) -> _LLMSlot:
+        slot = self._slots.get(llm)
+        if slot is None:
+            slot = _LLMSlot(
+                self.settings.limits.get(llm, self.settings.default_limit),
+                self.settings.max_queue,
+            )
+            self._slots[llm] = slot
+        return slot
+
+    def has_capacity(self, llm: str) -> bool:
+        """Whether a slot is free right now, used to skip optional work such as hedging"""
+        if not self.enabled:
+            return True
+        slot = self._slot(llm)
+        return slot.in_flight < slot.limit
+
+    def precheck(self, llm: str) -> None:
+        """Reject immediately with 429 when both the slots and the wait queue are full"""
+        if not self.enabled:
+            return
+        slot = self._slot(llm)
+        if slot.in_flight >= slot.limit and slot.waiting >= slot.max_queue:
+            slot.rejected_full += 1
+            raise AdmissionRejected(
+                f"too many requests for {llm}, queue is full", status_code=429
+            )
+
+    @asynccontextmanager
+    async def admit(self, llm: str) -> AsyncIterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        self.precheck(llm)
+        slot = self._slot(llm)
+
+        start = time.perf_counter()
+        slot.waiting += 1
+        try:
+            await asyncio.wait_for(
+                slot.semaphore.acquire(), timeout=self.settings.queue_timeout
+            )
+        except asyncio.TimeoutError:
+            slot.rejected_timeout += 1
+            raise AdmissionRejected(
+                f"{llm} is overloaded, queue wait exceeded "
+                f"{self.settings.queue_timeout}s",
+                status_code=503,
+                retry_after=max(1, int(self.settings.queue_timeout)),
+            )
+        finally:
+            slot.waiting -= 1
+
+        slot.wait_times.append(time.perf_counter() - start)
+        slot.admitted += 1
+        slot.in_flight += 1
+        try:
+            yield
+        finally:
+            slot.in_flight -= 1
+            slot.semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "llms": {llm: slot.stats() for llm, slot in self._slots.items()},
+        }
@@ -0,0 +1,43 @@
+import re
+import unicodedata
+from typing import Any, Dict, Hashable, Optional
+
+from langchain_emoji.settings.settings import EmojiCacheSettings
+from langchain_emoji.utils.cache import LRUCache
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """归一化用户输入，全半角、大小写以及多余空白不影响缓存命中"""
+    prompt = unicodedata.normalize("NFKC", prompt)
+    return _whitespace.sub(" ", prompt).strip().lower()
+
+
+def cache_key(prompt: str, llm: str, *extra: Hashable) -> tuple:
+    return (normalize_prompt(prompt), llm, *extra)
+
+
+class EmojiResponseCache:
+    """Exact-match cache of EmojiResponse keyed on the normalized (prompt, llm) pair"""
+
+    def __init__(self, settings: EmojiCacheSettings) -> None:
+        self.enabled = settings.enabled
+        self._cache: LRUCache[Any] = LRUCache(
+            maxsize=settings.maxsize, ttl=settings.ttl
+        )
+
+    def get(self, key: tuple) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        return self._cache.get(key)
+
+    def set(self, key: tuple, value: Any) -> None:
+        if self.enabled:
+            self._cache.set(key, value)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, **self._cache.stats()}
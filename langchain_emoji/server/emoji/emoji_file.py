@@ -0,0 +1,86 @@
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=` range into an inclusive (start, end) pair.
+
+    Returns None when the header is absent or can not be served as a single range,
+    in which case the whole file is sent. Raises RangeNotSatisfiable when the range
+    starts beyond the end of the file.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes=") :].strip()
+    if "," in spec or "-" not in spec:
+        return None  # 多段 range 不支持, 退化为返回完整文件
+    start_str, end_str = (part.strip() for part in spec.split("-", 1))
+    try:
+        if not start_str:
+            # bytes=-N 表示最后 N 个字节
+            suffix = int(end_str)
+            if suffix <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - suffix, 0), size - 1
+        start = int(start_str)
+        end = int(end_str) if end_str else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def file_response(
+    request: Request,
+    content: bytes,
+    etag: str,
+    media_type: str,
+    max_age: int,
+    public: bool = True,
+) -> Response:
+    """Binary response honouring If-None-Match, Range and If-Range"""
+    size = len(content)
+    headers: Dict[str, str] = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        # 需要认证的图片不允许共享缓存保存
+        "Cache-Control": f"{'public' if public else 'private'}, max-age={max_age}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != etag:
+        range_header = None  # 文件已变化, 返回完整内容
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        return Response(content=content, media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(
+        content=content[start : end + 1],
+        status_code=206,
+        media_type=media_type,
+        headers=headers,
+    )
@@ -0,0 +1,68 @@
+import math
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from langchain_emoji.settings.settings import EmojiHedgeSettings
+
+
+class LatencyTracker:
+    """Sliding window of recent chain latencies per provider"""
+
+    def __init__(self, window: int = 200) -> None:
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, llm: str, seconds: float) -> None:
+        self._samples.setdefault(llm, deque(maxlen=self.window)).append(seconds)
+
+    def count(self, llm: str) -> int:
+        return len(self._samples.get(llm, ()))
+
+    def percentile(self, llm: str, percent: float) -> Optional[float]:
+        samples = self._samples.get(llm)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1)
+        return ordered[max(index, 0)]
+
+
+class HedgePolicy:
+    """Decide whether and when a request is hedged to a second provider.
+
+    Hedging only applies when every provider is built, i.e. `llm.mode` is `all`.
+    """
+
+    def __init__(self, settings: EmojiHedgeSettings, llm_mode: str) -> None:
+        self.enabled = settings.enabled and llm_mode == "all"
+        self.providers = settings.providers
+        self.delay_mode = settings.delay_mode
+        self.fixed_delay = settings.delay
+        self.min_samples = settings.min_samples
+        self.latency = LatencyTracker(settings.window)
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def hedge_target(self, llm: str) -> Optional[str]:
+        if not self.enabled or llm not in self.providers:
+            return None
+        return next((p for p in self.providers if p != llm), None)
+
+    def delay(self, llm: str) -> float:
+        if self.delay_mode == "p95" and self.latency.count(llm) >= self.min_samples:
+            return self.latency.percentile(llm, 95)
+        return self.fixed_delay
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "delay": {llm: round(self.delay(llm), 4) for llm in self.providers},
+            "p95": {
+                llm: self.latency.percentile(llm, 95) for llm in self.providers
+            },
+        }
@@ -0,0 +1,47 @@
+from typing import List, Sequence, Set
+
+from langchain.schema.document import Document
+
+from langchain_emoji.server.emoji.emoji_cache import normalize_prompt
+
+
+def char_ngrams(text: str, n: int = 2) -> Set[str]:
+    """字符级 n-gram, 中文无需分词即可计算词面重合度"""
+    text = normalize_prompt(text).replace(" ", "")
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i : i + n] for i in range(len(text) - n + 1)}
+
+
+def lexical_overlap(query: str, content: str) -> float:
+    """Share of the query bigrams that also appear in the content"""
+    query_grams = char_ngrams(query)
+    if not query_grams:
+        return 0.0
+    return len(query_grams & char_ngrams(content)) / len(query_grams)
+
+
+def lexical_rerank(
+    query: str, docs: Sequence[Document], weight: float = 0.5
+) -> List[Document]:
+    """Rerank retrieved documents by mixing vector rank and lexical overlap.
+
+    Args:
+        query: The user prompt.
+        docs: Documents in vector similarity order.
+        weight: Weight of the lexical score, 0 keeps the vector order.
+    """
+    total = len(docs)
+    if total <= 1 or weight <= 0:
+        return list(docs)
+    scored = [
+        (
+            (1 - weight) * (1 - rank / total)
+            + weight * lexical_overlap(query, doc.page_content),
+            -rank,
+            doc,
+        )
+        for rank, doc in enumerate(docs)
+    ]
+    scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+    return [doc for _, _, doc in scored]
@@ -1,18 +1,30 @@
+import json
 import logging
-from fastapi import APIRouter, Depends, Request
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from langchain_emoji.server.utils.auth import authenticated
 from langchain_emoji.server.emoji.emoji_service import (
     EmojiService,
     EmojiRequest,
     EmojiResponse,
+    EmojiBatchRequest,
+    EmojiBatchItem,
 )
+from langchain_emoji.server.emoji.emoji_admission import AdmissionRejected
+from langchain_emoji.server.emoji.emoji_file import file_response
+from langchain_emoji.components.tokenizer.tokenizer_component import PromptTooLong
 from langchain_emoji.server.utils.model import (
     RestfulModel,
     SystemErrorCode,
+    PromptTooLongErrorCode,
 )
 
 logger = logging.getLogger(__name__)
 
+# 认证依赖在挂载时按 emoji.file.public 决定, 见 launcher
+emoji_file_router = APIRouter(prefix="/v1")
+
 emoji_router = APIRouter(prefix="/v1", dependencies=[Depends(authenticated)])
 
 
@@ -28,6 +40,138 @@ async def emoji_invoke(request: Request, body: EmojiRequest) -> RestfulModel:
     service = request.state.injector.get(EmojiService)
     try:
         return RestfulModel(data=await service.get_emoji(body))
+    except AdmissionRejected as e:
+        return rejected_response(e)
+    except PromptTooLong as e:
+        return RestfulModel(code=PromptTooLongErrorCode, msg=str(e), data=None)
+    except Exception as e:
+        logger.exception(e)
+        return RestfulModel(code=SystemErrorCode, msg=str(e), data=None)
+
+
+@emoji_router.post(
+    "/emoji/batch",
+    response_model=RestfulModel[List[EmojiBatchItem] | int | None],
+    tags=["Emoji"],
+)
+async def emoji_batch(request: Request, body: EmojiBatchRequest) -> RestfulModel:
+    """
+    Run many prompts concurrently, each item carries its own result or error
+    """
+    service = request.state.injector.get(EmojiService)
+    try:
+        return RestfulModel(data=await service.get_emoji_batch(body))
+    except AdmissionRejected as e:
+        return rejected_response(e)
+    except PromptTooLong as e:
+        return RestfulModel(code=PromptTooLongErrorCode, msg=str(e), data=None)
     except Exception as e:
         logger.exception(e)
         return RestfulModel(code=SystemErrorCode, msg=str(e), data=None)
+
+
+def rejected_response(e: AdmissionRejected) -> JSONResponse:
+    logger.warning(e)
+    return JSONResponse(
+        status_code=e.status_code,
+        content=RestfulModel(code=e.code, msg=str(e), data=None).model_dump(),
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@emoji_router.post(
+    "/emoji/stream",
+    response_model=None,
+    tags=["Emoji"],
+)
+async def emoji_stream(
+    request: Request, body: EmojiRequest
+) -> StreamingResponse | JSONResponse:
+    """
+    Server-Sent-Events variant of /emoji, events are sent in order:
+    candidates, emojiinfo, emojidetail, done (or error)
+    """
+    service = request.state.injector.get(EmojiService)
+    try:
+        service.tokenizer.check_prompt(body.prompt, body.llm)
+        service.image_service.check_variant(body.size, body.format)
+        service.admission.precheck(body.llm)
+    except PromptTooLong as e:
+        return JSONResponse(
+            content=RestfulModel(
+                code=PromptTooLongErrorCode, msg=str(e), data=None
+            ).model_dump()
+        )
+    except ValueError as e:
+        return JSONResponse(
+            content=RestfulModel(code=SystemErrorCode, msg=str(e), data=None).model_dump()
+        )
+    except AdmissionRejected as e:
+        return rejected_response(e)
+
+    async def event_generator() -> AsyncIterator[str]:
+        try:
+            async for event, data in service.stream_emoji(body):
+                yield sse_event(event, data)
+        except Exception as e:
+            logger.exception(e)
+            yield sse_event(
+                "error",
+                RestfulModel(code=SystemErrorCode, msg=str(e), data=None).model_dump(),
+            )
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@emoji_file_router.get(
+    "/emoji/file/{filename}",
+    response_class=Response,
+    responses={
+        200: {"content": {"image/*": {}}},
+        206: {"description": "Partial content of a Range request"},
+        304: {"description": "Not modified, the ETag matched"},
+        404: {"description": "Emoji file not found"},
+    },
+    tags=["Emoji"],
+)
+async def emoji_file(
+    request: Request,
+    filename: str,
+    size: Optional[int] = None,
+    format: Optional[Literal["webp", "jpeg", "png"]] = None,
+) -> Response:
+    """
+    Raw image bytes with Content-Type, an MD5 ETag and single-range support,
+    size/format select a thumbnail or re-encoded variant
+    """
+    service = request.state.injector.get(EmojiService)
+    try:
+        emoji = await service.aget_emoji_file(filename, size, format)
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content=RestfulModel(code=SystemErrorCode, msg=str(e), data=None).model_dump(),
+        )
+    if emoji is None:
+        return JSONResponse(
+            status_code=404,
+            content=RestfulModel(
+                code=SystemErrorCode, msg=f"emoji file {filename} not found", data=None
+            ).model_dump(),
+        )
+    return file_response(
+        request,
+        emoji.content,
+        emoji.etag,
+        emoji.media_type,
+        service.settings.emoji.file.max_age,
+        service.settings.emoji.file.public,
+    )
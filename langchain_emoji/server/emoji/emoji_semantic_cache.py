@@ -0,0 +1,229 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from langchain_emoji.settings.settings import EmojiSemanticCacheSettings
+
+logger = logging.getLogger(__name__)
+
+# 相似度分布统计区间
+SIMILARITY_BUCKETS = [0.8, 0.9, 0.95, 0.98]
+
+
+class SemanticCacheEntry:
+    def __init__(
+        self,
+        prompt: str,
+        llm: str,
+        emojiinfo: Dict[str, Any],
+        run_id: Optional[str],
+        last_access: float,
+    ) -> None:
+        self.prompt = prompt
+        self.llm = llm
+        self.emojiinfo = emojiinfo
+        self.run_id = run_id
+        self.last_access = last_access
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "prompt": self.prompt,
+            "llm": self.llm,
+            "emojiinfo": self.emojiinfo,
+            "run_id": self.run_id,
+            "last_access": self.last_access,
+        }
+
+
+class EmojiSemanticCache:
+    """Embedding-similarity cache of past prompts and the EmojiInfo chosen for them.
+
+    Prompt vectors are kept L2-normalized in one float32 matrix, so a lookup is a
+    single matrix-vector product over the rows of the requested llm, selected with a
+    boolean mask per llm. When the cache is full the least recently used row is
+    overwritten.
+    """
+
+    def __init__(
+        self, settings: EmojiSemanticCacheSettings, persist_dir: Optional[Path] = None
+    ) -> None:
+        self.enabled = settings.enabled
+        self.threshold = settings.threshold
+        self.capacity = settings.capacity
+        self.persist_interval = settings.persist_interval
+        self.persist_dir = persist_dir if settings.persist else None
+
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Optional[SemanticCacheEntry]] = []
+        # llm -> 属于该 llm 的行
+        self._masks: Dict[str, np.ndarray] = {}
+        self._dirty = 0
+
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self._score_sum = 0.0
+        self._hit_score_sum = 0.0
+        self._score_buckets = [0] * (len(SIMILARITY_BUCKETS) + 1)
+
+        if self.enabled and self.persist_dir:
+            self.load()
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        arr = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(arr)
+        return arr / norm if norm > 0 else arr
+
+    def lookup(
+        self, vector: List[float], llm: str
+    ) -> Optional[Tuple[SemanticCacheEntry, float]]:
+        query = self._normalize(vector)
+        with self._lock:
+            self.lookups += 1
+            if self._vectors is None or not self._entries:
+                return None
+            mask = self._masks.get(llm)
+            if mask is None or not mask.any():
+                return None
+            rows = np.flatnonzero(mask)
+            scores = self._vectors[rows] @ query
+            best = int(np.argmax(scores))
+            index, score = int(rows[best]), float(scores[best])
+
+            self._score_sum += score
+            self._score_buckets[np.searchsorted(SIMILARITY_BUCKETS, score)] += 1
+            if score < self.threshold:
+                return None
+
+            entry = self._entries[index]
+            entry.last_access = time.time()
+            self.hits += 1
+            self._hit_score_sum += score
+            return entry, score
+
+    def add(
+        self,
+        prompt: str,
+        llm: str,
+        vector: List[float],
+        emojiinfo: Dict[str, Any],
+        run_id: Optional[str] = None,
+    ) -> bool:
+        """Insert a new entry, returns True when the cache is due to be persisted"""
+        if self.capacity <= 0:
+            return False
+        query = self._normalize(vector)
+        entry = SemanticCacheEntry(prompt, llm, emojiinfo, run_id, time.time())
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.capacity, query.shape[0]), np.float32)
+            elif self._vectors.shape[1] != query.shape[0]:
+                logger.warning("embedding dimension changed, reset semantic cache")
+                self._vectors = np.zeros((self.capacity, query.shape[0]), np.float32)
+                self._entries = []
+                self._masks = {}
+
+            if len(self._entries) < self.capacity:
+                index = len(self._entries)
+                self._entries.append(entry)
+            else:
+                index = min(
+                    range(len(self._entries)),
+                    key=lambda i: self._entries[i].last_access,
+                )
+                self._masks[self._entries[index].llm][index] = False
+                self._entries[index] = entry
+                self.evictions += 1
+            self._vectors[index] = query
+            self._llm_mask(llm)[index] = True
+            self._dirty += 1
+            return bool(self.persist_dir) and self._dirty >= self.persist_interval
+
+    def _llm_mask(self, llm: str) -> np.ndarray:
+        mask = self._masks.get(llm)
+        if mask is None:
+            mask = self._masks[llm] = np.zeros(self.capacity, dtype=bool)
+        return mask
+
+    def save(self) -> None:
+        if not self.persist_dir:
+            return
+        with self._lock:
+            if self._vectors is None:
+                return
+            size = len(self._entries)
+            vectors = self._vectors[:size].copy()
+            entries = [entry.to_dict() for entry in self._entries]
+            self._dirty = 0
+
+        os.makedirs(self.persist_dir, exist_ok=True)
+        vectors_file = self.persist_dir / "vectors.npy"
+        entries_file = self.persist_dir / "entries.json"
+        np.save(str(vectors_file) + ".tmp.npy", vectors)
+        os.replace(str(vectors_file) + ".tmp.npy", vectors_file)
+        with open(str(entries_file) + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(str(entries_file) + ".tmp", entries_file)
+        logger.info(f"semantic cache saved, size: {size}")
+
+    def flush(self) -> None:
+        """Save the entries added since the last save, called on shutdown"""
+        if self._dirty:
+            self.save()
+
+    def load(self) -> None:
+        vectors_file = self.persist_dir / "vectors.npy"
+        entries_file = self.persist_dir / "entries.json"
+        if not (vectors_file.exists() and entries_file.exists()):
+            return
+        try:
+            vectors = np.load(vectors_file)
+            with open(entries_file, "r", encoding="utf-8") as f:
+                entries = [SemanticCacheEntry(**item) for item in json.load(f)]
+        except Exception as e:
+            logger.exception(f"load semantic cache failed: {e}")
+            return
+
+        # 容量变小时只保留最近访问的条目
+        order = sorted(
+            range(len(entries)), key=lambda i: entries[i].last_access, reverse=True
+        )[: self.capacity]
+        with self._lock:
+            self._vectors = np.zeros((self.capacity, vectors.shape[1]), np.float32)
+            self._vectors[: len(order)] = vectors[order]
+            self._entries = [entries[i] for i in order]
+            self._masks = {}
+            for index, entry in enumerate(self._entries):
+                self._llm_mask(entry.llm)[index] = True
+        logger.info(f"semantic cache loaded, size: {len(order)}")
+
+    def stats(self) -> Dict[str, Any]:
+        misses = self.lookups - self.hits
+        scored = sum(self._score_buckets)
+        bounds = ["<0.8", "0.8-0.9", "0.9-0.95", "0.95-0.98", ">=0.98"]
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses": misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            "similarity": {
+                "mean": round(self._score_sum / scored, 4) if scored else 0.0,
+                "hit_mean": (
+                    round(self._hit_score_sum / self.hits, 4) if self.hits else 0.0
+                ),
+                "buckets": dict(zip(bounds, self._score_buckets)),
+            },
+        }
@@ -1,7 +1,13 @@
-from injector import inject
+from injector import inject, singleton
 from langchain_emoji.components.llm.llm_component import LLMComponent
 from langchain_emoji.components.trace.trace_component import TraceComponent
 from langchain_emoji.components.minio.minio_component import MinioComponent
+from langchain_emoji.components.image.image_component import ImageComponent
+from langchain_emoji.components.image.image_variant import (
+    is_variant,
+    variant_media_type,
+    variant_name,
+)
 from langchain_emoji.components.vector_store.vector_store_component import (
     VectorStoreComponent,
 )
@@ -10,10 +16,19 @@ from langchain_emoji.server.emoji.emoji_prompt import (
     RESPONSE_TEMPLATE,
     ZHIPUAI_RESPONSE_TEMPLATE,
 )
+from langchain_emoji.server.emoji.emoji_cache import EmojiResponseCache, cache_key
+from langchain_emoji.server.emoji.emoji_semantic_cache import EmojiSemanticCache
+from langchain_emoji.server.emoji.emoji_rerank import lexical_rerank
+from langchain_emoji.server.emoji.emoji_hedge import HedgePolicy
+from langchain_emoji.server.emoji.emoji_admission import (
+    AdmissionController,
+    AdmissionRejected,
+)
 from langchain.schema.output_parser import StrOutputParser
 from pydantic import BaseModel, Field
 import logging
-import tiktoken
+import asyncio
+import time
 from langchain_emoji.settings.settings import Settings
 from langchain.schema.document import Document
 from langchain.schema.runnable import (
@@ -31,16 +46,41 @@ from langchain.schema.runnable import ConfigurableField
 from operator import itemgetter
 
 from langchain_community.callbacks import get_openai_callback
-from langchain_emoji.components.llm.custom.zhipuai import get_zhipuai_callback
+from langchain_community.callbacks.openai_info import OpenAICallbackHandler
+from langchain_emoji.components.llm.custom.zhipuai import (
+    ZhipuAICallbackHandler,
+    get_zhipuai_callback,
+)
+from langchain_emoji.components.executor.executor_component import ExecutorComponent
+from langchain_emoji.components.embedding.embedding_proxy import (
+    prefetched_embeddings,
+)
+from langchain_emoji.components.embedding.embedding_error import EmbeddingBatchError
+from langchain_emoji.components.embedding.embedding_usage import (
+    embedding_usage_var,
+    get_embedding_usage,
+)
+from langchain_emoji.components.tokenizer.tokenizer_component import (
+    TokenizerComponent,
+    PromptTooLong,
+)
+from langchain_emoji.server.utils.model import SystemErrorCode, PromptTooLongErrorCode
+from langchain_emoji.utils.singleflight import SingleFlight
 from langchain_emoji.paths import local_data_path
 from uuid import UUID
 from json.decoder import JSONDecodeError
 import json
-import base64
+import mimetypes
 import re
+from pathlib import Path
+from urllib.parse import quote, urlencode
 from typing import (
+    AsyncIterator,
+    ContextManager,
     List,
+    Literal,
     Optional,
+    Tuple,
     Sequence,
     Dict,
     Any,
@@ -70,7 +110,20 @@ class TokenInfo(BaseModel):
 class EmojiRequest(BaseModel):
     prompt: str
     req_id: str
-    llm: str = Field(default="openai", description="大模型")
+    llm: str = Field(
+        default="openai", description="大模型, none 表示不调用大模型直接按相似度选取"
+    )
+    no_cache: bool = Field(default=False, description="跳过响应缓存")
+    response_mode: Literal["base64", "url"] = Field(
+        default="base64",
+        description="表情包返回方式, url 时只返回文件地址, 通过 /v1/emoji/file 获取",
+    )
+    size: Optional[int] = Field(
+        default=None, description="缩略图最长边像素, 需为配置中允许的尺寸"
+    )
+    format: Optional[Literal["webp", "jpeg", "png"]] = Field(
+        default=None, description="图片格式, 为空时保持原格式"
+    )
 
     model_config = {
         "json_schema_extra": {
@@ -79,6 +132,24 @@ class EmojiRequest(BaseModel):
     }
 
 
+class EmojiBatchRequest(BaseModel):
+    items: List[EmojiRequest]
+    max_concurrency: Optional[int] = Field(
+        default=None, description="并发数, 不超过配置上限"
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "items": [{"prompt": "xxxx", "req_id": "xxxx", "llm": "xxx"}],
+                    "max_concurrency": 8,
+                }
+            ]
+        }
+    }
+
+
 class EmojiInfo(BaseModel):
     filename: str
     content: str
@@ -86,14 +157,35 @@ class EmojiInfo(BaseModel):
 
 class EmojiDetail(BaseModel):
     download_link: Optional[str] = None
-    base64: str
+    base64: Optional[str] = None
+    url: Optional[str] = None
+
+
+class EmojiFile(BaseModel):
+    content: bytes
+    etag: str
+    media_type: str
 
 
 class EmojiResponse(BaseModel):
-    run_id: UUID
+    run_id: UUID = Field(
+        description="生成该结果的 chain run_id, 缓存命中与合并执行的请求共用生成结果的"
+        " run_id, 其 LangSmith 记录与反馈均归属发起执行的请求"
+    )
     emojiinfo: EmojiInfo
     emojidetail: EmojiDetail
     token_info: TokenInfo
+    cache_hit: bool = Field(default=False, description="是否命中缓存")
+    coalesced: bool = Field(
+        default=False, description="是否与相同的并发请求合并执行"
+    )
+
+
+class EmojiBatchItem(BaseModel):
+    req_id: str
+    code: int = 0
+    msg: str = "success"
+    data: Optional[EmojiResponse] = None
 
 
 """
@@ -159,6 +251,7 @@ def fix_json(json_str: str) -> dict:
     return json.loads(fixed_json_str)
 
 
+@singleton
 class EmojiService:
 
     @inject
@@ -168,23 +261,41 @@ class EmojiService:
         vector_component: VectorStoreComponent,
         trace_component: TraceComponent,
         minio_component: MinioComponent,
+        image_component: ImageComponent,
+        tokenizer_component: TokenizerComponent,
+        executor_component: ExecutorComponent,
         settings: Settings,
     ) -> None:
         self.settings = settings
+        self.executors = executor_component
         self.llm_service = llm_component
         self.vector_service = vector_component
         self.trace_service = trace_component
         self.minio_service = minio_component
-        self.chain = self.create_chain(
-            self.llm_service.llm,
-            self.get_vector_retriever(),
+        self.image_service = image_component
+        self.tokenizer = tokenizer_component
+        self.response_cache = EmojiResponseCache(settings.emoji.cache)
+        self.hedge_policy = HedgePolicy(settings.emoji.hedge, settings.llm.mode)
+        self.admission = AdmissionController(settings.emoji.admission)
+        self.singleflight: SingleFlight[tuple] = SingleFlight()
+        self.semantic_cache = EmojiSemanticCache(
+            settings.emoji.semantic_cache, local_data_path / "semantic_cache"
         )
-
-    def num_tokens_from_string(self, string: str) -> int:
-        """Returns the number of tokens in a text string."""
-        encoding = tiktoken.encoding_for_model(self.llm_service.modelname)
-        num_tokens = len(encoding.encode(string))
-        return num_tokens
+        fast_path = settings.emoji.fast_path
+        self.chain = RunnableBranch(
+            (
+                RunnableLambda(lambda x: x.get("llm") == "none").with_config(
+                    run_name="CheckFastPath"
+                ),
+                self.create_fast_chain(
+                    self.get_vector_retriever(search_kwargs={"k": fast_path.k})
+                ),
+            ),
+            self.create_chain(
+                self.llm_service.llm,
+                self.get_vector_retriever(),
+            ),
+        ).with_config(run_name="EmojiRouter")
 
     """
     防止返回不是json格式，增加校验处理
@@ -203,63 +314,578 @@ class EmojiService:
             logger.exception(e)
             return fix_json(json_str)
 
+    async def lookup_cache(
+        self, body: EmojiRequest, key: tuple
+    ) -> Tuple[EmojiResponse | None, List[float] | None]:
+        """依次查询精确缓存与语义缓存, 未命中时返回已计算的prompt向量供后续写入"""
+        if body.no_cache:
+            return None, None
+
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            logger.info(f"response cache hit, req_id: {body.req_id}")
+            # 命中缓存不产生任何调用, token 统计清零
+            return (
+                cached.model_copy(
+                    update={"token_info": TokenInfo(model=body.llm), "cache_hit": True}
+                ),
+                None,
+            )
+
+        if not self.semantic_cache.enabled:
+            return None, None
+        usage = embedding_usage_var.get()
+        try:
+            prompt_vector = await self.vector_service.embedcom.embedding.aembed_query(
+                body.prompt
+            )
+        except Exception as e:
+            # embedding 失败时跳过语义缓存, 检索阶段会再次尝试
+            logger.warning(f"semantic cache lookup skipped: {e}")
+            return None, None
+        if not prompt_vector:
+            return None, None
+        hit = self.semantic_cache.lookup(prompt_vector, body.llm)
+        if hit is None:
+            return None, prompt_vector
+
+        entry, score = hit
+        logger.info(
+            f"semantic cache hit, req_id: {body.req_id}, "
+            f"prompt: {entry.prompt}, score: {score:.4f}"
+        )
+        emojiinfo = EmojiInfo(**entry.emojiinfo)
+        resobj = EmojiResponse(
+            run_id=entry.run_id,
+            emojiinfo=emojiinfo,
+            emojidetail=await self.aget_file_desc(emojiinfo, body),
+            # 语义缓存命中时只产生查询向量的 embedding 用量
+            token_info=self.token_info(
+                body.llm, [], usage.total_tokens if usage is not None else 0
+            ),
+            cache_hit=True,
+        )
+        self.response_cache.set(key, resobj)
+        return resobj, None
+
+    def prefetched_prompt(
+        self, body: EmojiRequest, prompt_vector: List[float] | None
+    ) -> ContextManager[None]:
+        """语义缓存未命中时, 检索阶段复用查询缓存时计算的prompt向量"""
+        return prefetched_embeddings(
+            {body.prompt: prompt_vector} if prompt_vector else {}
+        )
+
+    def request_key(self, body: EmojiRequest) -> tuple:
+        return cache_key(
+            body.prompt, body.llm, body.response_mode, body.size, body.format
+        )
+
+    def chain_config(
+        self, body: EmojiRequest, callbacks: List[Any], llm: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return {
+            "metadata": {
+                "req_id": body.req_id,
+            },
+            "configurable": {"llm": llm or body.llm},
+            "callbacks": callbacks,
+        }
+
+    def token_handler(self, llm: str) -> OpenAICallbackHandler | ZhipuAICallbackHandler:
+        return OpenAICallbackHandler() if llm == "openai" else ZhipuAICallbackHandler()
+
+    def token_info(
+        self, llm: str, cbs: Sequence[Any], embedding_tokens: int = 0
+    ) -> TokenInfo:
+        """汇总一次请求内所有大模型调用的 token 与费用"""
+        return TokenInfo(
+            model=llm,
+            total_tokens=sum(cb.total_tokens for cb in cbs) + embedding_tokens,
+            prompt_tokens=sum(cb.prompt_tokens for cb in cbs),
+            completion_tokens=sum(cb.completion_tokens for cb in cbs),
+            embedding_tokens=embedding_tokens,
+            successful_requests=sum(cb.successful_requests for cb in cbs),
+            total_cost=sum(cb.total_cost for cb in cbs),
+        )
+
+    async def ainvoke_attempt(
+        self, body: EmojiRequest, llm: str, cb: Any, read_runid: Any
+    ) -> dict:
+        async with self.admission.admit(llm):
+            start = time.perf_counter()
+            result = await self.chain.ainvoke(
+                input={"prompt": body.prompt, "llm": llm},
+                config=self.chain_config(body, [cb, read_runid], llm=llm),
+            )
+        EmojiInfo(**result)  # 校验输出, 不合法的结果视为失败
+        self.hedge_policy.latency.observe(llm, time.perf_counter() - start)
+        return result
+
+    async def ainvoke_chain(
+        self, body: EmojiRequest
+    ) -> Tuple[dict, str, List[Any], UUID | None]:
+        """
+        执行 chain, 返回 (结果, 实际采用的大模型, 所有token回调, run_id)
+        llm.mode 为 all 时, 主模型超过延迟阈值未返回(或失败)则向第二个模型发起对冲请求,
+        采用最先返回的合法结果并取消另一个请求
+        """
+        self.hedge_policy.requests += 1
+        attempts = [(body.llm, self.token_handler(body.llm), ReadRunIdAsyncHandler())]
+        hedge_llm = self.hedge_policy.hedge_target(body.llm)
+        if hedge_llm is None:
+            llm, cb, read_runid = attempts[0]
+            result = await self.ainvoke_attempt(body, llm, cb, read_runid)
+            return result, llm, [cb], read_runid.get_runid()
+
+        tasks = {asyncio.create_task(self.ainvoke_attempt(body, *attempts[0])): 0}
+        pending = set(tasks)
+        delay = self.hedge_policy.delay(body.llm)
+        # attempt 序号 -> 异常, 全部失败时优先抛出主请求的异常
+        errors: Dict[int, BaseException] = {}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=None if len(attempts) > 1 else delay,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    error = task.exception()
+                    if error is not None:
+                        # 主请求过载时快速拒绝, 不再对冲; 对冲请求被拒绝与其他失败一样,
+                        # 继续等待仍在执行的主请求
+                        if isinstance(error, AdmissionRejected) and tasks[task] == 0:
+                            raise error
+                        errors[tasks[task]] = error
+                        continue
+                    llm, _, read_runid = attempts[tasks[task]]
+                    if tasks[task] > 0:
+                        self.hedge_policy.hedge_wins += 1
+                    logger.info(f"chain answered by {llm}, req_id: {body.req_id}")
+                    return (
+                        task.result(),
+                        llm,
+                        [cb for _, cb, _ in attempts],
+                        read_runid.get_runid(),
+                    )
+
+                if len(attempts) == 1:
+                    if not self.admission.has_capacity(hedge_llm):
+                        if pending:
+                            continue
+                        raise errors[0]
+                    logger.info(
+                        f"hedge {body.llm} -> {hedge_llm} after {delay:.2f}s, "
+                        f"req_id: {body.req_id}"
+                    )
+                    self.hedge_policy.hedged += 1
+                    attempts.append(
+                        (hedge_llm, self.token_handler(hedge_llm), ReadRunIdAsyncHandler())
+                    )
+                    task = asyncio.create_task(self.ainvoke_attempt(body, *attempts[1]))
+                    tasks[task] = 1
+                    pending.add(task)
+            raise errors.get(0) or errors[1]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def save_response(
+        self,
+        body: EmojiRequest,
+        key: tuple,
+        resobj: EmojiResponse,
+        prompt_vector: List[float] | None,
+    ) -> None:
+        self.response_cache.set(key, resobj)
+        if prompt_vector:
+            await self.add_semantic_cache(body, prompt_vector, resobj)
+
     async def get_emoji(self, body: EmojiRequest) -> EmojiResponse | None:
         logger.info(body)
-        token_callback = (
-            get_openai_callback if body.llm == "openai" else get_zhipuai_callback
+        self.tokenizer.check_prompt(body.prompt, body.llm)
+        self.image_service.check_variant(body.size, body.format)
+        key = self.request_key(body)
+        with get_embedding_usage() as embedding_usage:
+            cached, prompt_vector = await self.lookup_cache(body, key)
+            if cached is not None:
+                return cached
+
+            # 相同 prompt 与 llm 的并发请求合并为一次 chain 执行
+            async def lead() -> Tuple[str, Tuple[dict, str, List[Any], UUID | None]]:
+                with self.prefetched_prompt(body, prompt_vector):
+                    return body.req_id, await self.ainvoke_chain(body)
+
+            (leader_req_id, (result, llm, cbs, run_id)), shared = (
+                await self.singleflight.do(key, lead)
+            )
+        logger.info(result)
+        if shared:
+            # chain 的 metadata 只记录发起执行的 req_id, 合并的 req_id 只写入日志
+            logger.info(
+                f"coalesced req_id: {body.req_id} into req_id: {leader_req_id}, "
+                f"run_id: {run_id}"
+            )
+        emojiinfo = EmojiInfo(**result)
+
+        resobj = EmojiResponse(
+            run_id=run_id,
+            emojiinfo=emojiinfo,
+            emojidetail=await self.aget_file_desc(emojiinfo, body),
+            # 合并的请求不产生额外调用, 消耗只计入发起执行的请求
+            token_info=(
+                TokenInfo(model=llm)
+                if shared
+                else self.token_info(llm, cbs, embedding_usage.total_tokens)
+            ),
+            coalesced=shared,
         )
-        with token_callback() as cb:
-            read_runid = ReadRunIdAsyncHandler()  # 读取runid回调
-            result = await self.chain.ainvoke(
-                input={"prompt": body.prompt, "llm": body.llm},
-                config={
-                    "metadata": {
-                        "req_id": body.req_id,
-                    },
-                    "configurable": {"llm": body.llm},
-                    "callbacks": [cb, read_runid],
-                },
+        if not shared:
+            await self.save_response(body, key, resobj, prompt_vector)
+        return resobj
+
+    async def stream_emoji(
+        self, body: EmojiRequest
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        流式返回 (event, data):
+        candidates 检索到的候选表情包 -> emojiinfo 大模型选取结果 -> emojidetail 图片 -> done
+        """
+        logger.info(body)
+        key = self.request_key(body)
+        with get_embedding_usage() as embedding_usage:
+            cached, prompt_vector = await self.lookup_cache(body, key)
+            if cached is not None:
+                yield "emojiinfo", cached.emojiinfo.model_dump()
+                yield "emojidetail", cached.emojidetail.model_dump()
+                yield "done", cached.model_dump(
+                    mode="json", include={"run_id", "token_info", "cache_hit"}
+                )
+                return
+
+            token_callback = (
+                get_openai_callback if body.llm == "openai" else get_zhipuai_callback
             )
+            with token_callback() as cb:
+                read_runid = ReadRunIdAsyncHandler()  # 读取runid回调
+                emojiinfo = None
+                async with self.admission.admit(body.llm):
+                    with self.prefetched_prompt(body, prompt_vector):
+                        async for event in self.chain.astream_events(
+                            input={"prompt": body.prompt, "llm": body.llm},
+                            config=self.chain_config(body, [cb, read_runid]),
+                            version="v1",
+                        ):
+                            if event["event"] != "on_chain_end":
+                                continue
+                            output = event["data"].get("output")
+                            # RetrievalChain 内层输出文档列表, 外层输出格式化后的字符串
+                            if event["name"] == "RetrievalChain" and isinstance(
+                                output, list
+                            ):
+                                yield "candidates", {
+                                    "emojis": [
+                                        EmojiInfo(
+                                            filename=doc.metadata.get("filename"),
+                                            content=doc.page_content,
+                                        ).model_dump()
+                                        for doc in output
+                                    ]
+                                }
+                            elif event["name"] == "ResponseHandle" and output:
+                                emojiinfo = EmojiInfo(**output)
+                                yield "emojiinfo", emojiinfo.model_dump()
+
+                if emojiinfo is None:
+                    raise ValueError("emoji chain finished without a valid response")
+
+                emojidetail = await self.aget_file_desc(emojiinfo, body)
+                yield "emojidetail", emojidetail.model_dump()
+
+                resobj = EmojiResponse(
+                    run_id=read_runid.get_runid(),
+                    emojiinfo=emojiinfo,
+                    emojidetail=emojidetail,
+                    token_info=self.token_info(
+                        body.llm, [cb], embedding_usage.total_tokens
+                    ),
+                )
+                await self.save_response(body, key, resobj, prompt_vector)
+                yield "done", resobj.model_dump(
+                    mode="json", include={"run_id", "token_info", "cache_hit"}
+                )
+
+    async def get_emoji_batch(self, body: EmojiBatchRequest) -> List[EmojiBatchItem]:
+        batch_settings = self.settings.emoji.batch
+        if len(body.items) > batch_settings.max_items:
+            raise ValueError(
+                f"too many items: {len(body.items)}, max: {batch_settings.max_items}"
+            )
+        max_concurrency = min(
+            body.max_concurrency or batch_settings.max_concurrency,
+            batch_settings.max_concurrency,
+        )
 
-            logger.info(result)
-            emojiinfo = EmojiInfo(**result)
-
-            embed_tokens = self.vector_service.embedcom.total_tokens
-            tokeninfo = TokenInfo(
-                model=body.llm,
-                total_tokens=cb.total_tokens + int(embed_tokens / 10),
-                prompt_tokens=cb.prompt_tokens,
-                completion_tokens=cb.completion_tokens,
-                embedding_tokens=int(embed_tokens / 10),
-                successful_requests=cb.successful_requests,
-                total_cost=cb.total_cost,
+        # 各条 prompt 按所用 llm 的编码在线程中计数, 超长的条目单独返回错误
+        prompt_tokens = [0] * len(body.items)
+        by_llm: Dict[str, List[int]] = {}
+        for i, item in enumerate(body.items):
+            by_llm.setdefault(item.llm, []).append(i)
+        for llm, indexes in by_llm.items():
+            counts = await self.tokenizer.acount_batch(
+                [body.items[i].prompt for i in indexes], llm
+            )
+            for i, count in zip(indexes, counts):
+                prompt_tokens[i] = count
+        self.tokenizer.check_budget(prompt_tokens, batch_settings.max_prompt_tokens)
+
+        results: List[EmojiBatchItem | None] = [None] * len(body.items)
+        keys = [self.request_key(item) for item in body.items]
+        pending: List[int] = []
+        max_prompt_tokens = self.tokenizer.max_prompt_tokens
+        for i, item in enumerate(body.items):
+            if max_prompt_tokens and prompt_tokens[i] > max_prompt_tokens:
+                results[i] = EmojiBatchItem(
+                    req_id=item.req_id,
+                    code=PromptTooLongErrorCode,
+                    msg=str(PromptTooLong(prompt_tokens[i], max_prompt_tokens)),
+                )
+                continue
+            try:
+                self.image_service.check_variant(item.size, item.format)
+            except ValueError as e:
+                results[i] = EmojiBatchItem(
+                    req_id=item.req_id, code=SystemErrorCode, msg=str(e)
+                )
+                continue
+            cached = None if item.no_cache else self.response_cache.get(keys[i])
+            if cached is not None:
+                results[i] = EmojiBatchItem(
+                    req_id=item.req_id,
+                    data=cached.model_copy(
+                        update={
+                            "token_info": TokenInfo(model=item.llm),
+                            "cache_hit": True,
+                        }
+                    ),
+                )
+            else:
+                pending.append(i)
+        if not pending:
+            return results
+        # 队列已满时整批直接拒绝, 与单条请求一致返回 429
+        for llm in dict.fromkeys(body.items[i].llm for i in pending):
+            self.admission.precheck(llm)
+
+        # 所有prompt合并为一次 embedding 请求, 检索时直接复用
+        prompts = list(dict.fromkeys(body.items[i].prompt for i in pending))
+        embedcom = self.vector_service.embedcom
+        embedding = embedcom.embedding
+        # 命中 embedding 缓存的 prompt 不产生用量, 不参与分摊
+        uncached = set(prompts)
+        if embedcom.cache is not None:
+            cached = await embedcom.cache.aget_many(prompts)
+            uncached = {p for p, v in zip(prompts, cached) if v is None}
+        with get_embedding_usage() as prefetch_usage:
+            try:
+                vectors = await embedding.aembed_documents(prompts)
+            except EmbeddingBatchError as e:
+                # 部分失败时保留成功的向量, 失败的 prompt 在检索阶段重新 embedding
+                logger.warning(e)
+                vectors = e.vectors
+            except Exception as e:
+                # 合并请求失败时退化为检索阶段逐条 embedding
+                logger.exception(e)
+                vectors = None
+        prefetched = (
+            {p: v for p, v in zip(prompts, vectors) if v is not None} if vectors else {}
+        )
+        # 合并请求的 embedding 用量按 prompt 长度分摊到各条请求
+        charged = [i for i in pending if body.items[i].prompt in uncached]
+        total_chars = sum(len(body.items[i].prompt) for i in charged) or 1
+        embed_tokens = {i: 0 for i in pending}
+        for i in charged:
+            embed_tokens[i] = (
+                prefetch_usage.total_tokens * len(body.items[i].prompt) // total_chars
             )
 
-            resobj = EmojiResponse(
-                run_id=read_runid.get_runid(),
-                emojiinfo=emojiinfo,
-                emojidetail=self.get_file_desc(emojiinfo),
-                token_info=tokeninfo,
+        if self.semantic_cache.enabled:
+            for i in list(pending):
+                item = body.items[i]
+                vector = prefetched.get(item.prompt)
+                hit = (
+                    self.semantic_cache.lookup(vector, item.llm)
+                    if vector and not item.no_cache
+                    else None
+                )
+                if hit is None:
+                    continue
+                entry, _ = hit
+                try:
+                    emojiinfo = EmojiInfo(**entry.emojiinfo)
+                    results[i] = EmojiBatchItem(
+                        req_id=item.req_id,
+                        data=EmojiResponse(
+                            run_id=entry.run_id,
+                            emojiinfo=emojiinfo,
+                            emojidetail=await self.aget_file_desc(emojiinfo, item),
+                            token_info=self.token_info(item.llm, [], embed_tokens[i]),
+                            cache_hit=True,
+                        ),
+                    )
+                    pending.remove(i)
+                except Exception as e:
+                    logger.exception(e)
+
+        handlers = [
+            (self.token_handler(body.items[i].llm), ReadRunIdAsyncHandler())
+            for i in pending
+        ]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def ainvoke_item(i: int, callbacks: List[Any]) -> Dict[str, Any]:
+            item = body.items[i]
+            # 每条请求占用所用 llm 的一个准入名额, 与单条请求共享并发上限
+            async with semaphore, self.admission.admit(item.llm):
+                return await self.chain.ainvoke(
+                    {"prompt": item.prompt, "llm": item.llm},
+                    config=self.chain_config(item, callbacks),
+                )
+
+        with prefetched_embeddings(prefetched), get_embedding_usage() as chain_usage:
+            outputs = await asyncio.gather(
+                *(
+                    ainvoke_item(i, [cb, read_runid])
+                    for i, (cb, read_runid) in zip(pending, handlers)
+                ),
+                return_exceptions=True,
             )
-            return resobj
 
-    def get_file_desc(self, info: EmojiInfo) -> EmojiDetail:
+        for i, (cb, read_runid), output in zip(pending, handlers, outputs):
+            item = body.items[i]
+            try:
+                if isinstance(output, Exception):
+                    raise output
+                emojiinfo = EmojiInfo(**output)
+                resobj = EmojiResponse(
+                    run_id=read_runid.get_runid(),
+                    emojiinfo=emojiinfo,
+                    emojidetail=await self.aget_file_desc(emojiinfo, item),
+                    token_info=self.token_info(
+                        item.llm,
+                        [cb],
+                        embed_tokens[i] + chain_usage.total_tokens // len(pending),
+                    ),
+                )
+                vector = prefetched.get(item.prompt)
+                await self.save_response(
+                    item, keys[i], resobj, vector if self.semantic_cache.enabled else None
+                )
+                results[i] = EmojiBatchItem(req_id=item.req_id, data=resobj)
+            except AdmissionRejected as e:
+                logger.warning(f"batch item rejected, req_id: {item.req_id}: {e}")
+                results[i] = EmojiBatchItem(
+                    req_id=item.req_id, code=e.code, msg=str(e)
+                )
+            except Exception as e:
+                logger.error(f"batch item failed, req_id: {item.req_id}, error: {e}")
+                results[i] = EmojiBatchItem(
+                    req_id=item.req_id, code=SystemErrorCode, msg=str(e)
+                )
+        return results
+
+    async def add_semantic_cache(
+        self, body: EmojiRequest, vector: List[float], resobj: EmojiResponse
+    ) -> None:
+        need_persist = self.semantic_cache.add(
+            prompt=body.prompt,
+            llm=body.llm,
+            vector=vector,
+            emojiinfo=resobj.emojiinfo.model_dump(),
+            run_id=str(resobj.run_id) if resobj.run_id else None,
+        )
+        if need_persist:
+            await self.executors.run("storage", self.semantic_cache.save)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "response_cache": self.response_cache.stats(),
+            "semantic_cache": self.semantic_cache.stats(),
+            "hedge": self.hedge_policy.stats(),
+            "admission": self.admission.stats(),
+            "singleflight": self.singleflight.stats(),
+            "image_cache": self.image_service.stats(),
+            "embedding_cache": self.vector_service.embedcom.stats(),
+            "executors": self.executors.stats(),
+            "minio": (
+                self.minio_service.stats()
+                if self.settings.dataset.mode == "minio"
+                else None
+            ),
+        }
+
+    async def aget_file_desc(self, info: EmojiInfo, body: EmojiRequest) -> EmojiDetail:
         logger.info(self.settings.dataset.mode)
+        if body.response_mode == "url":
+            file_settings = self.settings.emoji.file
+            url = f"{file_settings.base_url.rstrip('/')}/{quote(info.filename)}"
+            query = {
+                k: v for k, v in (("size", body.size), ("format", body.format)) if v
+            }
+            if query:
+                url = f"{url}?{urlencode(query)}"
+            if self.settings.dataset.mode == "minio" and file_settings.presigned:
+                return EmojiDetail(
+                    url=url,
+                    download_link=await self.minio_service.aget_download_link(
+                        info.filename
+                    ),
+                )
+            return EmojiDetail(url=url)
         if self.settings.dataset.mode == "local":
-            emoji_file = (
-                local_data_path / self.settings.dataset.name / "emo" / info.filename
+            file_base64 = await self.image_service.aget_base64(
+                info.filename, body.size, body.format
             )
-            with open(emoji_file, "rb") as image_file:
-                encoded_string = base64.b64encode(image_file.read())
-                file_base64 = encoded_string.decode("utf-8")
-                return EmojiDetail(base64=file_base64)
+            if file_base64 is None:
+                raise FileNotFoundError(f"emoji file {info.filename} not found")
+            return EmojiDetail(base64=file_base64)
         elif self.settings.dataset.mode == "minio":
-            file_base64 = self.minio_service.get_file_base64(info.filename)
-            file_download_link = self.minio_service.get_download_link(info.filename)
+            # 图片与下载链接并发获取
+            file_base64, file_download_link = await asyncio.gather(
+                self.image_service.aget_base64(info.filename, body.size, body.format),
+                self.minio_service.aget_download_link(info.filename),
+            )
             return EmojiDetail(base64=file_base64, download_link=file_download_link)
 
-    def get_vector_retriever(self):
-        base_vector = self.vector_service.vector_store.as_retriever().configurable_alternatives(
+    async def aget_emoji_file(
+        self, filename: str, size: Optional[int] = None, fmt: Optional[str] = None
+    ) -> EmojiFile | None:
+        """Raw bytes of an emoji image with its MD5 ETag, None when it does not exist"""
+        if not filename or Path(filename).name != filename:
+            return None
+        if is_variant(size, fmt):
+            content = await self.image_service.aget_variant(filename, size, fmt)
+            filename = variant_name(filename, size, fmt)
+        else:
+            content = await self.image_service.aget_bytes(filename)
+        if content is None:
+            return None
+        media_type = (
+            variant_media_type(fmt)
+            if fmt
+            else mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        )
+        return EmojiFile(
+            content=bytes(content),
+            etag=f'"{self.image_service.get_md5(filename, content)}"',
+            media_type=media_type,
+        )
+
+    def get_vector_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None):
+        base_vector = self.vector_service.vector_store.as_retriever(
+            search_kwargs=search_kwargs or {}
+        ).configurable_alternatives(
             # This gives this field an id
             # When configuring the end runnable, we can then use this id to configure this field
             ConfigurableField(id="vectordb"),
@@ -287,6 +913,32 @@ class EmojiService:
             formatted_docs.append(doc_string)
         return "\n".join(formatted_docs)
 
+    def select_emoji(self, inputs: Dict[str, Any]) -> dict:
+        """不经过大模型, 直接选取(重排后)相似度最高的表情包"""
+        docs = inputs["docs"]
+        if not docs:
+            raise ValueError("no emoji retrieved for the prompt")
+        fast_path = self.settings.emoji.fast_path
+        if fast_path.rerank == "lexical":
+            docs = lexical_rerank(inputs["prompt"], docs, fast_path.lexical_weight)
+        return {
+            "filename": docs[0].metadata.get("filename"),
+            "content": docs[0].page_content,
+        }
+
+    def create_fast_chain(self, retriever: BaseRetriever) -> Runnable:
+        return (
+            RunnableMap(
+                {
+                    "docs": self.create_retriever_chain(retriever),
+                    "prompt": RunnableLambda(itemgetter("prompt")).with_config(
+                        run_name="Itemgetter:prompt"
+                    ),
+                }
+            )
+            | RunnableLambda(self.select_emoji).with_config(run_name="ResponseHandle")
+        ).with_config(run_name="FastEmojiChain")
+
     def create_chain(
         self,
         llm: BaseLanguageModel,
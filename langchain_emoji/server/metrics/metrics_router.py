@@ -0,0 +1,30 @@
+import logging
+from fastapi import APIRouter, Depends, Request
+from typing import Any, Dict
+from langchain_emoji.server.utils.auth import authenticated
+from langchain_emoji.server.emoji.emoji_service import EmojiService
+from langchain_emoji.server.utils.model import (
+    RestfulModel,
+    SystemErrorCode,
+)
+
+logger = logging.getLogger(__name__)
+
+metrics_router = APIRouter(prefix="/v1", dependencies=[Depends(authenticated)])
+
+
+@metrics_router.get(
+    "/metrics",
+    response_model=RestfulModel[Dict[str, Any] | None],
+    tags=["Metrics"],
+)
+async def get_metrics(request: Request) -> RestfulModel:
+    """
+    Runtime metrics of caches and pipelines
+    """
+    service = request.state.injector.get(EmojiService)
+    try:
+        return RestfulModel(data=service.metrics())
+    except Exception as e:
+        logger.exception(e)
+        return RestfulModel(code=SystemErrorCode, msg=str(e), data=None)
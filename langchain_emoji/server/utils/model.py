@@ -20,3 +20,15 @@ Server Error Code List
 system:     10000-10099
 """
 SystemErrorCode = 10001
+
+"""
+emoji:      10100-10199
+"""
+TooManyRequestsErrorCode = 10101
+ServiceUnavailableErrorCode = 10102
+PromptTooLongErrorCode = 10103
+
+"""
+vectorstore: 10200-10299
+"""
+PayloadTooLargeErrorCode = 10201
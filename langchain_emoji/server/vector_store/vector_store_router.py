@@ -1,15 +1,20 @@
+import json
 import logging
-from fastapi import APIRouter, Depends, Request
-from typing import Any, List
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import JSONResponse
+from typing import Any, List, Optional, Tuple
+from pydantic import BaseModel, Field, ValidationError
 from langchain_emoji.server.utils.auth import authenticated
 from langchain_emoji.server.vector_store.vector_store_server import (
     VectorStoreService,
     EmojiFragment,
+    BulkEmojiItem,
+    BulkEmojiResult,
 )
 from langchain_emoji.server.utils.model import (
     RestfulModel,
     SystemErrorCode,
+    PayloadTooLargeErrorCode,
 )
 
 logger = logging.getLogger(__name__)
@@ -58,14 +63,14 @@ class DelEmojiBody(BaseModel):
     response_model=RestfulModel[Any | None],
     tags=["VectorStore"],
 )
-def add_emoji(request: Request, body: AddEmojiBody) -> RestfulModel:
+async def add_emoji(request: Request, body: AddEmojiBody) -> RestfulModel:
     """
     New article into vector database
     """
     service = request.state.injector.get(VectorStoreService)
     try:
         return RestfulModel(
-            data=service.add_emoji(
+            data=await service.add_emoji(
                 content=body.content,
                 filename=body.filename,
             )
@@ -75,19 +80,130 @@ def add_emoji(request: Request, body: AddEmojiBody) -> RestfulModel:
         return RestfulModel(code=SystemErrorCode, msg=str(e), data=None)
 
 
+class BulkBodyTooLarge(ValueError):
+    """Raised when a bulk body exceeds the byte or record limit"""
+
+
+async def read_bulk_body(request: Request, max_bytes: int) -> bytes:
+    """Read the request body, stop as soon as it grows over `max_bytes`"""
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > max_bytes:
+        # 声明的长度已超限, 不读取请求体
+        raise BulkBodyTooLarge(f"body of {length} bytes exceeds {max_bytes} bytes")
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise BulkBodyTooLarge(f"body exceeds {max_bytes} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def parse_bulk_body(
+    raw: bytes, max_items: int = 0
+) -> Tuple[List[Optional[BulkEmojiItem]], dict]:
+    """Parse a JSON array or JSONL body into items, None where a record is invalid.
+
+    Returns the items and the errors of the invalid records keyed by position.
+    JSONL bodies with more than `max_items` lines are rejected before any line is
+    parsed.
+    """
+    text = raw.decode("utf-8-sig").strip()
+    errors = {}
+    if text.startswith("["):
+        records = json.loads(text)
+        check_bulk_items(len(records), max_items)
+    else:
+        lines = [line for line in text.splitlines() if line.strip()]
+        check_bulk_items(len(lines), max_items)
+        records = []
+        for i, line in enumerate(lines):
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                records.append(None)
+                errors[i] = f"invalid json: {e}"
+
+    items: List[Optional[BulkEmojiItem]] = []
+    for i, record in enumerate(records):
+        if i in errors:
+            items.append(None)
+            continue
+        try:
+            items.append(BulkEmojiItem.model_validate(record))
+        except ValidationError as e:
+            items.append(None)
+            errors[i] = f"invalid record: {e}"
+    return items, errors
+
+
+def check_bulk_items(count: int, max_items: int) -> None:
+    if max_items and count > max_items:
+        raise BulkBodyTooLarge(f"{count} records exceed the limit of {max_items}")
+
+
+@vector_store_router.post(
+    "/vector_store/bulk_add_emoji",
+    response_model=RestfulModel[List[BulkEmojiResult] | None],
+    responses={413: {"description": "Body over the byte or record limit"}},
+    tags=["VectorStore"],
+)
+async def bulk_add_emoji(
+    request: Request,
+    batch_size: Optional[int] = Query(
+        default=None, ge=1, description="每批 embedding 与写入的记录数"
+    ),
+) -> RestfulModel | JSONResponse:
+    """
+    Bulk insert emojis, the body is a JSON array or JSONL of {content, filename}
+    """
+    service = request.state.injector.get(VectorStoreService)
+    try:
+        items, errors = parse_bulk_body(
+            await read_bulk_body(request, service.bulk_max_bytes),
+            service.bulk_max_items,
+        )
+
+        valid = [i for i, item in enumerate(items) if item is not None]
+        added = await service.bulk_add_emoji(
+            [items[i] for i in valid], batch_size=batch_size
+        )
+        results = [BulkEmojiResult(index=i, error=e) for i, e in errors.items()]
+        for i, result in zip(valid, added):
+            result.index = i
+            results.append(result)
+        results.sort(key=lambda result: result.index)
+        failed = sum(result.error is not None for result in results)
+        logger.info(f"bulk add emoji: {len(results)} records, {failed} failed")
+        return RestfulModel(data=results)
+    except BulkBodyTooLarge as e:
+        logger.warning(e)
+        return JSONResponse(
+            status_code=413,
+            content=RestfulModel(
+                code=PayloadTooLargeErrorCode, msg=str(e), data=None
+            ).model_dump(),
+        )
+    except Exception as e:
+        logger.exception(e)
+        return RestfulModel(code=SystemErrorCode, msg=str(e), data=None)
+
+
 @vector_store_router.post(
     "/vector_store/rag_emoji",
     response_model=RestfulModel[List[EmojiFragment] | None],
     tags=["VectorStore"],
 )
-def rag_emoji(request: Request, body: RagEmojiBody) -> RestfulModel:
+async def rag_emoji(request: Request, body: RagEmojiBody) -> RestfulModel:
     """
     Recall articles from vector database
     """
     service = request.state.injector.get(VectorStoreService)
     try:
         return RestfulModel(
-            data=service.rag_emoji(prompt=body.prompt, filenames=body.filenames)
+            data=await service.rag_emoji(
+                prompt=body.prompt, filenames=body.filenames
+            )
         )
     except Exception as e:
         logger.exception(e)
@@ -99,14 +215,16 @@ def rag_emoji(request: Request, body: RagEmojiBody) -> RestfulModel:
     response_model=RestfulModel[List[dict] | None],
     tags=["VectorStore"],
 )
-def del_emoji(request: Request, body: DelEmojiBody) -> RestfulModel:
+async def del_emoji(request: Request, body: DelEmojiBody) -> RestfulModel:
     """
     Delete articles from vector database
     """
     service = request.state.injector.get(VectorStoreService)
     try:
         return RestfulModel(
-            data=service.del_emoji(vdb_ids=body.vdb_ids, filenames=body.filenames)
+            data=await service.del_emoji(
+                vdb_ids=body.vdb_ids, filenames=body.filenames
+            )
         )
     except Exception as e:
         logger.exception(e)
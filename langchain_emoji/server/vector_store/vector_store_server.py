@@ -1,5 +1,13 @@
+from contextlib import nullcontext
 from injector import inject, singleton
 from langchain_emoji.components.vector_store import VectorStoreComponent
+from langchain_emoji.components.embedding.embedding_error import EmbeddingBatchError
+from langchain_emoji.components.embedding.embedding_proxy import (
+    prefetched_embeddings,
+)
+from langchain_emoji.components.image.image_component import ImageComponent
+from langchain_emoji.components.executor.executor_component import ExecutorComponent
+from langchain_emoji.settings.settings import Settings
 from pydantic import BaseModel, Field
 import logging
 from typing import List, Optional
@@ -12,16 +20,36 @@ class EmojiFragment(BaseModel):
     filename: Optional[str] = Field(default=-1, description="表情文件名")
 
 
+class BulkEmojiItem(BaseModel):
+    content: str = Field(description="表情描述")
+    filename: str = Field(description="表情文件名")
+
+
+class BulkEmojiResult(BaseModel):
+    index: int = Field(description="记录在请求中的序号")
+    filename: Optional[str] = Field(default=None, description="表情文件名")
+    vdb_id: Optional[str] = Field(default=None, description="向量数据库ID")
+    error: Optional[str] = Field(default=None, description="失败原因, 成功时为空")
+
+
 @singleton
 class VectorStoreService:
     @inject
     def __init__(
         self,
         vector_store: VectorStoreComponent,
+        image_component: ImageComponent,
+        executor_component: ExecutorComponent,
+        settings: Settings,
     ) -> None:
         self.client = vector_store.vector_store
+        self.image_service = image_component
+        self.executors = executor_component
+        self.bulk_batch_size = settings.vectorstore.bulk_batch_size
+        self.bulk_max_items = settings.vectorstore.bulk_max_items
+        self.bulk_max_bytes = settings.vectorstore.bulk_max_bytes
 
-    def add_emoji(
+    async def add_emoji(
         self,
         content: str,
         filename: str,
@@ -29,12 +57,85 @@ class VectorStoreService:
         metadata = {
             "filename": filename,
         }
-        return self.client.add_original_texts_with_filename(
+        ids = await self.client.aadd_original_texts_with_filename(
             filename=filename, texts=[content], metadatas=[metadata]
         )
+        # 新增的表情图片追加进 pack
+        await self.executors.run("storage", self.image_service.add_to_pack, filename)
+        return ids
+
+    async def bulk_add_emoji(
+        self, items: List[BulkEmojiItem], batch_size: Optional[int] = None
+    ) -> List[BulkEmojiResult]:
+        """Add many emojis, embedding and upserting `batch_size` records per call.
+
+        A failed record does not fail the others, its error is returned in its
+        result, which keeps the position of the record in `items`.
+        """
+        batch_size = batch_size or self.bulk_batch_size
+        results = [
+            BulkEmojiResult(index=i, filename=item.filename)
+            for i, item in enumerate(items)
+        ]
+        for start in range(0, len(items), batch_size):
+            await self._bulk_add_batch(
+                items[start : start + batch_size], results[start : start + batch_size]
+            )
+        # 新增的表情图片一次性追加进 pack
+        added = [r.filename for r in results if r.vdb_id is not None]
+        if added:
+            await self.executors.run(
+                "storage", self.image_service.add_files_to_pack, added
+            )
+        return results
+
+    async def _bulk_add_batch(
+        self, items: List[BulkEmojiItem], results: List[BulkEmojiResult]
+    ) -> None:
+        texts = [item.content for item in items]
+        vectors: List[Optional[List[float]]] = []
+        embeddings = self.client.embeddings
+        if embeddings is not None:
+            # 整批一次 embedding, 部分失败时保留成功的向量
+            try:
+                vectors = await embeddings.aembed_documents(texts)
+            except EmbeddingBatchError as e:
+                vectors = e.vectors
+                for i, error in e.errors.items():
+                    results[i].error = f"embedding failed: {error}"
+            except Exception as e:
+                logger.warning(f"embedding bulk batch failed: {e}")
+                for result in results:
+                    result.error = f"embedding failed: {e}"
+                return
+
+        todo = [i for i, result in enumerate(results) if result.error is None]
+        if not todo:
+            return
+        prefetched = (
+            prefetched_embeddings({texts[i]: vectors[i] for i in todo})
+            if vectors
+            else nullcontext()
+        )
+        try:
+            with prefetched:
+                ids = await self.client.aadd_original_texts_with_filenames(
+                    filenames=[items[i].filename for i in todo],
+                    texts=[texts[i] for i in todo],
+                    batch_size=len(todo),
+                )
+        except Exception as e:
+            logger.warning(f"upsert bulk batch failed: {e}")
+            for i in todo:
+                results[i].error = f"upsert failed: {e}"
+            return
+        for i, vdb_id in zip(todo, ids):
+            results[i].vdb_id = vdb_id
 
-    def rag_emoji(self, prompt: str, filenames: List[str] = []) -> List[EmojiFragment]:
-        fragment_list = self.client.similarity_search_by_filenames(
+    async def rag_emoji(
+        self, prompt: str, filenames: List[str] = []
+    ) -> List[EmojiFragment]:
+        fragment_list = await self.client.asimilarity_search_by_filenames(
             query=prompt, filenames=filenames, k=3
         )
         res = []
@@ -44,7 +145,9 @@ class VectorStoreService:
             )
         return res
 
-    def del_emoji(self, vdb_ids: List[str], filenames: List[str] = []) -> List[dict]:
-        return self.client.delete_texts_with_filenames(
+    async def del_emoji(
+        self, vdb_ids: List[str], filenames: List[str] = []
+    ) -> List[dict]:
+        return await self.client.adelete_texts_with_filenames(
             document_ids=vdb_ids, filenames=filenames
         )
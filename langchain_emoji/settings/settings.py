@@ -1,6 +1,6 @@
-from typing import Literal, Optional
+from typing import Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 from langchain_emoji.settings.settings_loader import load_active_settings
 
@@ -102,6 +102,19 @@ class ZhipuAISettings(BaseModel):
     top_p: float
     modelname: str
     api_key: str
+    max_connections: int = Field(
+        description="Connection pool size of the async chat transport.",
+        default=1000,
+    )
+    max_keepalive_connections: int = Field(
+        description="Idle connections kept open for reuse by the async chat transport.",
+        default=100,
+    )
+    request_timeout: float = Field(
+        description="Seconds to wait for a chat response, or for the next streamed "
+        "chunk.",
+        default=120.0,
+    )
 
 
 class LangSmithSettings(BaseModel):
@@ -118,8 +131,45 @@ class TvectordbSettings(BaseModel):
     database_name: str
 
 
+class EmbeddingCacheSettings(BaseModel):
+    enabled: bool = Field(
+        description="Flag indicating if computed embeddings are cached.",
+        default=True,
+    )
+    maxsize: int = Field(
+        description="Maximum number of vectors kept in memory, LRU entries are "
+        "evicted first.",
+        default=4096,
+    )
+    persist: bool = Field(
+        description="Also keep every vector in a SQLite file under local_data, "
+        "so repeated prompts and re-ingestion survive restarts.",
+        default=False,
+    )
+
+
 class EmbeddingSettings(BaseModel):
     mode: Literal["local", "openai", "zhipuai", "mock"]
+    batch_size: int = Field(
+        description="Texts sent in one zhipuai embedding request.",
+        default=16,
+    )
+    max_concurrency: int = Field(
+        description="Maximum number of zhipuai embedding requests in flight.",
+        default=4,
+    )
+    max_retries: int = Field(
+        description="Retries of a rate limited, timed out or failed (5xx) request.",
+        default=3,
+    )
+    retry_backoff: float = Field(
+        description="Seconds before the first retry, doubled for every next one.",
+        default=0.5,
+    )
+    cache: EmbeddingCacheSettings = Field(
+        description="Embedding cache configuration",
+        default=EmbeddingCacheSettings(),
+    )
 
 
 class ChromadbSettings(BaseModel):
@@ -127,10 +177,51 @@ class ChromadbSettings(BaseModel):
     collection_name: str
 
 
+class NumpyVectorSettings(BaseModel):
+    persist_dir: str = Field(
+        description="Data folder of the numpy vector store, relative to the project root.",
+        default="local_data",
+    )
+    collection_name: str = Field(
+        description="Collection name, each collection is one matrix file.",
+        default="EmojiCollection",
+    )
+    initial_capacity: int = Field(
+        description="Rows allocated when the matrix file is created, it doubles when full.",
+        default=1024,
+    )
+    quantization: Literal["none", "float16", "int8"] = Field(
+        description="Storage type of the vector matrix, int8 uses a scale per vector. "
+        "float16 saves memory but scans slower on CPUs without fast half conversion. "
+        "Changing it requires rebuilding the collection.",
+        default="none",
+    )
+    rescore: int = Field(
+        description="Candidates reordered with full precision vectors when quantized, "
+        "0 disables rescoring and the float32 copy.",
+        default=0,
+    )
+
+
 class VectorstoreSettings(BaseModel):
-    database: Literal["tcvectordb", "chromadb"]
+    database: Literal["tcvectordb", "chromadb", "numpy"]
     tcvectordb: TvectordbSettings
     chromadb: ChromadbSettings
+    numpy: NumpyVectorSettings = Field(default_factory=NumpyVectorSettings)
+    bulk_batch_size: int = Field(
+        description="Default records embedded and upserted per call by the bulk "
+        "ingestion API.",
+        default=256,
+    )
+    bulk_max_items: int = Field(
+        description="Maximum records accepted by one bulk ingestion request.",
+        default=20000,
+    )
+    bulk_max_bytes: int = Field(
+        description="Maximum body size in bytes of one bulk ingestion request, larger "
+        "bodies are rejected before they are read.",
+        default=33554432,
+    )
 
 
 class DataSettings(BaseModel):
@@ -145,6 +236,41 @@ class MinioSettings(BaseModel):
     bucket_name: str
     access_key: str
     secret_key: str
+    pool_maxsize: int = Field(
+        description="Connections kept in the urllib3 pool, also the number of "
+        "threads running blocking MinIO calls.",
+        default=32,
+    )
+    connect_timeout: float = Field(
+        description="Connect timeout of MinIO requests in seconds.",
+        default=3.0,
+    )
+    read_timeout: float = Field(
+        description="Read timeout of MinIO requests in seconds.",
+        default=10.0,
+    )
+    retries: int = Field(
+        description="Retries of failed MinIO requests.",
+        default=2,
+    )
+    presign_expires: int = Field(
+        description="Validity of presigned download links in seconds.",
+        default=7 * 24 * 3600,
+    )
+    presign_margin: int = Field(
+        description="Cached links are no longer returned this many seconds "
+        "before they expire.",
+        default=3600,
+    )
+    presign_refresh_after: int = Field(
+        description="Age in seconds after which a cached link is re-signed in the "
+        "background, 0 disables refresh-ahead.",
+        default=6 * 24 * 3600,
+    )
+    presign_cache_size: int = Field(
+        description="Maximum number of cached presigned links.",
+        default=8192,
+    )
 
 
 class DatasetSettings(BaseModel):
@@ -153,6 +279,312 @@ class DatasetSettings(BaseModel):
     mode: Literal["minio", "local"]
 
 
+DEFAULT_EXECUTOR_POOLS: Dict[str, int] = {
+    "default": 16,
+    "llm": 32,
+    "trace": 4,
+    "storage": 8,
+    "vectorstore": 16,
+    "cpu": 4,
+}
+
+
+class ExecutorSettings(BaseModel):
+    pools: Dict[str, int] = Field(
+        description="Threads of each named pool: default (run_in_executor(None)), llm "
+        "(blocking LLM I/O), trace (LangSmith calls), storage (disk and object storage "
+        "writes), vectorstore (blocking vector database calls) and cpu (tokenization, "
+        "image resizing). Pools left out keep their default size.",
+        default=DEFAULT_EXECUTOR_POOLS,
+    )
+    default_pool: str = Field(
+        description="Pool installed as the event loop default executor, it runs "
+        "what still calls run_in_executor(None), e.g. LangChain sync fallbacks.",
+        default="default",
+    )
+
+    @field_validator("pools")
+    @classmethod
+    def merge_default_pools(cls, pools: Dict[str, int]) -> Dict[str, int]:
+        # 只覆盖部分线程池时, 其余线程池保持默认大小
+        return {**DEFAULT_EXECUTOR_POOLS, **pools}
+
+
+class TokenizerSettings(BaseModel):
+    cache_dir: Optional[str] = Field(
+        description="Directory holding the tiktoken BPE files, relative to the project "
+        "root. Pre-populate it to load the encodings offline.",
+        default=None,
+    )
+    default_encoding: str = Field(
+        description="Encoding used for providers without an explicit encoding.",
+        default="cl100k_base",
+    )
+    encodings: Dict[str, str] = Field(
+        description="tiktoken encoding per provider, openai is derived from its modelname.",
+        default={},
+    )
+    batch_threads: int = Field(
+        description="Threads used by tiktoken to encode a batch.",
+        default=4,
+    )
+    max_prompt_tokens: int = Field(
+        description="Longest prompt accepted by the emoji endpoints, 0 disables the guard.",
+        default=0,
+    )
+
+
+class ImageCacheSettings(BaseModel):
+    enabled: bool = Field(
+        description="Flag indicating if emoji images are cached in memory.",
+        default=True,
+    )
+    maxsize: int = Field(
+        description="Maximum number of cached images.",
+        default=2048,
+    )
+    max_bytes: int = Field(
+        description="Memory budget of the raw image bytes cache.",
+        default=64 * 1024 * 1024,
+    )
+    max_base64_bytes: int = Field(
+        description="Memory budget of the base64 encoded image cache.",
+        default=64 * 1024 * 1024,
+    )
+    warmup_file: Optional[str] = Field(
+        description="Popularity list loaded into the cache at startup, one filename "
+        "per line, relative to the project root.",
+        default=None,
+    )
+    warmup_limit: int = Field(
+        description="Maximum number of images loaded from the warm up list, 0 loads all.",
+        default=500,
+    )
+
+
+class ImagePackSettings(BaseModel):
+    enabled: bool = Field(
+        description="Serve local dataset images from the memory-mapped emoji pack, "
+        "build it with `tools/datainit.py --pack`.",
+        default=False,
+    )
+    dir: str = Field(
+        description="Pack directory, relative to the dataset folder.",
+        default="pack",
+    )
+
+
+class ImageVariantSettings(BaseModel):
+    enabled: bool = Field(
+        description="Flag indicating if resized/re-encoded image variants are served.",
+        default=True,
+    )
+    dir: str = Field(
+        description="On-disk variant cache directory, relative to the dataset folder.",
+        default="variants",
+    )
+    sizes: List[int] = Field(
+        description="Allowed longest sides in pixels of the requested variants.",
+        default=[128, 256],
+    )
+    formats: List[Literal["webp", "jpeg", "png"]] = Field(
+        description="Allowed output formats of the requested variants.",
+        default=["webp", "jpeg", "png"],
+    )
+    quality: int = Field(
+        description="Encoder quality of webp and jpeg variants.",
+        default=80,
+    )
+
+
+class ImageSettings(BaseModel):
+    cache: ImageCacheSettings = Field(
+        description="In-memory image cache configuration",
+        default_factory=ImageCacheSettings,
+    )
+    pack: ImagePackSettings = Field(
+        description="Packed, memory-mapped image store configuration",
+        default_factory=ImagePackSettings,
+    )
+    variant: ImageVariantSettings = Field(
+        description="Thumbnail and format variant configuration",
+        default_factory=ImageVariantSettings,
+    )
+
+
+class EmojiCacheSettings(BaseModel):
+    enabled: bool = Field(
+        description="Flag indicating if the exact-match response cache is enabled.",
+        default=True,
+    )
+    maxsize: int = Field(
+        description="Maximum number of cached responses, LRU entries are evicted first.",
+        default=256,
+    )
+    ttl: int = Field(
+        description="Time to live of a cached response in seconds, 0 means never expire.",
+        default=600,
+    )
+
+
+class EmojiSemanticCacheSettings(BaseModel):
+    enabled: bool = Field(
+        description="Flag indicating if the embedding-similarity answer cache is enabled.",
+        default=False,
+    )
+    threshold: float = Field(
+        description="Minimum cosine similarity for a past prompt to be reused.",
+        default=0.95,
+    )
+    capacity: int = Field(
+        description="Maximum number of cached prompts, LRU entries are evicted first.",
+        default=2048,
+    )
+    persist: bool = Field(
+        description="Persist the cache under local_data so it survives restarts.",
+        default=True,
+    )
+    persist_interval: int = Field(
+        description="Save the cache to disk after this many new entries.",
+        default=50,
+    )
+
+
+class EmojiBatchSettings(BaseModel):
+    max_items: int = Field(
+        description="Maximum number of prompts accepted by one batch request.",
+        default=64,
+    )
+    max_concurrency: int = Field(
+        description="Maximum number of prompts of one batch running through the chain concurrently.",
+        default=8,
+    )
+    max_prompt_tokens: int = Field(
+        description="Token budget of all prompts in one batch, 0 disables the budget.",
+        default=8192,
+    )
+
+
+class EmojiFastPathSettings(BaseModel):
+    k: int = Field(
+        description="Number of documents retrieved when llm is 'none'.",
+        default=4,
+    )
+    rerank: Literal["none", "lexical"] = Field(
+        description="CPU reranker applied to the retrieved documents when llm is 'none'.",
+        default="lexical",
+    )
+    lexical_weight: float = Field(
+        description="Weight of the lexical overlap score against the vector rank.",
+        default=0.3,
+    )
+
+
+class EmojiHedgeSettings(BaseModel):
+    enabled: bool = Field(
+        description="Flag indicating if slow requests are hedged to a second provider. "
+        "Only effective when llm.mode is 'all'.",
+        default=False,
+    )
+    providers: List[str] = Field(
+        description="Providers that can be hedged, the first one different from "
+        "the requested llm is used as the hedge target.",
+        default=["openai", "zhipuai", "deepseek"],
+    )
+    delay_mode: Literal["fixed", "p95"] = Field(
+        description="Use a fixed hedge delay or the p95 latency of the primary provider.",
+        default="fixed",
+    )
+    delay: float = Field(
+        description="Hedge delay in seconds, also the fallback of p95 mode.",
+        default=3.0,
+    )
+    min_samples: int = Field(
+        description="Minimum latency samples before the p95 delay is used.",
+        default=20,
+    )
+    window: int = Field(
+        description="Number of recent latency samples kept per provider.",
+        default=200,
+    )
+
+
+class EmojiAdmissionSettings(BaseModel):
+    enabled: bool = Field(
+        description="Flag indicating if the per-LLM admission control is enabled.",
+        default=True,
+    )
+    default_limit: int = Field(
+        description="Concurrent chain executions allowed for an llm without explicit limit.",
+        default=16,
+    )
+    limits: Dict[str, int] = Field(
+        description="Concurrent chain executions allowed per llm.",
+        default={},
+    )
+    max_queue: int = Field(
+        description="Requests allowed to wait for a slot per llm, "
+        "more are rejected with 429.",
+        default=64,
+    )
+    queue_timeout: float = Field(
+        description="Seconds a request may wait for a slot before it is rejected with 503.",
+        default=10.0,
+    )
+
+
+class EmojiFileSettings(BaseModel):
+    base_url: str = Field(
+        description="Prefix of the image urls returned in url response mode, "
+        "point it at a CDN in front of /v1/emoji/file.",
+        default="/v1/emoji/file",
+    )
+    max_age: int = Field(
+        description="Cache-Control max-age of the image file endpoint in seconds.",
+        default=86400,
+    )
+    presigned: bool = Field(
+        description="Also return the MinIO presigned download link in url response mode.",
+        default=False,
+    )
+    public: bool = Field(
+        description="Serve /v1/emoji/file without authentication, for clients such "
+        "as <img> tags that can not send the Authorization header.",
+        default=False,
+    )
+
+
+class EmojiSettings(BaseModel):
+    cache: EmojiCacheSettings = Field(
+        description="Exact-match response cache configuration",
+        default_factory=EmojiCacheSettings,
+    )
+    semantic_cache: EmojiSemanticCacheSettings = Field(
+        description="Embedding-similarity answer cache configuration",
+        default_factory=EmojiSemanticCacheSettings,
+    )
+    batch: EmojiBatchSettings = Field(
+        description="Batch emoji endpoint configuration",
+        default_factory=EmojiBatchSettings,
+    )
+    fast_path: EmojiFastPathSettings = Field(
+        description="LLM-free fast path configuration, used when llm is 'none'",
+        default_factory=EmojiFastPathSettings,
+    )
+    hedge: EmojiHedgeSettings = Field(
+        description="Hedged multi-LLM execution configuration",
+        default_factory=EmojiHedgeSettings,
+    )
+    admission: EmojiAdmissionSettings = Field(
+        description="Admission control of the emoji pipeline",
+        default_factory=EmojiAdmissionSettings,
+    )
+    file: EmojiFileSettings = Field(
+        description="Image file endpoint and url response mode configuration",
+        default_factory=EmojiFileSettings,
+    )
+
+
 class Settings(BaseModel):
     server: ServerSettings
     llm: LLMSettings
@@ -165,6 +597,10 @@ class Settings(BaseModel):
     data: DataSettings
     minio: Optional[MinioSettings] = None
     dataset: DatasetSettings
+    executor: ExecutorSettings = Field(default_factory=ExecutorSettings)
+    tokenizer: TokenizerSettings = Field(default_factory=TokenizerSettings)
+    image: ImageSettings = Field(default_factory=ImageSettings)
+    emoji: EmojiSettings = Field(default_factory=EmojiSettings)
 
 
 """
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """Thread-safe in-process LRU cache with optional TTL and size budget.
+
+    Args:
+        maxsize: Maximum number of entries, the least recently used entry is
+            evicted when the cache is full.
+        ttl: Time to live of each entry in seconds, 0 or None means never expire.
+        maxbytes: Budget of the summed entry weights, 0 or None means no budget.
+        weigher: Weight of a value, `len` by default. Only used with `maxbytes`.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: Optional[float] = None,
+        maxbytes: Optional[int] = None,
+        weigher: Callable[[V], int] = len,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.weigher = weigher
+        self._data: OrderedDict[Hashable, Tuple[float, V]] = OrderedDict()
+        self._weights: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, expire_at: float) -> bool:
+        return bool(expire_at) and expire_at <= time.monotonic()
+
+    def _remove(self, key: Hashable) -> Optional[Tuple[float, V]]:
+        self.weight -= self._weights.pop(key, 0)
+        return self._data.pop(key, None)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expire_at, value = item
+            if self._expired(expire_at):
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        if self.maxsize <= 0:
+            return
+        weight = self.weigher(value) if self.maxbytes else 0
+        if self.maxbytes and weight > self.maxbytes:
+            return  # 单个条目超出预算, 不缓存
+        expire_at = time.monotonic() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (expire_at, value)
+            self._weights[key] = weight
+            self.weight += weight
+            while len(self._data) > self.maxsize or (
+                self.maxbytes and self.weight > self.maxbytes
+            ):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            item = self._remove(key)
+            return item[1] if item is not None else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._weights.clear()
+            self.weight = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and not self._expired(item[0])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        stats = {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+        if self.maxbytes:
+            stats.update({"bytes": self.weight, "maxbytes": self.maxbytes})
+        return stats
@@ -0,0 +1,45 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Coalesce concurrent calls with the same key into one execution.
+
+    The first caller (leader) starts the call, callers arriving while it is in flight
+    (followers) await the same result. The shared call is shielded, so a cancelled
+    caller does not cancel the execution the others are waiting for.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Future[T]"] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(
+        self, key: Hashable, func: Callable[[], Awaitable[T]]
+    ) -> Tuple[T, bool]:
+        """Run `func` once per in-flight key, returns (result, shared)"""
+        future = self._calls.get(key)
+        if future is not None:
+            self.followers += 1
+            return await asyncio.shield(future), True
+
+        future = asyncio.ensure_future(func())
+        self._calls[key] = future
+
+        def _forget(_: Any) -> None:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+        future.add_done_callback(_forget)
+        self.leaders += 1
+        return await asyncio.shield(future), False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
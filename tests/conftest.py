@@ -0,0 +1,65 @@
+import json
+
+import pytest
+from injector import Injector
+from langchain_core.language_models import FakeListChatModel
+
+from langchain_emoji.components.llm.llm_component import LLMComponent
+from langchain_emoji.components.tokenizer import tokenizer_component
+from langchain_emoji.components.trace.trace_component import TraceComponent
+from langchain_emoji.server.emoji.emoji_service import EmojiService
+from langchain_emoji.settings.settings import Settings, settings
+
+# 向量库中的表情包, 文件名 -> 描述
+EMOJIS = {"a.gif": "开心 大笑", "b.gif": "难过 哭泣"}
+
+
+class WordEncoding:
+    """One token per word, stands in for a tiktoken encoding without the BPE files"""
+
+    def encode_ordinary(self, text):
+        return text.split()
+
+    def encode_ordinary_batch(self, texts, num_threads):
+        return [text.split() for text in texts]
+
+
+class FakeLLMComponent:
+    """Chat model that always picks a.gif, stands in for the remote providers"""
+
+    def __init__(self) -> None:
+        self.llm = FakeListChatModel(
+            responses=[json.dumps({"filename": "a.gif", "content": EMOJIS["a.gif"]})]
+        )
+
+
+@pytest.fixture
+def emoji_service(tmp_path, monkeypatch):
+    """EmojiService built by the injector from the test settings.
+
+    Only the remote services (chat models, LangSmith) and the tiktoken BPE files are
+    replaced, the retrieval chain, the caches and the token accounting run as in
+    production.
+    """
+    monkeypatch.setattr(
+        tokenizer_component.tiktoken, "get_encoding", lambda name: WordEncoding()
+    )
+    test_settings = settings().model_copy(deep=True)
+    test_settings.vectorstore.numpy.persist_dir = str(tmp_path)
+    test_settings.image.pack.enabled = False
+    test_settings.image.cache.warmup_file = None
+    injector = Injector()
+    injector.binder.bind(Settings, to=test_settings)
+    injector.binder.bind(LLMComponent, to=FakeLLMComponent())
+    # LangSmith 客户端会在后台线程连接远端, 这里不需要追踪
+    injector.binder.bind(TraceComponent, to=object())
+    service = injector.get(EmojiService)
+
+    service.image_service.emo_dir = tmp_path
+    for filename in EMOJIS:
+        (tmp_path / filename).write_bytes(b"GIF89a")
+    service.vector_service.vector_store.add_original_texts_with_filenames(
+        list(EMOJIS), list(EMOJIS.values())
+    )
+    yield service
+    service.executors.shutdown()
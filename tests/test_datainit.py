@@ -0,0 +1,106 @@
+import json
+import time
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from langchain_emoji.components.vector_store.numpy_store.numpy_store import (
+    EmojiNumpyStore,
+)
+from tools.datainit import VectordbCheckpoint, read_chunks, upload_vectordb
+
+KEY = {"dataset": "data.jsonl", "database": "numpy"}
+
+
+def test_checkpoint_only_advances_over_contiguous_chunks(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    checkpoint = VectordbCheckpoint(path, KEY)
+
+    # 后面的块先完成时不推进, 续传不会跳过未写入的行
+    checkpoint.complete(10, 20, 1)
+    checkpoint.complete(20, 30, 0)
+    assert checkpoint.lines_done == 0 and not path.exists()
+
+    checkpoint.complete(0, 10, 2)
+    assert (checkpoint.lines_done, checkpoint.failed) == (30, 3)
+
+    resumed = VectordbCheckpoint(path, KEY)
+    assert (resumed.lines_done, resumed.failed) == (30, 3)
+    assert VectordbCheckpoint(path, {**KEY, "database": "chroma"}).lines_done == 0
+    assert VectordbCheckpoint(path, KEY, restart=True).lines_done == 0
+
+
+def test_read_chunks_skips_done_lines(tmp_path):
+    dataset = tmp_path / "data.jsonl"
+    dataset.write_text("".join(f"{i}\n" for i in range(7)), encoding="utf-8")
+
+    chunks = list(read_chunks(dataset, 2, 2))
+    assert [start for start, _ in chunks] == [2, 4, 6]
+    assert chunks[-1][1] == ["6\n"]
+
+
+class FakeClient:
+    embeddings = None
+
+    def __init__(self, fail_on: str) -> None:
+        self.fail_on = fail_on
+        self.added = []
+
+    def add_original_texts_with_filenames(self, filenames, texts, batch_size, ids):
+        if self.fail_on in filenames:
+            raise ConnectionError("vector database unavailable")
+        self.added.extend(filenames)
+
+
+def test_upload_resumes_from_the_failed_chunk(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dataset = tmp_path / "data.jsonl"
+    records = [{"filename": f"{i}.gif", "content": str(i)} for i in range(6)]
+    dataset.write_text(
+        "".join(json.dumps(r) + "\n" for r in records) + "not json\n",
+        encoding="utf-8",
+    )
+    checkpoint = VectordbCheckpoint(tmp_path / "checkpoint.json", KEY)
+
+    client = FakeClient(fail_on="2.gif")
+    assert not upload_vectordb(client, dataset, checkpoint, batch_size=2, workers=1)
+    assert checkpoint.lines_done == 2 and client.added == ["0.gif", "1.gif"]
+
+    client = FakeClient(fail_on="")
+    resumed = VectordbCheckpoint(tmp_path / "checkpoint.json", KEY)
+    assert upload_vectordb(client, dataset, resumed, batch_size=2, workers=2)
+    assert sorted(client.added) == ["2.gif", "3.gif", "4.gif", "5.gif"]
+    assert (resumed.lines_done, resumed.failed) == (7, 1)
+    assert (tmp_path / "vector_failed_files.txt").read_text() == "not json\n"
+
+
+class FlakyNumpyStore(EmojiNumpyStore):
+    fail_on = ""
+
+    def add_original_texts_with_filenames(self, filenames, texts, **kwargs):
+        if self.fail_on in filenames:
+            # 失败的块最后结束, 之后的块已经写入
+            time.sleep(0.2)
+            raise ConnectionError("vector database unavailable")
+        return super().add_original_texts_with_filenames(filenames, texts, **kwargs)
+
+
+def test_resume_after_out_of_order_failure_does_not_duplicate(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    dataset = tmp_path / "data.jsonl"
+    records = [{"filename": f"{i}.gif", "content": str(i)} for i in range(8)]
+    dataset.write_text("".join(json.dumps(r) + "\n" for r in records))
+    checkpoint_file = tmp_path / "checkpoint.json"
+    store = FlakyNumpyStore("emoji", DeterministicFakeEmbedding(size=8), str(tmp_path))
+
+    store.fail_on = "2.gif"
+    checkpoint = VectordbCheckpoint(checkpoint_file, KEY)
+    assert not upload_vectordb(store, dataset, checkpoint, batch_size=2, workers=4)
+    assert checkpoint.lines_done == 2 and len(store.index._rows) > 2
+
+    store.fail_on = ""
+    resumed = VectordbCheckpoint(checkpoint_file, KEY)
+    assert upload_vectordb(store, dataset, resumed, batch_size=2, workers=4)
+    # 续传时重复写入的块按相同 id 覆盖
+    assert len(store.index._rows) == 8
+    ids = store.index.ids_by_filenames([f"{i}.gif" for i in range(8)])
+    assert len(ids) == 8
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from langchain_emoji.components.embedding.embedding_cache import EmbeddingCache
+from langchain_emoji.components.embedding.embedding_proxy import EmbeddingProxy
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return super().embed_documents(texts)
+
+    async def aembed_documents(self, texts):
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class FakeTokenizer:
+    def count_batch(self, texts):
+        return [len(text) for text in texts]
+
+
+def test_disk_tier_survives_reopen(tmp_path):
+    db = tmp_path / "embeddings.sqlite3"
+    cache = EmbeddingCache("m", maxsize=8, persist_file=db)
+    cache.set_many(["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+    cache.set_many(["a"], [[1.0, 2.0]])
+    assert cache.stats()["disk"]["size"] == 2
+
+    reopened = EmbeddingCache("m", maxsize=8, persist_file=db)
+    assert reopened.stats()["disk"]["size"] == 2
+    assert reopened.get_many(["a", "c"]) == [[1.0, 2.0], None]
+    assert reopened.disk_hits == 1
+    # 模型名不同时不命中
+    assert EmbeddingCache("other", persist_file=db).get_many(["a"]) == [None]
+
+
+def test_async_sqlite_work_runs_in_executor(tmp_path):
+    threads = set()
+    executor = ThreadPoolExecutor(1, thread_name_prefix="storage")
+    cache = EmbeddingCache(
+        "m", maxsize=8, persist_file=tmp_path / "e.sqlite3", executor=executor
+    )
+    load, persist = cache._load, cache._persist
+
+    def record(func):
+        def wrapper(*args):
+            threads.add(threading.current_thread().name)
+            return func(*args)
+
+        return wrapper
+
+    cache._load, cache._persist = record(load), record(persist)
+
+    async def run():
+        await cache.aset_many(["a"], [[1.0]])
+        cache._memory.clear()
+        return await cache.aget_many(["a", "b"])
+
+    assert asyncio.run(run()) == [[1.0], None]
+    assert threads and all(name.startswith("storage") for name in threads)
+    executor.shutdown()
+
+
+def test_proxy_only_embeds_cache_misses():
+    model = CountingEmbedding(size=4)
+    proxy = EmbeddingProxy(model, FakeTokenizer(), EmbeddingCache("m", maxsize=8))
+
+    first = proxy.embed_documents(["a", "b", "a"])
+    assert model.calls == 1
+    # 缓存按 float32 保存
+    assert np.allclose(proxy.embed_documents(["b", "a"]), [first[1], first[0]])
+    assert model.calls == 1
+
+    async def run():
+        query = await proxy.aembed_query("c")
+        again = await proxy.aembed_documents(["c", "a"])
+        return query, again
+
+    query, again = asyncio.run(run())
+    assert np.allclose(again, [query, first[0]])
+    assert model.calls == 2
@@ -0,0 +1,29 @@
+import asyncio
+
+from langchain_emoji.components.embedding.embedding_usage import (
+    get_embedding_usage,
+    record_embedding_usage,
+)
+
+
+def test_concurrent_requests_keep_separate_usage():
+    async def request(tokens: int):
+        with get_embedding_usage() as usage:
+            # 请求内创建的任务继承同一个计数
+            await asyncio.gather(
+                *(asyncio.to_thread(record_embedding_usage, tokens) for _ in range(2))
+            )
+            await asyncio.sleep(0)
+            return usage.total_tokens, usage.successful_requests
+
+    async def run():
+        return await asyncio.gather(request(3), request(5))
+
+    assert asyncio.run(run()) == [(6, 2), (10, 2)]
+
+
+def test_usage_outside_a_scope_is_ignored():
+    record_embedding_usage(7)
+    with get_embedding_usage() as usage:
+        pass
+    assert usage.total_tokens == 0
@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+import pytest
+
+from langchain_emoji.server.emoji.emoji_admission import (
+    AdmissionController,
+    AdmissionRejected,
+)
+from langchain_emoji.server.emoji.emoji_router import rejected_response
+from langchain_emoji.server.utils.model import (
+    ServiceUnavailableErrorCode,
+    TooManyRequestsErrorCode,
+)
+from langchain_emoji.settings.settings import EmojiAdmissionSettings
+
+
+def make_controller(max_queue: int, queue_timeout: float) -> AdmissionController:
+    return AdmissionController(
+        EmojiAdmissionSettings(
+            enabled=True,
+            default_limit=1,
+            max_queue=max_queue,
+            queue_timeout=queue_timeout,
+        )
+    )
+
+
+async def hold(controller: AdmissionController, release: asyncio.Event) -> None:
+    async with controller.admit("openai"):
+        await release.wait()
+
+
+def test_full_queue_is_rejected_with_429():
+    controller = make_controller(max_queue=1, queue_timeout=5)
+
+    async def run():
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(controller, release))
+        waiter = asyncio.create_task(hold(controller, release))
+        await asyncio.sleep(0.01)
+        with pytest.raises(AdmissionRejected) as e:
+            await hold(controller, release)
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return e.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 429
+    stats = controller.stats()["llms"]["openai"]
+    assert (stats["admitted"], stats["rejected_queue_full"]) == (2, 1)
+    assert stats["in_flight"] == stats["queue_depth"] == 0
+
+
+def test_queue_deadline_is_rejected_with_503():
+    controller = make_controller(max_queue=4, queue_timeout=0.05)
+
+    async def run():
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(controller, release))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as e:
+            await hold(controller, release)
+        release.set()
+        await holder
+        return e.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 503
+    assert controller.stats()["llms"]["openai"]["rejected_timeout"] == 1
+
+
+@pytest.mark.parametrize(
+    "status_code, code",
+    [(429, TooManyRequestsErrorCode), (503, ServiceUnavailableErrorCode)],
+)
+def test_rejected_response_sets_status_and_retry_after(status_code, code):
+    response = rejected_response(AdmissionRejected("busy", status_code, retry_after=3))
+    assert response.status_code == status_code
+    assert response.headers["Retry-After"] == "3"
+    assert json.loads(response.body)["code"] == code
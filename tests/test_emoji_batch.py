@@ -0,0 +1,132 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from langchain_emoji.components.embedding.embedding_cache import EmbeddingCache
+from langchain_emoji.components.embedding.embedding_proxy import (
+    prefetched_embeddings_var,
+)
+from langchain_emoji.server.emoji.emoji_admission import (
+    AdmissionController,
+    AdmissionRejected,
+)
+from langchain_emoji.server.emoji.emoji_service import EmojiBatchRequest
+from langchain_emoji.server.utils.model import (
+    PromptTooLongErrorCode,
+    ServiceUnavailableErrorCode,
+    SystemErrorCode,
+)
+from langchain_emoji.settings.settings import EmojiAdmissionSettings
+
+
+def wrap_chain(service, seen):
+    """Record the prefetched prompts, "boom" fails and "slow" sleeps before the chain"""
+    chain = service.chain
+
+    async def invoke(inputs, config):
+        seen.append(sorted(prefetched_embeddings_var.get()))
+        if inputs["prompt"] == "boom":
+            raise ValueError("chain failed")
+        if inputs["prompt"] == "slow":
+            await asyncio.sleep(0.2)
+        return await chain.ainvoke(inputs, config)
+
+    service.chain = RunnableLambda(invoke)
+
+
+def test_batch_returns_per_item_results_in_order(emoji_service):
+    seen = []
+    wrap_chain(emoji_service, seen)
+    emoji_service.tokenizer.max_prompt_tokens = 3
+    body = EmojiBatchRequest(
+        items=[
+            {"prompt": "开心", "req_id": "1"},
+            {"prompt": "a very long prompt", "req_id": "2"},
+            {"prompt": "boom", "req_id": "3"},
+            {"prompt": "开心", "req_id": "4"},
+        ]
+    )
+
+    results = asyncio.run(emoji_service.get_emoji_batch(body))
+    assert [r.req_id for r in results] == ["1", "2", "3", "4"]
+    assert results[0].data.emojiinfo.filename == "a.gif"
+    assert results[0].data.emojidetail.base64
+    assert results[0].data.run_id is not None
+    assert results[1].code == PromptTooLongErrorCode
+    assert (results[2].code, results[2].msg) == (SystemErrorCode, "chain failed")
+    assert results[3].data.emojiinfo.filename == "a.gif"
+    # 所有 prompt 一次 embedding, 检索阶段通过 prefetched_embeddings 复用
+    assert seen == [["boom", "开心"]] * 3
+
+    # 成功的结果写入精确缓存
+    retry = EmojiBatchRequest(items=body.items[:1])
+    again = asyncio.run(emoji_service.get_emoji_batch(retry))
+    assert again[0].data.cache_hit and len(seen) == 3
+    assert again[0].data.token_info.total_tokens == 0
+
+
+def test_batch_items_wait_for_admission_slots(emoji_service):
+    wrap_chain(emoji_service, [])
+    emoji_service.admission = AdmissionController(
+        EmojiAdmissionSettings(default_limit=1, max_queue=4, queue_timeout=0.05)
+    )
+    body = EmojiBatchRequest(
+        items=[{"prompt": "slow", "req_id": "1"}, {"prompt": "fast", "req_id": "2"}],
+        max_concurrency=2,
+    )
+
+    results = asyncio.run(emoji_service.get_emoji_batch(body))
+    assert results[0].data.emojiinfo.filename == "a.gif"
+    # 第二条等待 llm 名额超时, 与单条请求一样按 503 处理
+    assert results[1].code == ServiceUnavailableErrorCode
+    stats = emoji_service.admission.stats()["llms"][body.items[0].llm]
+    assert (stats["admitted"], stats["rejected_timeout"]) == (1, 1)
+
+
+def test_batch_is_rejected_when_queue_is_full(emoji_service):
+    emoji_service.admission = AdmissionController(
+        EmojiAdmissionSettings(default_limit=1, max_queue=0)
+    )
+    body = EmojiBatchRequest(items=[{"prompt": "开心", "req_id": "1"}])
+
+    async def run():
+        async with emoji_service.admission.admit(body.items[0].llm):
+            await emoji_service.get_emoji_batch(body)
+
+    with pytest.raises(AdmissionRejected) as e:
+        asyncio.run(run())
+    assert e.value.status_code == 429
+
+
+def test_batch_checks_embedding_cache_off_the_event_loop(emoji_service, tmp_path):
+    embedcom = emoji_service.vector_service.embedcom
+    db = tmp_path / "embeddings.db"
+    vector = embedcom.embedding.embedding.embed_query("开心")
+    EmbeddingCache("m", persist_file=db).set_many(["开心"], [vector])
+    executor = ThreadPoolExecutor(thread_name_prefix="storage")
+    cache = EmbeddingCache("m", persist_file=db, executor=executor)
+    threads = []
+    load = cache._load
+
+    def record(keys):
+        threads.append(threading.current_thread().name)
+        return load(keys)
+
+    cache._load = record
+    embedcom.cache = embedcom.embedding.cache = cache
+    body = EmojiBatchRequest(
+        items=[{"prompt": "开心", "req_id": "1"}, {"prompt": "难过", "req_id": "2"}]
+    )
+
+    results = asyncio.run(emoji_service.get_emoji_batch(body))
+    executor.shutdown()
+    assert all(r.data.emojiinfo.filename == "a.gif" for r in results)
+    # SQLite 查询在 storage 线程池中执行, 不阻塞事件循环
+    assert threads and all(name.startswith("storage") for name in threads)
+    assert cache.disk_hits == 1
+    # 命中 embedding 缓存的 prompt 不分摊用量
+    assert results[0].data.token_info.embedding_tokens == 0
+    assert results[1].data.token_info.embedding_tokens == 1
@@ -0,0 +1,50 @@
+from langchain_emoji.server.emoji.emoji_cache import EmojiResponseCache, cache_key
+from langchain_emoji.settings.settings import EmojiCacheSettings
+from langchain_emoji.utils import cache as cache_module
+from langchain_emoji.utils.cache import LRUCache
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    cache = LRUCache(maxsize=4, ttl=10)
+    cache.set("a", 1)
+
+    clock.now += 9
+    assert cache.get("a") == 1 and "a" in cache
+    clock.now += 2
+    assert "a" not in cache
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_evicts_least_recently_used_over_maxsize():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.evictions == 1
+
+
+def test_response_cache_normalizes_prompt_and_respects_enabled():
+    cache = EmojiResponseCache(EmojiCacheSettings(enabled=True, maxsize=8, ttl=60))
+    cache.set(cache_key("Ｈｉ  there ", "openai"), "resp")
+
+    assert cache.get(cache_key("hi there", "openai")) == "resp"
+    assert cache.get(cache_key("hi there", "zhipuai")) is None
+
+    disabled = EmojiResponseCache(EmojiCacheSettings(enabled=False))
+    disabled.set(cache_key("hi", "openai"), "resp")
+    assert disabled.get(cache_key("hi", "openai")) is None
@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from injector import Injector
+
+from langchain_emoji.components.executor.executor_component import ExecutorComponent
+from langchain_emoji.components.image.image_component import ImageComponent
+from langchain_emoji.server.emoji.emoji_router import (
+    emoji_file_router,
+    emoji_router,
+)
+from langchain_emoji.server.emoji.emoji_service import EmojiService
+from langchain_emoji.server.utils.auth import authenticated
+from langchain_emoji.settings.settings import settings
+
+
+@pytest.fixture(params=[True])
+def client(request, tmp_path):
+    test_settings = settings().model_copy(deep=True)
+    test_settings.dataset.mode = "local"
+    test_settings.emoji.file.public = request.param
+    test_settings.image.pack.enabled = False
+    test_settings.image.cache.warmup_file = None
+    executors = ExecutorComponent(test_settings)
+    image_service = ImageComponent(test_settings, Injector(), executors)
+    image_service.emo_dir = tmp_path
+    (tmp_path / "a.gif").write_bytes(b"GIF89a")
+
+    service = EmojiService.__new__(EmojiService)
+    service.settings = test_settings
+    service.image_service = image_service
+    injector = Injector()
+    injector.binder.bind(EmojiService, to=service)
+
+    async def bind_injector_to_request(request: Request) -> None:
+        request.state.injector = injector
+
+    def reject() -> bool:
+        raise HTTPException(status_code=401)
+
+    app = FastAPI(dependencies=[Depends(bind_injector_to_request)])
+    # 与 launcher 相同, 按 emoji.file.public 决定图片接口是否认证
+    public = test_settings.emoji.file.public
+    app.include_router(
+        emoji_file_router, dependencies=[] if public else [Depends(authenticated)]
+    )
+    app.include_router(emoji_router)
+    app.dependency_overrides[authenticated] = reject
+    with TestClient(app) as client:
+        yield client, image_service
+    executors.shutdown()
+
+
+@pytest.mark.parametrize("client", [False], indirect=True)
+def test_emoji_file_requires_authentication_by_default(client):
+    client, _ = client
+    assert client.get("/v1/emoji/file/a.gif").status_code == 401
+
+
+def test_emoji_file_is_served_without_authentication_when_public(client):
+    client, image_service = client
+    threads = []
+    load = image_service._load
+
+    def record(filename):
+        threads.append(threading.current_thread().name)
+        return load(filename)
+
+    image_service._load = record
+
+    response = client.get("/v1/emoji/file/a.gif")
+    assert response.status_code == 200
+    assert response.content == b"GIF89a"
+    assert response.headers["content-type"] == "image/gif"
+    assert response.headers["cache-control"].startswith("public")
+    # 文件通过异步路径在 storage 线程池读取
+    assert threads and threads[0].startswith("storage")
+
+    assert client.get("/v1/emoji/file/missing.gif").status_code == 404
+    assert client.post("/v1/emoji", json={"prompt": "hi"}).status_code == 401
+
+
+def test_emoji_file_honours_conditional_and_range_headers(client):
+    client, _ = client
+    etag = client.get("/v1/emoji/file/a.gif").headers["etag"]
+
+    response = client.get("/v1/emoji/file/a.gif", headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.content == b""
+
+    response = client.get("/v1/emoji/file/a.gif", headers={"Range": "bytes=0-2"})
+    assert response.status_code == 206 and response.content == b"GIF"
+    assert response.headers["content-range"] == "bytes 0-2/6"
+
+    response = client.get("/v1/emoji/file/a.gif", headers={"Range": "bytes=-2"})
+    assert response.status_code == 206 and response.content == b"9a"
+
+    response = client.get("/v1/emoji/file/a.gif", headers={"Range": "bytes=10-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */6"
+
+    # If-Range 与当前 ETag 一致时才按 Range 返回, 否则返回完整文件
+    headers = {"Range": "bytes=3-", "If-Range": etag}
+    response = client.get("/v1/emoji/file/a.gif", headers=headers)
+    assert response.status_code == 206 and response.content == b"89a"
+    headers["If-Range"] = '"stale"'
+    response = client.get("/v1/emoji/file/a.gif", headers=headers)
+    assert response.status_code == 200 and response.content == b"GIF89a"
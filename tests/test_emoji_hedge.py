@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from langchain_emoji.server.emoji.emoji_admission import AdmissionRejected
+from langchain_emoji.server.emoji.emoji_hedge import HedgePolicy
+from langchain_emoji.server.emoji.emoji_service import EmojiRequest, EmojiService
+from langchain_emoji.settings.settings import EmojiHedgeSettings
+
+RESULT = {"filename": "a.gif", "content": "a"}
+
+
+@pytest.fixture
+def hedged_service(emoji_service):
+    """Function replacing the chain attempts of the service with `attempts[llm]`"""
+    emoji_service.hedge_policy = HedgePolicy(
+        EmojiHedgeSettings(
+            enabled=True,
+            providers=["openai", "zhipuai"],
+            delay_mode="fixed",
+            delay=0.05,
+        ),
+        "all",
+    )
+
+    def use(attempts: dict) -> EmojiService:
+        async def ainvoke_attempt(body, llm, cb, read_runid):
+            return await attempts[llm]()
+
+        emoji_service.ainvoke_attempt = ainvoke_attempt
+        return emoji_service
+
+    return use
+
+
+def run_chain(service: EmojiService):
+    body = EmojiRequest(prompt="hi", req_id="r1", llm="openai")
+    return asyncio.run(service.ainvoke_chain(body))
+
+
+class Attempt:
+    def __init__(self, delay: float, result=RESULT, error=None) -> None:
+        self.delay, self.result, self.error = delay, result, error
+        self.started = self.cancelled = False
+
+    async def __call__(self):
+        self.started = True
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return {**self.result}
+
+
+def test_fast_primary_is_not_hedged(hedged_service):
+    primary, hedge = Attempt(0), Attempt(0)
+    service = hedged_service({"openai": primary, "zhipuai": hedge})
+
+    result, llm, cbs, _ = run_chain(service)
+    assert (result, llm, len(cbs)) == (RESULT, "openai", 1)
+    assert not hedge.started and service.hedge_policy.hedged == 0
+
+
+def test_hedge_wins_and_cancels_slow_primary(hedged_service):
+    primary, hedge = Attempt(5), Attempt(0)
+    service = hedged_service({"openai": primary, "zhipuai": hedge})
+
+    result, llm, cbs, _ = run_chain(service)
+    assert (llm, len(cbs)) == ("zhipuai", 2)
+    assert primary.cancelled
+    assert service.hedge_policy.hedge_wins == 1
+
+
+def test_rejected_hedge_keeps_waiting_for_primary(hedged_service):
+    primary = Attempt(0.2)
+    hedge = Attempt(0, error=AdmissionRejected("full", status_code=429))
+    service = hedged_service({"openai": primary, "zhipuai": hedge})
+
+    result, llm, _, _ = run_chain(service)
+    assert (result, llm) == (RESULT, "openai")
+    assert not primary.cancelled
+
+
+def test_rejected_primary_fails_fast(hedged_service):
+    primary = Attempt(0, error=AdmissionRejected("busy", status_code=503))
+    hedge = Attempt(0)
+    service = hedged_service({"openai": primary, "zhipuai": hedge})
+
+    with pytest.raises(AdmissionRejected) as e:
+        run_chain(service)
+    assert e.value.status_code == 503
+    assert not hedge.started
+
+
+def test_primary_error_is_raised_when_both_fail(hedged_service):
+    primary = Attempt(0, error=ValueError("bad output"))
+    hedge = Attempt(0, error=AdmissionRejected("full", status_code=429))
+    service = hedged_service({"openai": primary, "zhipuai": hedge})
+
+    with pytest.raises(ValueError):
+        run_chain(service)
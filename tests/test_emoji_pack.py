@@ -0,0 +1,55 @@
+import hashlib
+
+from langchain_emoji.components.image.emoji_pack import EmojiPack
+
+
+def test_build_serves_images_from_the_pack(tmp_path):
+    src = tmp_path / "emo"
+    src.mkdir()
+    (src / "a.gif").write_bytes(b"GIF89a-a")
+    (src / "b.png").write_bytes(b"PNG-b")
+
+    pack = EmojiPack.build(src, tmp_path / "pack")
+    assert len(pack) == 2
+    assert bytes(pack.get("b.png")) == b"PNG-b"
+    assert pack.entry("a.gif").md5 == hashlib.md5(b"GIF89a-a").hexdigest()
+    assert pack.get("missing.gif") is None
+
+
+def test_append_replaces_changed_files_only(tmp_path):
+    src = tmp_path / "emo"
+    src.mkdir()
+    (src / "a.gif").write_bytes(b"old")
+    pack = EmojiPack.build(src, tmp_path / "pack")
+    old = pack.get("a.gif")
+
+    (src / "a.gif").write_bytes(b"new!")
+    (src / "c.gif").write_bytes(b"c")
+    assert pack.append_files([src / "a.gif", src / "c.gif"]) == 2
+    assert pack.append_files([src / "a.gif"]) == 0
+    # 已返回的旧切片不受追加影响, 重新读取时得到最后写入的内容
+    assert bytes(old) == b"old"
+    assert bytes(pack.get("a.gif")) == b"new!"
+
+    reopened = EmojiPack(tmp_path / "pack")
+    assert bytes(reopened.get("a.gif")) == b"new!" and "c.gif" in reopened
+
+
+def test_truncated_index_line_is_skipped_and_overwritten(tmp_path):
+    src = tmp_path / "emo"
+    src.mkdir()
+    (src / "a.gif").write_bytes(b"a")
+    (src / "b.gif").write_bytes(b"b")
+    EmojiPack.build(src, tmp_path / "pack")
+    index_file = tmp_path / "pack" / "emoji.idx.jsonl"
+    # 模拟追加索引时进程中断, 最后一行只写入了一半
+    with open(index_file, "a", encoding="utf-8") as f:
+        f.write('{"filename": "c.gif", "off')
+
+    pack = EmojiPack(tmp_path / "pack")
+    assert len(pack) == 2 and bytes(pack.get("b.gif")) == b"b"
+
+    (src / "c.gif").write_bytes(b"c")
+    assert pack.append_files([src / "c.gif"]) == 1
+    reopened = EmojiPack(tmp_path / "pack")
+    assert len(reopened) == 3 and bytes(reopened.get("c.gif")) == b"c"
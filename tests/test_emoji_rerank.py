@@ -0,0 +1,23 @@
+from langchain.schema.document import Document
+
+from langchain_emoji.server.emoji.emoji_rerank import lexical_overlap, lexical_rerank
+
+
+def docs(*contents: str):
+    return [Document(page_content=content) for content in contents]
+
+
+def test_lexical_overlap_uses_character_bigrams():
+    assert lexical_overlap("开心大笑", "一只开心大笑的猫") == 1.0
+    assert lexical_overlap("开心大笑", "难过") == 0.0
+    assert lexical_overlap("", "开心") == 0.0
+
+
+def test_rerank_promotes_lexical_matches_and_keeps_order_without_weight():
+    candidates = docs("难过的狗", "生气的猫", "开心大笑的猫")
+
+    reranked = lexical_rerank("开心大笑", candidates, weight=0.8)
+    assert reranked[0].page_content == "开心大笑的猫"
+    # 词面得分相同时保持向量相似度顺序
+    assert [d.page_content for d in reranked[1:]] == ["难过的狗", "生气的猫"]
+    assert lexical_rerank("开心大笑", candidates, weight=0) == candidates
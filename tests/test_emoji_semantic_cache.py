@@ -0,0 +1,86 @@
+import asyncio
+
+from langchain_core.runnables import RunnableLambda
+
+from langchain_emoji.components.embedding.embedding_proxy import (
+    prefetched_embeddings_var,
+)
+from langchain_emoji.server.emoji.emoji_semantic_cache import EmojiSemanticCache
+from langchain_emoji.server.emoji.emoji_service import EmojiRequest
+from langchain_emoji.settings.settings import EmojiSemanticCacheSettings
+
+EMOJIINFO = {"filename": "a.gif", "content": "a"}
+
+
+def test_flush_saves_entries_below_persist_interval(tmp_path):
+    cache_settings = EmojiSemanticCacheSettings(
+        enabled=True, threshold=0.9, persist_interval=50
+    )
+    cache = EmojiSemanticCache(cache_settings, tmp_path)
+    assert cache.add("hi", "openai", [1.0, 0.0], EMOJIINFO) is False
+    cache.flush()
+
+    reloaded = EmojiSemanticCache(cache_settings, tmp_path)
+    entry, _ = reloaded.lookup([1.0, 0.1], "openai")
+    assert entry.prompt == "hi"
+    assert reloaded.lookup([1.0, 0.1], "zhipuai") is None
+
+
+def test_lookup_only_matches_entries_of_the_llm():
+    cache = EmojiSemanticCache(
+        EmojiSemanticCacheSettings(enabled=True, threshold=0.9, capacity=2)
+    )
+    cache.add("a", "openai", [1.0, 0.0], EMOJIINFO)
+    cache.add("b", "zhipuai", [1.0, 0.05], EMOJIINFO)
+    assert cache.lookup([1.0, 0.0], "zhipuai")[0].prompt == "b"
+    assert cache.lookup([1.0, 0.0], "deepseek") is None
+
+    # 容量已满, 覆盖最久未访问的 openai 条目后该 llm 不再命中
+    cache.add("c", "zhipuai", [0.0, 1.0], EMOJIINFO)
+    assert cache.lookup([1.0, 0.0], "openai") is None
+    assert cache.lookup([0.0, 1.0], "zhipuai")[0].prompt == "c"
+
+
+def enable_semantic_cache(service):
+    service.semantic_cache = EmojiSemanticCache(
+        EmojiSemanticCacheSettings(enabled=True, threshold=0.9)
+    )
+    # 关闭 embedding 缓存, 每次查询语义缓存都产生 embedding 用量
+    service.vector_service.embedcom.embedding.cache = None
+
+
+def test_semantic_cache_miss_reuses_prompt_vector_in_chain(emoji_service):
+    enable_semantic_cache(emoji_service)
+    seen = []
+    chain = emoji_service.chain
+
+    async def invoke(inputs, config):
+        # 检索阶段通过 EmbeddingProxy 读取到已计算的向量
+        seen.append(prefetched_embeddings_var.get())
+        return await chain.ainvoke(inputs, config)
+
+    emoji_service.chain = RunnableLambda(invoke)
+
+    body = EmojiRequest(prompt="开心", req_id="r1", llm="openai")
+    response = asyncio.run(emoji_service.get_emoji(body))
+    assert list(seen[0]) == ["开心"]
+    # 查询向量只计算一次, 检索阶段不重复产生用量
+    assert response.token_info.embedding_tokens == 1
+    entry, _ = emoji_service.semantic_cache.lookup(seen[0]["开心"], "openai")
+    assert entry.prompt == "开心"
+    assert prefetched_embeddings_var.get() is None
+
+
+def test_semantic_cache_hit_reports_lookup_embedding_tokens(emoji_service):
+    enable_semantic_cache(emoji_service)
+    body = EmojiRequest(prompt="开心", req_id="r1", llm="openai")
+    first = asyncio.run(emoji_service.get_emoji(body))
+
+    # 返回方式不同, 精确缓存未命中, 由语义缓存命中
+    hit = asyncio.run(
+        emoji_service.get_emoji(body.model_copy(update={"response_mode": "url"}))
+    )
+    assert hit.cache_hit and hit.run_id == first.run_id
+    assert hit.emojidetail.url.endswith("/a.gif")
+    assert hit.token_info.embedding_tokens == hit.token_info.total_tokens == 1
+    assert emoji_service.semantic_cache.hits == 1
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+
+from langchain_emoji.server.emoji.emoji_service import EmojiRequest
+from langchain_emoji.utils.singleflight import SingleFlight
+
+
+def test_singleflight_runs_once_and_shares_result():
+    flight: SingleFlight[int] = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 42
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(3)))
+
+    results = asyncio.run(run())
+    assert results == [(42, False), (42, True), (42, True)]
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "followers": 2}
+
+
+def test_singleflight_propagates_errors_and_forgets_key():
+    flight: SingleFlight[int] = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        results = await asyncio.gather(
+            flight.do("k", fail), flight.do("k", fail), return_exceptions=True
+        )
+        # 失败后 key 被移除, 下一次调用重新执行
+        retry = await flight.do("k", lambda: asyncio.sleep(0, result=1))
+        return results, retry
+
+    results, retry = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert retry == (1, False)
+
+
+def test_singleflight_follower_cancel_does_not_cancel_leader():
+    flight: SingleFlight[int] = SingleFlight()
+
+    async def run():
+        leader = asyncio.create_task(
+            flight.do("k", lambda: asyncio.sleep(0.05, result=7))
+        )
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", lambda: None))
+        await asyncio.sleep(0)
+        follower.cancel()
+        return await leader
+
+    assert asyncio.run(run()) == (7, False)
+
+
+def record_chain_calls(service, chain_calls):
+    ainvoke_chain = service.ainvoke_chain
+
+    async def record(body):
+        chain_calls.append(body.req_id)
+        await asyncio.sleep(0.01)
+        return await ainvoke_chain(body)
+
+    service.ainvoke_chain = record
+
+
+def test_coalesced_requests_share_the_producing_run_id(emoji_service, caplog):
+    chain_calls = []
+    record_chain_calls(emoji_service, chain_calls)
+
+    async def run():
+        return await asyncio.gather(
+            emoji_service.get_emoji(EmojiRequest(prompt="hi", req_id="leader")),
+            emoji_service.get_emoji(EmojiRequest(prompt="hi", req_id="follower")),
+        )
+
+    with caplog.at_level(logging.INFO):
+        leader, follower = asyncio.run(run())
+
+    # 只有发起执行的请求进入 chain (及其 LangSmith metadata)
+    assert chain_calls == ["leader"]
+    assert leader.run_id is not None and leader.run_id == follower.run_id
+    assert not leader.coalesced and follower.coalesced
+    assert leader.token_info.total_tokens == 1
+    assert follower.token_info.total_tokens == 0
+    assert "coalesced req_id: follower into req_id: leader" in caplog.text
+
+
+def test_different_prompts_are_not_coalesced(emoji_service):
+    chain_calls = []
+    record_chain_calls(emoji_service, chain_calls)
+
+    async def run():
+        return await asyncio.gather(
+            emoji_service.get_emoji(EmojiRequest(prompt="a", req_id="a")),
+            emoji_service.get_emoji(EmojiRequest(prompt="b", req_id="b")),
+        )
+
+    responses = asyncio.run(run())
+    assert sorted(chain_calls) == ["a", "b"]
+    assert not any(r.coalesced for r in responses)
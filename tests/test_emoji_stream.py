@@ -0,0 +1,44 @@
+import asyncio
+
+from langchain_emoji.server.emoji.emoji_service import EmojiRequest
+
+
+def collect(service, body):
+    async def run():
+        return [event async for event in service.stream_emoji(body)]
+
+    return asyncio.run(run())
+
+
+def test_stream_emits_events_in_order(emoji_service):
+    body = EmojiRequest(prompt="开心", req_id="r1", llm="openai")
+
+    events = collect(emoji_service, body)
+    assert [name for name, _ in events] == [
+        "candidates",
+        "emojiinfo",
+        "emojidetail",
+        "done",
+    ]
+    candidates = {emoji["filename"] for emoji in events[0][1]["emojis"]}
+    assert candidates == {"a.gif", "b.gif"}
+    assert events[1][1] == {"filename": "a.gif", "content": "开心 大笑"}
+    assert events[2][1]["base64"]
+    done = events[3][1]
+    assert done["run_id"] and not done["cache_hit"]
+    # 检索阶段的 embedding 用量计入 token 统计
+    assert done["token_info"]["embedding_tokens"] == 1
+    assert emoji_service.admission.stats()["llms"]["openai"]["in_flight"] == 0
+
+
+def test_stream_cache_hit_skips_candidates(emoji_service):
+    body = EmojiRequest(prompt="开心", req_id="r1", llm="openai")
+    first = dict(collect(emoji_service, body))
+
+    events = collect(emoji_service, body.model_copy(update={"req_id": "r2"}))
+    # 命中缓存不执行 chain, 没有候选事件
+    assert [name for name, _ in events] == ["emojiinfo", "emojidetail", "done"]
+    done = events[2][1]
+    assert done["cache_hit"] and done["run_id"] == first["done"]["run_id"]
+    assert done["token_info"]["total_tokens"] == 0
+    assert emoji_service.admission.stats()["llms"]["openai"]["admitted"] == 1
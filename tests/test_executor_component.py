@@ -0,0 +1,95 @@
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from langchain_emoji.components.embedding.embedding_component import (
+    EmbeddingComponent,
+)
+from langchain_emoji.components.executor.executor_component import (
+    ExecutorComponent,
+    MeteredExecutor,
+)
+from langchain_emoji.settings.settings import ExecutorSettings, settings
+
+request_id: contextvars.ContextVar[str] = contextvars.ContextVar("request_id")
+
+
+@pytest.fixture
+def executors():
+    executors = ExecutorComponent(settings())
+    yield executors
+    executors.shutdown()
+
+
+def test_run_uses_named_pool_and_caller_context(executors):
+    def work():
+        return threading.current_thread().name, request_id.get()
+
+    async def run():
+        request_id.set("r1")
+        return await executors.run("storage", work)
+
+    thread, value = asyncio.run(run())
+    assert thread.startswith("storage") and value == "r1"
+    assert executors.stats()["storage"]["completed"] == 1
+
+    with pytest.raises(KeyError, match="available"):
+        executors.get("missing")
+    # 同名线程池只创建一次
+    assert executors.create("storage", 99) is executors.get("storage")
+
+
+def test_metered_executor_tracks_queue_and_failures():
+    executor = MeteredExecutor("test", 1)
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait()
+
+    blocker = executor.submit(block)
+    started.wait()
+    queued = executor.submit(lambda: 1 / 0)
+    assert executor.stats()["queued"] == 1
+
+    release.set()
+    blocker.result()
+    with pytest.raises(ZeroDivisionError):
+        queued.result()
+    stats = executor.stats()
+    assert (stats["completed"], stats["failed"], stats["queued"]) == (2, 1, 0)
+    assert stats["peak_queued"] == 1
+    executor.shutdown()
+
+
+def test_partial_pool_override_keeps_the_default_pools():
+    test_settings = settings().model_copy(deep=True)
+    test_settings.executor = ExecutorSettings(pools={"llm": 2})
+    executors = ExecutorComponent(test_settings)
+
+    async def run():
+        executors.install_default()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: threading.current_thread().name)
+
+    try:
+        assert executors.get("llm").max_workers == 2
+        assert executors.get("storage").max_workers == 8
+        # run_in_executor(None) 使用独立的 default 线程池, 不占用 llm 线程
+        assert asyncio.run(run()).startswith("default")
+    finally:
+        executors.shutdown()
+
+
+def test_zhipuai_embedding_pool_is_registered(executors):
+    test_settings = settings().model_copy(deep=True)
+    test_settings.embedding.mode = "zhipuai"
+    test_settings.embedding.max_concurrency = 3
+    test_settings.zhipuai.api_key = "test-key"
+
+    component = EmbeddingComponent(test_settings, None, executors)
+    pool = executors.get("embedding")
+    assert component.embedding.embedding.executor is pool
+    assert executors.stats()["embedding"]["max_workers"] == 3
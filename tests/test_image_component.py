@@ -0,0 +1,85 @@
+import asyncio
+import threading
+
+import pytest
+from injector import Injector
+from PIL import Image
+
+from langchain_emoji.components.executor.executor_component import ExecutorComponent
+from langchain_emoji.components.image.image_component import ImageComponent
+from langchain_emoji.settings.settings import settings
+from langchain_emoji.utils.cache import LRUCache
+
+
+@pytest.fixture
+def image_component(tmp_path):
+    test_settings = settings().model_copy(deep=True)
+    test_settings.dataset.mode = "local"
+    test_settings.image.pack.enabled = False
+    test_settings.image.cache.warmup_file = None
+    executors = ExecutorComponent(test_settings)
+    component = ImageComponent(test_settings, Injector(), executors)
+    component.emo_dir = tmp_path / "emo"
+    component.variants_dir = tmp_path / "variants"
+    component.emo_dir.mkdir()
+    yield component
+    executors.shutdown()
+
+
+def record_threads(component, name):
+    threads = []
+    func = getattr(component, name)
+
+    def wrapper(*args):
+        threads.append(threading.current_thread().name)
+        return func(*args)
+
+    setattr(component, name, wrapper)
+    return threads
+
+
+def test_aget_bytes_reads_local_files_in_storage_pool(image_component):
+    (image_component.emo_dir / "a.gif").write_bytes(b"GIF89a")
+    threads = record_threads(image_component, "_load")
+
+    assert asyncio.run(image_component.aget_bytes("a.gif")) == b"GIF89a"
+    assert asyncio.run(image_component.aget_bytes("missing.gif")) is None
+    assert len(threads) == 2
+    assert all(name.startswith("storage") for name in threads)
+
+    # 命中缓存时不再读取磁盘
+    assert asyncio.run(image_component.aget_bytes("a.gif")) == b"GIF89a"
+    assert len(threads) == 2
+
+
+def test_lru_evicts_least_recently_used_over_bytes_budget():
+    cache = LRUCache(maxsize=10, maxbytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.get("a")
+    cache.set("c", b"1234")
+
+    assert "b" not in cache
+    assert cache.get("a") == b"1234" and cache.get("c") == b"1234"
+    assert cache.weight == 8
+    # 超出整个预算的条目不缓存
+    cache.set("big", b"x" * 11)
+    assert "big" not in cache and cache.weight == 8
+
+
+def test_aget_variant_offloads_disk_access(image_component):
+    Image.new("RGB", (400, 200), "red").save(image_component.emo_dir / "a.png")
+    reads = record_threads(image_component, "_read_variant")
+    writes = record_threads(image_component, "_store_variant")
+
+    content = asyncio.run(image_component.aget_variant("a.png", 128, "webp"))
+    with Image.open(image_component.variants_dir / "a_128.webp") as img:
+        assert img.size == (128, 64)
+    assert (image_component.variants_dir / "a_128.webp").read_bytes() == content
+    assert reads and writes
+    assert all(name.startswith("storage") for name in reads + writes)
+
+    # 内存未命中时从磁盘缓存读取, 不再重新生成
+    image_component._bytes.clear()
+    assert asyncio.run(image_component.aget_variant("a.png", 128, "webp")) == content
+    assert len(writes) == 1
@@ -0,0 +1,60 @@
+import pytest
+from minio.error import MinioException
+
+from langchain_emoji.components.executor.executor_component import ExecutorComponent
+from langchain_emoji.components.minio.minio_component import MinioComponent
+from langchain_emoji.settings.settings import MinioSettings, settings
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.fail = False
+        self.signed = 0
+
+    def presigned_get_object(self, bucket_name, file_name, expires):
+        if self.fail:
+            raise MinioException("presign failed")
+        self.signed += 1
+        return f"https://minio.test/{bucket_name}/{file_name}?v={self.signed}"
+
+
+@pytest.fixture
+def minio_component():
+    test_settings = settings().model_copy(deep=True)
+    test_settings.minio = MinioSettings(
+        host="minio.test:9000", bucket_name="emoji", access_key="a", secret_key="s"
+    )
+    executors = ExecutorComponent(test_settings)
+    component = MinioComponent(test_settings, executors)
+    component.minio_client = FakeClient()
+    yield component
+    executors.shutdown()
+
+
+def test_refresh_counts_only_successful_presigns(minio_component):
+    url = minio_component.get_download_link("a.gif")
+    assert url.endswith("v=1")
+
+    minio_component.minio_client.fail = True
+    minio_component._refresh("a.gif")
+    assert minio_component.refreshes == 0
+    # 签名失败时继续使用缓存中的旧链接
+    assert minio_component.get_download_link("a.gif") == url
+
+    minio_component.minio_client.fail = False
+    minio_component._refresh("a.gif")
+    assert minio_component.refreshes == 1
+    assert minio_component.get_download_link("a.gif").endswith("v=2")
+    assert minio_component.stats()["presigned_links"]["refreshing"] == 0
+
+
+def test_stale_link_is_returned_while_refreshed_in_background(minio_component):
+    minio_component.minio_settings.presign_refresh_after = 1
+    url = minio_component.get_download_link("a.gif")
+    # 签名时间提前, 模拟链接已超过刷新阈值
+    minio_component._links.set("a.gif", (url, 0.0))
+
+    assert minio_component.get_download_link("a.gif") == url
+    minio_component._executor.shutdown(wait=True)
+    assert minio_component.refreshes == 1
+    assert minio_component.get_download_link("a.gif").endswith("v=2")
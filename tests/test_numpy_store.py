@@ -0,0 +1,51 @@
+import asyncio
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from langchain_emoji.components.vector_store.numpy_store.numpy_store import (
+    EmojiNumpyStore,
+)
+
+TEXTS = ["开心地笑", "难过地哭", "生气地跺脚"]
+FILENAMES = ["happy.gif", "sad.gif", "angry.gif"]
+
+
+def make_store(tmp_path) -> EmojiNumpyStore:
+    return EmojiNumpyStore("emoji", DeterministicFakeEmbedding(size=16), str(tmp_path))
+
+
+def test_search_filters_by_filename_and_survives_reopen(tmp_path):
+    store = make_store(tmp_path)
+    ids = store.add_original_texts_with_filenames(FILENAMES, TEXTS, batch_size=2)
+    assert len(ids) == 3
+
+    assert store.similarity_search(TEXTS[1], k=1)[0].metadata["filename"] == "sad.gif"
+    docs = store.similarity_search_by_filenames(TEXTS[1], ["happy.gif", "angry.gif"])
+    assert {doc.metadata["filename"] for doc in docs} == {"happy.gif", "angry.gif"}
+
+    reopened = make_store(tmp_path)
+    assert reopened.similarity_search(TEXTS[2], k=1)[0].page_content == TEXTS[2]
+
+
+def test_delete_only_removes_ids_of_the_given_filenames(tmp_path):
+    store = make_store(tmp_path)
+    ids = store.add_original_texts_with_filenames(FILENAMES, TEXTS)
+
+    store.delete_texts_with_filenames(ids[:2], filenames=["sad.gif"])
+    remaining = {doc.page_content for doc in store.similarity_search("x", k=3)}
+    assert remaining == {TEXTS[0], TEXTS[2]}
+
+
+def test_async_methods_match_sync_results(tmp_path):
+    store = make_store(tmp_path)
+
+    async def run():
+        ids = await store.aadd_original_texts_with_filenames(FILENAMES, TEXTS)
+        found = await store.asimilarity_search(TEXTS[0], k=1)
+        await store.adelete_texts_with_filenames(ids[:1])
+        after = await store.asimilarity_search_by_filenames(TEXTS[0], ["happy.gif"])
+        return found, after
+
+    found, after = asyncio.run(run())
+    assert found[0].metadata["filename"] == "happy.gif"
+    assert after == []
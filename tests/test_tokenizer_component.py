@@ -0,0 +1,45 @@
+import pytest
+
+from langchain_emoji.components.tokenizer.tokenizer_component import (
+    PromptTooLong,
+    TokenizerComponent,
+)
+
+
+class WordEncoding:
+    """One token per word, stands in for a tiktoken encoding without the BPE files"""
+
+    def encode_ordinary(self, text):
+        return text.split()
+
+    def encode_ordinary_batch(self, texts, num_threads):
+        return [text.split() for text in texts]
+
+
+def make_tokenizer(max_prompt_tokens: int) -> TokenizerComponent:
+    tokenizer = TokenizerComponent.__new__(TokenizerComponent)
+    tokenizer.default_encoding = "cl100k_base"
+    tokenizer.batch_threads = 1
+    tokenizer.max_prompt_tokens = max_prompt_tokens
+    tokenizer._names = {"zhipuai": "cl100k_base"}
+    tokenizer._encodings = {"cl100k_base": WordEncoding()}
+    return tokenizer
+
+
+def test_check_prompt_enforces_the_limit():
+    tokenizer = make_tokenizer(max_prompt_tokens=3)
+    assert tokenizer.check_prompt("a b c", "zhipuai") == 3
+    with pytest.raises(PromptTooLong) as e:
+        tokenizer.check_prompt("a b c d", "unknown")
+    assert (e.value.tokens, e.value.limit) == (4, 3)
+    # 0 表示不限制
+    assert make_tokenizer(max_prompt_tokens=0).check_prompt("a b c d") == 4
+
+
+def test_check_budget_sums_batch_counts():
+    tokenizer = make_tokenizer(max_prompt_tokens=0)
+    counts = tokenizer.count_batch(["a b", "c"])
+    assert counts == [2, 1]
+    tokenizer.check_budget(counts, 3)
+    with pytest.raises(PromptTooLong):
+        tokenizer.check_budget(counts, 2)
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from langchain_emoji.components.vector_store.numpy_store.vector_index import (
+    NumpyVectorIndex,
+)
+
+
+def random_vectors(n: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def add_all(index: NumpyVectorIndex, vectors: np.ndarray) -> None:
+    ids = [str(i) for i in range(len(vectors))]
+    index.add(vectors, ids, metadatas=[{"filename": f"{i}.gif"} for i in ids], ids=ids)
+
+
+@pytest.mark.parametrize("quantization", ["float16", "int8"])
+def test_quantized_recall_matches_float32(tmp_path, quantization):
+    vectors, queries = random_vectors(500), random_vectors(20, seed=1)
+    exact = NumpyVectorIndex(tmp_path / "exact")
+    quantized = NumpyVectorIndex(tmp_path / "q", quantization=quantization, rescore=20)
+    add_all(exact, vectors)
+    add_all(quantized, vectors)
+
+    hits = 0
+    for query in queries:
+        expected = {doc["id"] for doc, _ in exact.search(query, k=10)}
+        hits += len(expected & {doc["id"] for doc, _ in quantized.search(query, k=10)})
+    assert hits / (10 * len(queries)) >= 0.95
+    assert quantized.nbytes < exact.nbytes
+
+
+def test_deleted_rows_are_reused_and_not_returned(tmp_path):
+    vectors = random_vectors(4)
+    index = NumpyVectorIndex(tmp_path, initial_capacity=4)
+    add_all(index, vectors)
+
+    assert index.delete(["1"]) == 1
+    assert all(doc["id"] != "1" for doc, _ in index.search(vectors[1], k=4))
+    assert index.search(vectors[0], k=4, filenames=["1.gif"]) == []
+
+    index.add(vectors[1:2], ["new"], ids=["new"])
+    # 新文档复用被删除的行, 矩阵无需扩容
+    assert index._rows["new"] == 1
+    assert index._matrix.shape[0] == 4
+    assert index.search(vectors[1], k=1)[0][0]["id"] == "new"
+
+
+def test_docs_log_is_replayed_and_compacted(tmp_path):
+    vectors = random_vectors(3)
+    index = NumpyVectorIndex(tmp_path)
+    add_all(index, vectors)
+    index.delete(["0"])
+    index.add(vectors[:1], ["again"], ids=["again"])
+    # docs.json 只在首次写入时生成, 之后的变更追加到日志
+    assert index.log_file.is_file()
+
+    reopened = NumpyVectorIndex(tmp_path)
+    assert reopened.get("0") is None and reopened.get("again")["text"] == "again"
+    assert reopened.search(vectors[0], k=1)[0][0]["id"] == "again"
+
+    reopened._compact()
+    assert not reopened.log_file.is_file()
+    assert NumpyVectorIndex(tmp_path)._docs == reopened._docs
+
+
+def test_search_drops_rows_rewritten_while_scoring(tmp_path):
+    vectors = random_vectors(2)
+    index = NumpyVectorIndex(tmp_path)
+    add_all(index, vectors)
+    score = index._score
+
+    def score_during_update(*args):
+        # 打分在锁外进行, 期间写入不被阻塞
+        index._score = score
+        index.delete(["0"])
+        index.add(vectors[1:2], ["other"], ids=["other"])
+        return score(*args)
+
+    index._score = score_during_update
+    results = index.search(vectors[0], k=2)
+    assert [doc["id"] for doc, _ in results] == ["1"]
+
+
+def test_reopening_with_other_quantization_is_rejected(tmp_path):
+    vectors = random_vectors(2)
+    add_all(NumpyVectorIndex(tmp_path, quantization="int8"), vectors)
+
+    with pytest.raises(ValueError, match="rebuild"):
+        NumpyVectorIndex(tmp_path, quantization="float16")
+    with pytest.raises(ValueError, match="rebuild"):
+        NumpyVectorIndex(tmp_path, quantization="int8", rescore=10)
+    index = NumpyVectorIndex(tmp_path, quantization="int8")
+    assert index.search(vectors[0], k=1)[0][0]["id"] == "0"
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from injector import Injector
+
+from langchain_emoji.server.utils.model import PayloadTooLargeErrorCode
+from langchain_emoji.server.vector_store.vector_store_router import (
+    BulkBodyTooLarge,
+    parse_bulk_body,
+    vector_store_router,
+)
+from langchain_emoji.server.vector_store.vector_store_server import (
+    BulkEmojiResult,
+    VectorStoreService,
+)
+
+RECORDS = [
+    {"content": "开心", "filename": "a.gif"},
+    {"content": "难过", "filename": "b.gif"},
+]
+
+
+def test_parse_json_array_and_jsonl_alike():
+    array_items, array_errors = parse_bulk_body(json.dumps(RECORDS).encode())
+    jsonl = "\n".join(json.dumps(r, ensure_ascii=False) for r in RECORDS)
+    jsonl_items, jsonl_errors = parse_bulk_body(("\ufeff" + jsonl + "\n\n").encode())
+
+    assert array_items == jsonl_items
+    assert [item.filename for item in array_items] == ["a.gif", "b.gif"]
+    assert array_errors == jsonl_errors == {}
+
+
+def test_parse_jsonl_reports_invalid_lines_by_position():
+    body = b'{"content": "a", "filename": "a.gif"}\nnot json\n{"content": "c"}\n'
+    items, errors = parse_bulk_body(body)
+
+    assert items[0].content == "a" and items[1] is None and items[2] is None
+    assert errors[1].startswith("invalid json")
+    assert errors[2].startswith("invalid record")
+
+
+def test_parse_rejects_too_many_records():
+    with pytest.raises(BulkBodyTooLarge):
+        parse_bulk_body(b"{}\n{}\n{}", max_items=2)
+    with pytest.raises(BulkBodyTooLarge):
+        parse_bulk_body(b"[{}, {}, {}]", max_items=2)
+
+
+@pytest.fixture
+def client():
+    service = VectorStoreService.__new__(VectorStoreService)
+    service.bulk_max_items = 10
+    service.bulk_max_bytes = 256
+
+    async def bulk_add_emoji(items, batch_size=None):
+        return [
+            BulkEmojiResult(index=i, filename=item.filename, vdb_id=str(i))
+            for i, item in enumerate(items)
+        ]
+
+    service.bulk_add_emoji = bulk_add_emoji
+    injector = Injector()
+    injector.binder.bind(VectorStoreService, to=service)
+
+    async def bind_injector_to_request(request: Request) -> None:
+        request.state.injector = injector
+
+    app = FastAPI(dependencies=[Depends(bind_injector_to_request)])
+    app.include_router(vector_store_router)
+    return TestClient(app)
+
+
+def test_bulk_add_merges_parse_errors_in_order(client):
+    body = b'{"content": "a", "filename": "a.gif"}\nnot json\n[]\n'
+    response = client.post("/v1/vector_store/bulk_add_emoji", content=body)
+
+    results = response.json()["data"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert results[0]["error"] is None and results[0]["vdb_id"] == "0"
+    assert results[1]["error"].startswith("invalid json")
+    assert results[2]["error"].startswith("invalid record")
+
+
+def test_bulk_add_rejects_oversized_bodies(client):
+    def chunks():
+        yield b'{"content": "a"}\n' * 10
+        yield b'{"content": "a"}\n' * 10
+
+    # 无 Content-Length 的分块请求在读取过程中超限
+    response = client.post("/v1/vector_store/bulk_add_emoji", content=chunks())
+    assert response.status_code == 413
+    assert response.json()["code"] == PayloadTooLargeErrorCode
+
+    response = client.post("/v1/vector_store/bulk_add_emoji", content=b" " * 257)
+    assert response.status_code == 413
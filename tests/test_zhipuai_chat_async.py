@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+import zhipuai
+
+from langchain_emoji.components.llm.custom.zhipuai.zhipuai_custom import (
+    ChatZhipuAI,
+)
+
+COMPLETION = {
+    "id": "task-1",
+    "created": 1,
+    "choices": [
+        {
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": "hi"},
+        }
+    ],
+    "usage": {"total_tokens": 3},
+}
+
+
+def make_llm(handler, **kwargs) -> ChatZhipuAI:
+    llm = ChatZhipuAI(api_key="test-key", max_retries=1, **kwargs)
+
+    def get_async_client() -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client, client_loop = llm.async_client or (None, None)
+        if client is None or client_loop is not loop:
+            client = httpx.AsyncClient(
+                base_url="https://zhipu.test/api/paas/v4",
+                transport=httpx.MockTransport(handler),
+            )
+            llm.async_client = (client, loop)
+        return client
+
+    object.__setattr__(llm, "_get_async_client", get_async_client)
+    return llm
+
+
+def test_asend_sends_sdk_auth_headers():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=COMPLETION)
+
+    llm = make_llm(handler)
+    result = asyncio.run(llm.async_completions(model="glm-4", temperature=0))
+
+    assert result == COMPLETION
+    request = requests[0]
+    assert request.url.path == "/api/paas/v4/chat/completions"
+    assert request.headers["Authorization"] == "test-key"
+    body = json.loads(request.content)
+    # 与 SDK 一致: temperature <= 0 时关闭采样
+    assert body["do_sample"] is False
+    assert body["temperature"] == 0.01
+
+
+def test_ainvoke_over_asyncio_transport():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=COMPLETION)
+
+    llm = make_llm(handler)
+    message = asyncio.run(llm.ainvoke("hello"))
+    assert message.content == "hi"
+
+
+def test_astream_parses_server_sent_events():
+    events = [
+        {"choices": [{"index": 0, "delta": {"role": "assistant", "content": "h"}}]},
+        {"choices": [{"index": 0, "delta": {"content": "i"}, "finish_reason": "stop"}]},
+    ]
+    body = "".join(f"data: {json.dumps(e)}\n\n" for e in events) + "data: [DONE]\n\n"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, text=body)
+
+    llm = make_llm(handler)
+
+    async def collect():
+        return [chunk.content async for chunk in llm.astream("hello")]
+
+    assert "".join(asyncio.run(collect())) == "hi"
+
+
+def test_asend_maps_status_errors():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(401, json={"error": {"message": "bad key"}})
+
+    llm = make_llm(handler)
+    with pytest.raises(zhipuai.APIStatusError) as e:
+        asyncio.run(llm.async_completions(model="glm-4"))
+    assert "401" in str(e.value)
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import zhipuai
+
+from langchain_emoji.components.embedding.custom.zhipuai.zhipuai_custom import (
+    ZhipuaiTextEmbeddings,
+)
+from langchain_emoji.components.embedding.embedding_error import EmbeddingBatchError
+from langchain_emoji.components.embedding.embedding_usage import get_embedding_usage
+
+
+class FakeEmbeddings:
+    def __init__(self, fail_on=(), flaky=0) -> None:
+        self.fail_on = set(fail_on)
+        self.flaky = flaky
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def create(self, model, input):
+        with self.lock:
+            self.calls.append(list(input))
+            if self.flaky:
+                self.flaky -= 1
+                response = httpx.Response(429, request=httpx.Request("POST", "/"))
+                raise zhipuai.APIReachLimitError("rate limited", response=response)
+        if self.fail_on & set(input):
+            raise ValueError("bad input")
+        # 乱序返回, 调用方按 index 排序
+        data = [
+            SimpleNamespace(index=i, embedding=[float(len(text))])
+            for i, text in enumerate(input)
+        ]
+        return SimpleNamespace(
+            data=data[::-1], usage=SimpleNamespace(total_tokens=len(input))
+        )
+
+
+def make_embeddings(fake: FakeEmbeddings) -> ZhipuaiTextEmbeddings:
+    embeddings = ZhipuaiTextEmbeddings(
+        zhipuai_api_key="test-key", batch_size=2, max_concurrency=2, retry_backoff=0
+    )
+    embeddings.client = SimpleNamespace(embeddings=fake)
+    return embeddings
+
+
+def test_batches_keep_order_and_record_usage():
+    fake = FakeEmbeddings()
+    embeddings = make_embeddings(fake)
+
+    async def run():
+        with get_embedding_usage() as usage:
+            vectors = await embeddings.aembed_documents(["a", "bb", "ccc", "dddd", "e"])
+        return vectors, usage.total_tokens
+
+    vectors, tokens = asyncio.run(run())
+    assert vectors == [[1.0], [2.0], [3.0], [4.0], [1.0]]
+    assert sorted(len(call) for call in fake.calls) == [1, 2, 2]
+    assert tokens == embeddings.count_token == 5
+
+
+def test_failed_batch_keeps_the_other_vectors():
+    embeddings = make_embeddings(FakeEmbeddings(fail_on={"ccc"}))
+
+    with pytest.raises(EmbeddingBatchError) as e:
+        embeddings.embed_documents(["a", "bb", "ccc", "dddd"])
+    assert e.value.vectors == [[1.0], [2.0], None, None]
+    assert sorted(e.value.errors) == [2, 3]
+
+
+def test_rate_limited_requests_are_retried():
+    fake = FakeEmbeddings(flaky=2)
+    embeddings = make_embeddings(fake)
+
+    assert embeddings.embed_query("abc") == [3.0]
+    assert len(fake.calls) == 3
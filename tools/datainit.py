@@ -11,9 +11,13 @@ from minio.error import MinioException
 from langchain_core.vectorstores import VectorStore
 
 import concurrent.futures
+import itertools
+import json
 import threading
-import jsonlines
+import uuid
+from contextlib import nullcontext
 from queue import Queue
+from typing import Dict, Iterator, List, Tuple
 
 import logging
 
@@ -273,90 +277,241 @@ def upload_to_minio(minio_client: Minio, source_dir: Path, bucket_name: str) ->
 # 加载向量数据库
 
 
-def upload_file_vectordb(
-    client: VectorStore,
-    data: dict,
-    failed_files: list,
-    progress_queue: Queue,
-) -> bool:
-    try:
-        filename = data["filename"]
-        content = data["content"]
-
-        if isinstance(client, VectorStore):
-            metadata = {
-                "filename": filename,
-            }
+class VectordbCheckpoint:
+    """Number of leading dataset lines already written to the vector database.
 
-            result = client.add_original_texts_with_filename(
-                filename=filename, texts=[content], metadatas=[metadata]
-            )
-
-            progress_queue.put(1)
-            return bool(result)
+    Chunks finish out of order, so lines are only counted once every chunk before
+    them is done and a resumed run never skips unwritten lines. The checkpoint of
+    another dataset file or vector database is ignored.
+    """
 
-    except Exception as e:
-        logger.error(f"Error uploading {filename} to VectorDB: {e}")
-        failed_files.append(filename)
-        progress_queue.put(1)
+    def __init__(self, path: Path, key: dict, restart: bool = False) -> None:
+        self.path = path
+        self.key = key
+        self.lines_done = 0
+        self.failed = 0
+        # 已完成但前面还有未完成块的数据块: start -> (end, failed)
+        self._finished: Dict[int, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        if not restart:
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return
+        if data.get("key") != self.key:
+            logger.warning(f"Checkpoint {self.path} is for another run, starting over")
+            return
+        self.lines_done = data["lines_done"]
+        self.failed = data["failed"]
+
+    def complete(self, start: int, end: int, failed: int) -> None:
+        with self._lock:
+            self._finished[start] = (end, failed)
+            if self.lines_done not in self._finished:
+                return
+            while self.lines_done in self._finished:
+                end, failed = self._finished.pop(self.lines_done)
+                self.lines_done = end
+                self.failed += failed
+            self._save()
+
+    def _save(self) -> None:
+        data = {"key": self.key, "lines_done": self.lines_done, "failed": self.failed}
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def read_chunks(
+    dataset_file: Path, skip_lines: int, chunk_size: int
+) -> Iterator[Tuple[int, List[str]]]:
+    """Yield (first line number, lines) chunks of the dataset after skip_lines"""
+    with open(dataset_file, encoding="utf-8") as f:
+        chunk: List[str] = []
+        start = skip_lines
+        for line in itertools.islice(f, skip_lines, None):
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield start, chunk
+                start += len(chunk)
+                chunk = []
+        if chunk:
+            yield start, chunk
+
+
+def record_id(dataset: str, line_no: int, filename: str) -> str:
+    """Stable vector database id of a dataset record"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{dataset}:{line_no}:{filename}"))
+
+
+def upload_chunk_vectordb(
+    client: VectorStore, lines: List[str], start: int = 0, dataset: str = ""
+) -> List[str]:
+    """
+    Embed and upsert one chunk of dataset lines with one call each.
 
+    `start` is the line number of the first line. Records get ids derived from
+    `dataset` and their line number, so uploading a chunk again (e.g. on resume)
+    replaces its records instead of duplicating them.
 
-def upload_vectordb(client: VectorStore, dataset_file: str) -> bool:
+    Returns the filenames (or raw lines) of the records that failed alone, an
+    exception means the whole chunk was not written.
+    """
+    from langchain_emoji.components.embedding.embedding_error import (
+        EmbeddingBatchError,
+    )
+    from langchain_emoji.components.embedding.embedding_proxy import (
+        prefetched_embeddings,
+    )
 
-    # 保存上传失败的文件名的文件路径
-    failed_files_path = "vector_failed_files.txt"
-    # 上传失败的文件列表
-    failed_files = []
+    failed = []
+    filenames, texts, ids = [], [], []
+    for line_no, line in enumerate(lines, start):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+            filename, text = data["filename"], data["content"]
+            filenames.append(filename)
+            texts.append(text)
+            ids.append(record_id(dataset, line_no, filename))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Invalid dataset line {line.strip()[:100]}: {e}")
+            failed.append(line.strip())
+    if not texts:
+        return failed
+
+    vectors = None
+    if client.embeddings is not None:
+        # 整块一次 embedding, 部分失败时保留成功的向量
+        try:
+            vectors = client.embeddings.embed_documents(texts)
+        except EmbeddingBatchError as e:
+            vectors = e.vectors
+            for i, error in e.errors.items():
+                logger.error(f"Error embedding {filenames[i]}: {error}")
+                failed.append(filenames[i])
+    keep = [i for i in range(len(texts)) if vectors is None or vectors[i] is not None]
+    if not keep:
+        return failed
+
+    prefetched = (
+        prefetched_embeddings({texts[i]: vectors[i] for i in keep})
+        if vectors is not None
+        else nullcontext()
+    )
+    with prefetched:
+        client.add_original_texts_with_filenames(
+            filenames=[filenames[i] for i in keep],
+            texts=[texts[i] for i in keep],
+            batch_size=len(keep),
+            ids=[ids[i] for i in keep],
+        )
+    return failed
 
-    try:
-        with jsonlines.open(dataset_file) as reader:
 
-            # 使用线程池并发执行文件上传任务
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                futures = []
-                progress_queue = Queue()
-                for json_line in reader:
-                    future = executor.submit(
-                        upload_file_vectordb,
-                        client,
-                        json_line,
-                        failed_files,
-                        progress_queue,
-                    )
-                    futures.append(future)
+def upload_vectordb(
+    client: VectorStore,
+    dataset_file: Path,
+    checkpoint: VectordbCheckpoint,
+    batch_size: int = 256,
+    workers: int = 4,
+) -> bool:
+    """
+    Stream the dataset into the vector database, resuming from the checkpoint.
 
-                # Start the progress tracking thread
-                progress_thread = threading.Thread(
-                    target=track_progress,
-                    args=(len(futures), progress_queue),
-                    daemon=True,
-                )
-                progress_thread.start()
+    A reader fills a bounded queue with chunks of `batch_size` lines and `workers`
+    threads embed and upsert them, so memory holds at most a few chunks. A chunk
+    that fails as a whole stops the run, rerunning resumes at the first unwritten
+    chunk. Records that fail alone are skipped and saved to the failed files list.
+    """
 
-                # 等待所有上传任务完成。
-                for future in concurrent.futures.as_completed(futures):
-                    if not future.result():
-                        # logger.error(f"result error:{future.result()}")
-                        ...
+    # 保存上传失败的文件名的文件路径
+    failed_files_path = "vector_failed_files.txt"
 
-        logger.info(f"All {len(futures)} files uploaded to VectorDB.")
-        # 输出上传成功和失败数量
-        success_count = len(futures) - len(failed_files)
-        logger.info(f"Total files uploaded successfully: {success_count}")
-        logger.info(f"Total files failed to upload: {len(failed_files)}")
+    with open(dataset_file, encoding="utf-8") as f:
+        total = sum(1 for _ in f)
+    if checkpoint.lines_done >= total:
+        logger.info(f"All {total} lines already in VectorDB, use --restart to redo")
+        return True
+    if checkpoint.lines_done:
+        logger.info(f"Resuming from line {checkpoint.lines_done} of {total}")
 
-        # 将上传失败的文件名保存到文件中
-        if failed_files:
-            with open(failed_files_path, "w") as f:
-                f.write("\n".join(failed_files))
+    # 队列满时读取阻塞, 读取速度跟随写入速度
+    chunks: Queue = Queue(maxsize=workers * 2)
+    stop = threading.Event()
+    failed_lock = threading.Lock()
+    errors = []
 
-        progress_thread.join()
+    progress = tqdm(
+        total=total,
+        initial=checkpoint.lines_done,
+        leave=True,
+        ncols=100,
+        file=sys.stdout,
+        desc=f"Total Lines {total}",
+        unit="lines",
+    )
+    # 续传时保留上次运行的失败列表
+    failed_file = open(failed_files_path, "a" if checkpoint.lines_done else "w")
 
-        return True
+    def worker() -> None:
+        while True:
+            item = chunks.get()
+            if item is None:
+                return
+            start, lines = item
+            if stop.is_set():
+                continue
+            try:
+                failed = upload_chunk_vectordb(
+                    client, lines, start, dataset_file.name
+                )
+            except Exception as e:
+                logger.error(f"Error uploading lines {start}-{start + len(lines)}: {e}")
+                errors.append(e)
+                stop.set()
+                continue
+            if failed:
+                with failed_lock:
+                    failed_file.write("".join(f"{name}\n" for name in failed))
+                    failed_file.flush()
+            checkpoint.complete(start, start + len(lines), len(failed))
+            progress.update(len(lines))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    try:
+        for chunk in read_chunks(dataset_file, checkpoint.lines_done, batch_size):
+            if stop.is_set():
+                break
+            chunks.put(chunk)
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for _ in threads:
+            chunks.put(None)
+        for thread in threads:
+            thread.join()
+        progress.close()
+        failed_file.close()
+        logger.info(
+            f"VectorDB lines done: {checkpoint.lines_done}/{total}, "
+            f"failed records: {checkpoint.failed}, checkpoint: {checkpoint.path}"
+        )
 
-    except Exception as err:
-        logger.exception(f"An error occurred: {err}")
+    if errors:
+        logger.error("Upload to VectorDB stopped, rerun to resume from the checkpoint")
         return False
+    return True
 
 
 if __name__ == "__main__":
@@ -369,13 +524,38 @@ if __name__ == "__main__":
     parser.add_argument(
         "--vectordb", action="store_true", help="Vector files to Database"
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Records embedded and upserted per call with --vectordb",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Upload threads with --vectordb"
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the --vectordb checkpoint and upload the whole dataset",
+    )
+    parser.add_argument(
+        "--pack", action="store_true", help="Pack emoji files into one mmap store"
+    )
+    parser.add_argument(
+        "--variants",
+        action="store_true",
+        help="Generate thumbnail and format variants of emoji files",
+    )
 
     args = parser.parse_args()
 
     # 检查是否提供了可选参数
-    if not (args.download or args.upload or args.vectordb):
+    if not (
+        args.download or args.upload or args.vectordb or args.pack or args.variants
+    ):
         print(
-            "提示: 没有提供可选参数 '--download' '--upload '--vectordb'  请至少指定一个操作。"
+            "提示: 没有提供可选参数 '--download' '--upload '--vectordb' '--pack' "
+            "'--variants' 请至少指定一个操作。"
         )
         parser.print_help()
         exit(1)
@@ -434,6 +614,45 @@ if __name__ == "__main__":
             print("upload to minio failed, exit!")
             exit(1)
 
+    if args.variants:
+
+        from langchain_emoji.paths import local_data_path
+        from langchain_emoji.settings.settings import settings
+        from langchain_emoji.components.image.image_variant import generate_variants
+
+        dataset_name = settings().dataset.name
+        variant_settings = settings().image.variant
+        source_dir = local_data_path / dataset_name / "emo"
+        if not (os.path.exists(source_dir) and os.path.isdir(source_dir)):
+            print("emoji datasetdoes not exist, exit!")
+            exit(1)
+
+        failed = generate_variants(
+            source_dir,
+            local_data_path / dataset_name / variant_settings.dir,
+            variant_settings.sizes,
+            variant_settings.formats,
+            variant_settings.quality,
+        )
+        logger.info(f"Generated emoji variants, failed files: {len(failed)}")
+
+    if args.pack:
+
+        from langchain_emoji.paths import local_data_path
+        from langchain_emoji.settings.settings import settings
+        from langchain_emoji.components.image.emoji_pack import EmojiPack
+
+        dataset_name = settings().dataset.name
+        source_dir = local_data_path / dataset_name / "emo"
+        if not (os.path.exists(source_dir) and os.path.isdir(source_dir)):
+            print("emoji datasetdoes not exist, exit!")
+            exit(1)
+
+        pack = EmojiPack.build(
+            source_dir, local_data_path / dataset_name / settings().image.pack.dir
+        )
+        logger.info(f"Packed {len(pack)} emoji files into {pack.data_file}")
+
     if args.vectordb:
 
         from langchain_emoji.paths import local_data_path
@@ -442,9 +661,17 @@ if __name__ == "__main__":
         from langchain_emoji.components.embedding.embedding_component import (
             EmbeddingComponent,
         )
+        from langchain_emoji.components.tokenizer.tokenizer_component import (
+            TokenizerComponent,
+        )
+        from langchain_emoji.components.executor.executor_component import (
+            ExecutorComponent,
+        )
 
-        embed = EmbeddingComponent(settings())
-        vsc = VectorStoreComponent(embed, settings())
+        executors = ExecutorComponent(settings())
+        tokenizer = TokenizerComponent(settings(), executors)
+        embed = EmbeddingComponent(settings(), tokenizer, executors)
+        vsc = VectorStoreComponent(embed, settings(), executors)
 
         dataset_name = settings().dataset.name
         dataset_file = local_data_path / dataset_name / "data.jsonl"
@@ -452,11 +679,29 @@ if __name__ == "__main__":
             print("emoji datajsonl not exist, exit!")
             exit(1)
 
-        # # Upload files to MinIO
-        success = upload_vectordb(vsc.vector_store, dataset_file)
+        # 数据集或目标集合变化后旧的断点失效
+        vectorstore_settings = settings().vectorstore
+        database = vectorstore_settings.database
+        checkpoint = VectordbCheckpoint(
+            local_data_path / dataset_name / "vectordb_checkpoint.json",
+            key={
+                "dataset": str(dataset_file),
+                "size": dataset_file.stat().st_size,
+                "database": database,
+                "collection": getattr(vectorstore_settings, database).collection_name,
+            },
+            restart=args.restart,
+        )
+        success = upload_vectordb(
+            vsc.vector_store,
+            dataset_file,
+            checkpoint,
+            batch_size=args.batch_size or vectorstore_settings.bulk_batch_size,
+            workers=args.workers,
+        )
 
         if not success:
-            print("upload to minio failed, exit!")
+            print("upload to vectordb failed, exit!")
             exit(1)
 
     # 加载进向量数据库
@@ -0,0 +1,103 @@
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from langchain_emoji.components.vector_store.numpy_store.vector_index import (
+    NumpyVectorIndex,
+)
+
+# 对比的存储方式: (名称, 量化方式, 全精度重排候选数)
+MODES = [
+    ("float32", "none", 0),
+    ("float16", "float16", 0),
+    ("int8", "int8", 0),
+    ("int8+rescore", "int8", 10),
+]
+
+
+def load_vectors(source: Optional[Path], count: int, dim: int, seed: int) -> np.ndarray:
+    """Vectors of an existing numpy store, or clustered random vectors"""
+    if source is not None:
+        with open(source / "docs.json", encoding="utf-8") as f:
+            used = [row for row, doc in enumerate(json.load(f)) if doc is not None]
+        matrix = np.load(source / "vectors.npy", mmap_mode="r")
+        if matrix.dtype != np.float32:
+            raise ValueError("benchmark source must be a float32 (unquantized) index")
+        return np.asarray(matrix[used], dtype=np.float32)
+
+    # 模拟 embedding 的聚簇分布, 纯随机向量的近邻区分度过低
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(count // 20, 1), dim))
+    labels = rng.integers(0, centers.shape[0], size=count)
+    return (centers[labels] + 0.3 * rng.normal(size=(count, dim))).astype(np.float32)
+
+
+def make_queries(vectors: np.ndarray, count: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed + 1)
+    picked = vectors[rng.integers(0, vectors.shape[0], size=count)]
+    noise = rng.normal(size=picked.shape) * np.abs(picked).mean()
+    return (picked + noise).astype(np.float32)
+
+
+def run_mode(
+    vectors: np.ndarray, queries: np.ndarray, quantization: str, rescore: int, k: int
+) -> Tuple[List[List[str]], float, int]:
+    with tempfile.TemporaryDirectory() as tmp:
+        index = NumpyVectorIndex(
+            Path(tmp),
+            initial_capacity=len(vectors),
+            quantization=quantization,
+            rescore=rescore,
+        )
+        texts = [str(i) for i in range(len(vectors))]
+        index.add(vectors, texts, ids=texts)
+
+        results = []
+        start = time.perf_counter()
+        for query in queries:
+            results.append([doc["id"] for doc, _ in index.search(query, k=k)])
+        latency = (time.perf_counter() - start) / len(queries)
+        return results, latency, index.nbytes
+
+
+def recall(results: List[List[str]], baseline: List[List[str]]) -> float:
+    hits = sum(len(set(r) & set(b)) for r, b in zip(results, baseline))
+    return hits / sum(len(b) for b in baseline)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Quantized vector storage benchmark, recall@k against float32"
+    )
+    parser.add_argument(
+        "--source", type=Path, default=None, help="numpy store collection directory"
+    )
+    parser.add_argument("--count", type=int, default=5000, help="synthetic vectors")
+    parser.add_argument("--dim", type=int, default=1024, help="synthetic dimension")
+    parser.add_argument("--queries", type=int, default=500, help="number of queries")
+    parser.add_argument("--k", type=int, default=3, help="recall@k")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.source, args.count, args.dim, args.seed)
+    queries = make_queries(vectors, args.queries, args.seed)
+    print(f"vectors: {vectors.shape[0]} x {vectors.shape[1]}, queries: {len(queries)}")
+
+    baseline = None
+    print(f"{'mode':<14}{'recall@' + str(args.k):>10}{'memory':>12}{'latency':>12}")
+    for name, quantization, rescore in MODES:
+        results, latency, nbytes = run_mode(
+            vectors, queries, quantization, rescore, args.k
+        )
+        if baseline is None:
+            baseline = results
+        print(
+            f"{name:<14}{recall(results, baseline):>10.4f}"
+            f"{nbytes / 1024 / 1024:>10.2f}MB{latency * 1000:>10.3f}ms"
+        )